@@ -0,0 +1,283 @@
+# backend/analysis_capture.py
+# Opt-in capture of what a live analysis session actually analyzed, so a
+# result that looks wrong or slow can be reproduced offline. Each session
+# writes one .imcap file: a JSON header followed by fixed-size frame records
+# (timestamp, timing, face rect, landmarks, the result) each trailed by an
+# optional luma payload. The reader memory-maps the file and hands out
+# zero-copy views; replay() pushes the records back through the analyzer.
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+import interview_analyzer_module
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+ANALYSIS_CAPTURE_MODE = os.environ.get("ANALYSIS_CAPTURE_MODE", "off") # "off", "frames", "roi" or "landmarks"
+ANALYSIS_CAPTURE_DIR = os.environ.get("ANALYSIS_CAPTURE_DIR", "captures")
+ANALYSIS_CAPTURE_EVERY_N = int(os.environ.get("ANALYSIS_CAPTURE_EVERY_N", "1")) # Keep every Nth analyzed frame
+ANALYSIS_CAPTURE_MAX_MB = float(os.environ.get("ANALYSIS_CAPTURE_MAX_MB", "512")) # Per session; capture stops beyond it
+ANALYSIS_CAPTURE_ROI_MARGIN = 0.5 # Context kept around the face rect in "roi" mode, as a fraction of its size
+
+CAPTURE_MODES = ("frames", "roi", "landmarks")
+MAGIC = b"IMCAP\x00\x01\x00" # Format version 1
+ALIGN = 8
+
+# Record flags
+FLAG_FACE = 1 # Landmarks were found
+FLAG_POSE = 2 # solvePnP succeeded
+FLAG_PAYLOAD = 4 # A luma payload follows the record
+FLAG_ERROR = 8 # extract_features reported an error
+
+RECORD_DTYPE = np.dtype([
+    ("t", "f8"), # Wall-clock time the frame was analyzed
+    ("processing_ms", "f4"),
+    ("yaw", "f4"), ("pitch", "f4"), ("roll", "f4"),
+    ("face_rect", "i4", (4,)), # left, top, right, bottom in frame coordinates
+    ("frame_shape", "u2", (2,)), # height, width of the analyzed frame
+    ("roi", "u2", (4,)), # x, y, height, width of the payload within the frame
+    ("landmarks", "i2", (68, 2)),
+    ("gaze", "i1"),
+    ("flags", "u1"),
+    ("payload_bytes", "u4"),
+    ("_pad", "u1", (6,)),
+]) # 336 bytes, so records stay 8-byte aligned
+
+GAZE_CODES = {label: code for code, label in enumerate(interview_analyzer_module.GAZE_LABELS.tolist())}
+
+
+def _padding(nbytes):
+    return -nbytes % ALIGN
+
+
+class CaptureWriter:
+    """
+    Appends one record per sampled frame. "frames" stores the whole luma frame
+    (replay re-runs detection and tracking), "roi" only the area around the
+    face (replay re-runs landmarks, gaze and pose), "landmarks" no pixels at
+    all (replay re-runs gaze, pose and the monitor). Writes go through a
+    buffered file; a record is a few hundred bytes plus its payload.
+    """
+
+    def __init__(self, path, mode, metadata=None, every_n=ANALYSIS_CAPTURE_EVERY_N,
+                 max_bytes=int(ANALYSIS_CAPTURE_MAX_MB * 1024 * 1024)):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"Unsupported capture mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.every_n = max(1, every_n)
+        self.max_bytes = max_bytes
+        self.frames_seen = 0
+        self.records = 0
+        self.full = False
+        header = json.dumps({"mode": mode, "created": time.time(), **(metadata or {})}).encode()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + np.uint32(len(header)).tobytes() + header + b"\x00" * _padding(12 + len(header)))
+        self.bytes_written = self._file.tell()
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+
+    def write(self, timestamp, frame, features, processing_seconds):
+        """Records one analyzed frame (frame: the ndarray handed to extract_features) if it is sampled."""
+        self.frames_seen += 1
+        if self.full or (self.frames_seen - 1) % self.every_n:
+            return
+        record = self._record[0]
+        record["t"] = timestamp
+        record["processing_ms"] = processing_seconds * 1000.0
+        record["frame_shape"] = frame.shape[:2]
+        flags = 0
+        if "error" in features:
+            flags |= FLAG_ERROR
+        face_rect = features.get("face_rect")
+        record["face_rect"] = face_rect if face_rect is not None else (0, 0, 0, 0)
+        landmarks = features.get("landmarks")
+        if landmarks is not None:
+            flags |= FLAG_FACE
+            record["landmarks"] = landmarks
+        record["gaze"] = GAZE_CODES.get(features.get("gaze"), -1)
+        if features.get("head_yaw") is not None:
+            flags |= FLAG_POSE
+            record["yaw"], record["pitch"], record["roll"] = (features["head_yaw"], features["head_pitch"],
+                                                              features["head_roll"] or 0.0)
+        else:
+            record["yaw"] = record["pitch"] = record["roll"] = np.nan
+
+        payload = self._payload(frame, face_rect)
+        record["roi"] = payload[1] if payload is not None else (0, 0, 0, 0)
+        payload_bytes = b"" if payload is None else payload[0].tobytes()
+        if payload is not None:
+            flags |= FLAG_PAYLOAD
+        record["flags"] = flags
+        record["payload_bytes"] = len(payload_bytes)
+
+        size = RECORD_DTYPE.itemsize + len(payload_bytes) + _padding(len(payload_bytes))
+        if self.bytes_written + size > self.max_bytes:
+            self.full = True
+            logger.warning(f"[ANALYSIS Capture] {self.path} reached {self.max_bytes} bytes; capture stopped.")
+            return
+        self._file.write(self._record.tobytes())
+        if payload_bytes:
+            self._file.write(payload_bytes + b"\x00" * _padding(len(payload_bytes)))
+        self.bytes_written += size
+        self.records += 1
+
+    def _payload(self, frame, face_rect):
+        """(gray uint8 array, (x, y, h, w)) to store, or None."""
+        if self.mode == "landmarks":
+            return None
+        gray = interview_analyzer_module._to_gray(frame)
+        if self.mode == "frames":
+            return gray, (0, 0) + gray.shape
+        if face_rect is None:
+            return None
+        left, top, right, bottom = face_rect
+        pad_x = int((right - left) * ANALYSIS_CAPTURE_ROI_MARGIN)
+        pad_y = int((bottom - top) * ANALYSIS_CAPTURE_ROI_MARGIN)
+        x0, y0 = max(0, left - pad_x), max(0, top - pad_y)
+        x1, y1 = min(gray.shape[1], right + pad_x), min(gray.shape[0], bottom + pad_y)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return gray[y0:y1, x0:x1], (x0, y0, y1 - y0, x1 - x0)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CaptureFile:
+    """
+    Read-only, memory-mapped view of an .imcap file. records is a structured
+    array of every complete record (a file cut short by a crash reads up to
+    its last complete record); payload(i) is a zero-copy view of record i's
+    luma pixels, or None.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an analysis capture file")
+        header_bytes = int(self._data[8:12].view(np.uint32)[0])
+        self.metadata = json.loads(bytes(self._data[12:12 + header_bytes]))
+        offset = 12 + header_bytes + _padding(12 + header_bytes)
+        headers, payload_offsets = [], []
+        while offset + RECORD_DTYPE.itemsize <= len(self._data):
+            record = self._data[offset:offset + RECORD_DTYPE.itemsize].view(RECORD_DTYPE)[0]
+            payload_bytes = int(record["payload_bytes"])
+            end = offset + RECORD_DTYPE.itemsize + payload_bytes
+            if end > len(self._data):
+                break
+            headers.append(record)
+            payload_offsets.append(offset + RECORD_DTYPE.itemsize)
+            offset = end + _padding(payload_bytes)
+        self.records = np.array(headers, dtype=RECORD_DTYPE)
+        self._payload_offsets = payload_offsets
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def mode(self):
+        return self.metadata["mode"]
+
+    def payload(self, i):
+        record = self.records[i]
+        if not record["flags"] & FLAG_PAYLOAD:
+            return None
+        height, width = int(record["roi"][2]), int(record["roi"][3])
+        start = self._payload_offsets[i]
+        return self._data[start:start + height * width].reshape(height, width)
+
+
+def _features_from_landmarks(landmarks, frame_shape, pose_solver):
+    features = {"face_detected": True, "face_rect": None, "landmarks": landmarks, "frame_shape": frame_shape,
+                "gaze": interview_analyzer_module.estimate_gaze_direction_rudimentary(landmarks, frame_shape[1])}
+    features["head_yaw"], features["head_pitch"], features["head_roll"] = pose_solver.solve(landmarks, frame_shape)
+    return features
+
+
+def _no_face():
+    return {"face_detected": False, "face_rect": None, "landmarks": None, "gaze": "N/A",
+            "head_yaw": None, "head_pitch": None, "head_roll": None}
+
+
+def replay_features(capture, vision_session=None):
+    """
+    Yields (record, features) for every record of capture, re-running as much
+    of the vision stage as the capture mode allows.
+    """
+    mode = capture.mode
+    if vision_session is None: # ROI payloads move between frames, so tracking and the motion gate cannot carry over
+        vision_session = interview_analyzer_module.VisionSession(tracking=mode == "frames", motion_gate=mode == "frames")
+    for i, record in enumerate(capture.records):
+        frame_shape = tuple(int(v) for v in record["frame_shape"])
+        if record["flags"] & FLAG_ERROR:
+            yield record, {**_no_face(), "error": "Error recorded in capture"}
+        elif mode == "frames":
+            yield record, interview_analyzer_module.extract_features(capture.payload(i), vision_session)
+        elif mode == "roi":
+            roi = capture.payload(i)
+            features = None
+            if roi is not None:
+                x0, y0 = int(record["roi"][0]), int(record["roi"][1])
+                features = interview_analyzer_module.extract_features(roi, vision_session, with_pose=False)
+            if features is not None and features["face_detected"]:
+                features = _features_from_landmarks(features["landmarks"] + (x0, y0), frame_shape,
+                                                    vision_session.pose_solver)
+            yield record, features if features is not None and features["face_detected"] else _no_face()
+        elif record["flags"] & FLAG_FACE:
+            yield record, _features_from_landmarks(record["landmarks"].astype(np.int32), frame_shape,
+                                                   vision_session.pose_solver)
+        else:
+            yield record, _no_face()
+
+
+def replay(capture, monitor=None):
+    """
+    Runs a capture through the vision stage and a CheatingMonitor as fast as
+    possible. Returns (monitor, report): frames/sec, differences from the
+    recorded results, and the monitor's final conclusion in capture time.
+    """
+    monitor = monitor if monitor is not None else interview_analyzer_module.CheatingMonitor()
+    records = capture.records
+    gaze_mismatches, yaw_errors, face_mismatches = 0, [], 0
+    started = time.perf_counter()
+    for record, features in replay_features(capture):
+        interview_analyzer_module.apply_features(features, monitor, timestamp=float(record["t"]))
+        face_mismatches += bool(record["flags"] & FLAG_FACE) != features["face_detected"]
+        if features["face_detected"] and record["flags"] & FLAG_FACE:
+            gaze_mismatches += GAZE_CODES.get(features["gaze"], -1) != record["gaze"]
+            if features["head_yaw"] is not None and record["flags"] & FLAG_POSE:
+                yaw_errors.append(abs(features["head_yaw"] - float(record["yaw"])))
+    elapsed = time.perf_counter() - started
+    report = {
+        "path": capture.path,
+        "mode": capture.mode,
+        "frames": len(records),
+        "replay_fps": round(len(records) / elapsed, 1) if elapsed > 0 else None,
+        "recorded_processing_ms_p50": round(float(np.median(records["processing_ms"])), 3) if len(records) else None,
+        "face_mismatches": int(face_mismatches),
+        "gaze_mismatches": int(gaze_mismatches),
+        "max_yaw_error_deg": round(max(yaw_errors), 3) if yaw_errors else None,
+        "conclusion": monitor.get_final_conclusion(now=float(records["t"][-1]) if len(records) else None),
+    }
+    return monitor, report
+
+
+def open_session_capture(session_id, metadata=None, mode=ANALYSIS_CAPTURE_MODE, directory=ANALYSIS_CAPTURE_DIR):
+    """A CaptureWriter for a live session, or None when capture is off or the file cannot be created."""
+    if mode == "off":
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{session_id}.imcap")
+        writer = CaptureWriter(path, mode, {"session_id": session_id, **(metadata or {})})
+    except (OSError, ValueError) as e:
+        logger.error(f"[ANALYSIS Capture {session_id}] Capture disabled: {e}")
+        return None
+    logger.info(f"[ANALYSIS Capture {session_id}] Capturing {mode} to {path}.")
+    return writer
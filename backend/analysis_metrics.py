@@ -0,0 +1,234 @@
+# backend/analysis_metrics.py
+# Cheap per-session instrumentation for the analysis hot path: counters and
+# fixed-bucket histograms updated per frame, read on demand over HTTP.
+import logging
+import os
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Trace every Nth analyzed frame of each session at DEBUG level; 0 disables tracing entirely.
+ANALYSIS_TRACE_EVERY_N_FRAMES = int(os.environ.get("ANALYSIS_TRACE_EVERY_N_FRAMES", "0"))
+
+# Per-stage timing inside interview_analyzer_module (a few perf_counter calls per frame).
+ANALYSIS_STAGE_PROFILING = os.environ.get("ANALYSIS_STAGE_PROFILING", "1") != "0"
+STAGE_WINDOW_SIZE = 1024 # Most recent samples kept per stage for the rolling percentiles
+
+YAW_BUCKETS = (-90, -60, -45, -30, -15, 0, 15, 30, 45, 60, 90) # degrees
+PITCH_BUCKETS = (30, 60, 90, 120, 150, 160, 170) # abs(pitch) in degrees; ~180 is neutral
+FRAME_MS_BUCKETS = (5, 10, 20, 35, 50, 75, 100, 150, 250, 500)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and a few increments."""
+    __slots__ = ("bounds", "counts", "count", "total")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1) # Last bucket is +inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_right(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def observe_many(self, values):
+        """observe() for each of a float64 array, in order (cumsum keeps the scalar path's rounding)."""
+        if not len(values):
+            return
+        counts = np.bincount(np.searchsorted(self.bounds, values, side="right"), minlength=len(self.counts))
+        self.counts = [total + int(count) for total, count in zip(self.counts, counts)]
+        self.count += len(values)
+        self.total = float(np.cumsum(np.concatenate(([self.total], values)))[-1])
+
+    def snapshot(self):
+        return {
+            "bounds": list(self.bounds),
+            "counts": list(self.counts),
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+        }
+
+
+class StageTimer:
+    """Splits one frame's wall time into named stages: mark(stage) charges the time since the previous mark."""
+    __slots__ = ("stages", "_last")
+
+    def __init__(self):
+        self.stages = {}
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+
+class NullStageTimer:
+    """Stand-in used when stage profiling is disabled."""
+    __slots__ = ()
+    stages = None
+
+    def mark(self, stage):
+        pass
+
+
+NULL_STAGE_TIMER = NullStageTimer()
+
+
+def new_stage_timer():
+    return StageTimer() if ANALYSIS_STAGE_PROFILING else NULL_STAGE_TIMER
+
+
+class RollingWindow:
+    """Fixed-size ring of the latest samples with on-demand percentiles."""
+    __slots__ = ("_values", "_next", "count")
+
+    def __init__(self, size=STAGE_WINDOW_SIZE):
+        self._values = np.zeros(size, dtype=np.float32)
+        self._next = 0
+        self.count = 0 # Total samples ever observed
+
+    def observe(self, value):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        self.count += 1
+
+    def summary(self):
+        filled = self._values[:min(self.count, len(self._values))]
+        if not len(filled):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(filled, (50, 95, 99))
+        return {"count": self.count, "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3), "max": round(float(filled.max()), 3)}
+
+
+class StageLatencies:
+    """Rolling per-stage latency windows (milliseconds)."""
+    __slots__ = ("_windows",)
+
+    def __init__(self):
+        self._windows = {}
+
+    def observe(self, stage_ms):
+        for stage, ms in stage_ms.items():
+            window = self._windows.get(stage)
+            if window is None:
+                window = self._windows[stage] = RollingWindow()
+            window.observe(ms)
+
+    def summary(self):
+        return {stage: window.summary() for stage, window in list(self._windows.items())}
+
+
+class SessionMetrics:
+    """Counters and histograms for one analyzed candidate."""
+    __slots__ = ("session_id", "frames", "frames_analyzed", "frames_reused", "frames_with_pose", "yaw_triggers", "pitch_triggers",
+                 "gaze_events", "head_events", "yaw", "pitch", "frame_ms", "stages")
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self.frames = 0
+        self.frames_analyzed = 0 # Frames whose features reached the monitor, reused or not
+        self.frames_reused = 0 # Answered by the motion gate with the previous frame's results
+        self.frames_with_pose = 0
+        self.yaw_triggers = 0
+        self.pitch_triggers = 0
+        self.gaze_events = 0
+        self.head_events = 0
+        self.yaw = Histogram(YAW_BUCKETS)
+        self.pitch = Histogram(PITCH_BUCKETS)
+        self.frame_ms = Histogram(FRAME_MS_BUCKETS)
+        self.stages = StageLatencies()
+
+    def observe_stages(self, stage_ms):
+        """Records one frame's per-stage timings here and in the node-wide aggregate."""
+        self.stages.observe(stage_ms)
+        node_stages.observe(stage_ms)
+
+    def observe_pose(self, yaw, pitch, yaw_triggered, pitch_triggered):
+        self.frames_with_pose += 1
+        self.yaw.observe(yaw)
+        self.pitch.observe(abs(pitch))
+        if yaw_triggered:
+            self.yaw_triggers += 1
+        if pitch_triggered:
+            self.pitch_triggers += 1
+
+    def observe_poses(self, yaws, pitches, yaw_triggered, pitch_triggered):
+        """observe_pose() over arrays of frames with a pose."""
+        self.frames_with_pose += len(yaws)
+        self.yaw.observe_many(yaws)
+        self.pitch.observe_many(np.abs(pitches))
+        self.yaw_triggers += int(np.count_nonzero(yaw_triggered))
+        self.pitch_triggers += int(np.count_nonzero(pitch_triggered))
+
+    def observe_analyzed(self, reused):
+        self.frames_analyzed += 1
+        if reused:
+            self.frames_reused += 1
+
+    def motion_gate_summary(self):
+        return {"frames_analyzed": self.frames_analyzed, "frames_reused": self.frames_reused,
+                "skip_ratio": round(self.frames_reused / self.frames_analyzed, 3) if self.frames_analyzed else 0.0}
+
+    def observe_frame_time(self, seconds):
+        self.frames += 1
+        self.frame_ms.observe(seconds * 1000.0)
+
+    def snapshot(self):
+        return {
+            "frames": self.frames,
+            "motion_gate": self.motion_gate_summary(),
+            "frames_with_pose": self.frames_with_pose,
+            "yaw_triggers": self.yaw_triggers,
+            "pitch_triggers": self.pitch_triggers,
+            "gaze_events": self.gaze_events,
+            "head_events": self.head_events,
+            "yaw_deg": self.yaw.snapshot(),
+            "abs_pitch_deg": self.pitch.snapshot(),
+            "frame_processing_ms": self.frame_ms.snapshot(),
+            "stage_latency_ms": self.stages.summary(),
+        }
+
+
+class MetricsRegistry:
+    """Live SessionMetrics by session id, for the metrics endpoint."""
+
+    def __init__(self):
+        self._sessions = {}
+
+    def register(self, session_id, metrics):
+        metrics.session_id = session_id
+        self._sessions[session_id] = metrics
+
+    def unregister(self, session_id):
+        return self._sessions.pop(session_id, None)
+
+    def get(self, session_id):
+        return self._sessions.get(session_id)
+
+    def snapshot(self):
+        return {session_id: metrics.snapshot() for session_id, metrics in list(self._sessions.items())}
+
+    def stage_profile(self):
+        """Per-stage percentiles node-wide and for each live session."""
+        return {
+            "node": node_stages.summary(),
+            "sessions": {session_id: metrics.stages.summary() for session_id, metrics in list(self._sessions.items())},
+        }
+
+
+def trace(session_id, frame_index, message):
+    """Sampled debug trace; callers check ANALYSIS_TRACE_EVERY_N_FRAMES first so disabled tracing costs nothing."""
+    logger.debug(f"[ANALYSIS Trace {session_id}] frame {frame_index}: {message}")
+
+
+node_stages = StageLatencies() # All sessions on this node, for hardware sizing
+registry = MetricsRegistry()
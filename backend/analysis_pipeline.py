@@ -0,0 +1,551 @@
+# backend/analysis_pipeline.py
+# Live analysis pipeline: frame pacing/dropping and the worker pool that runs
+# the vision stage of interview_analyzer_module off the asyncio event loop.
+import asyncio
+import functools
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import analysis_workers
+import interview_analyzer_module
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration (overridable through the environment) ---
+ANALYSIS_EXECUTOR_MODE = os.environ.get("ANALYSIS_EXECUTOR_MODE", "thread") # "thread", "process" or "shm"
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "0")) or (os.cpu_count() or 1)
+ANALYSIS_TARGET_FPS = float(os.environ.get("ANALYSIS_TARGET_FPS", "10")) # Analysis rate per session
+ANALYSIS_MIN_FPS = float(os.environ.get("ANALYSIS_MIN_FPS", "2")) # Floor when backing off under load
+ANALYSIS_SCHEDULER = os.environ.get("ANALYSIS_SCHEDULER", "per_session") # "per_session" or "batched"
+# "gray": analyze the decoder's Y plane in place; "bgr24": convert every frame (only needed for annotation)
+ANALYSIS_FRAME_FORMAT = os.environ.get("ANALYSIS_FRAME_FORMAT", "gray")
+# Admission control (per node): sessions beyond capacity are degraded, queued, then rejected
+ANALYSIS_MAX_SESSIONS = int(os.environ.get("ANALYSIS_MAX_SESSIONS", "0")) # Hard cap (0 = capacity model only)
+ANALYSIS_CAPACITY_WORKERS = float(os.environ.get("ANALYSIS_CAPACITY_WORKERS", "0")) # Usable cores (0 = executor workers)
+ANALYSIS_CAPACITY_HEADROOM = float(os.environ.get("ANALYSIS_CAPACITY_HEADROOM", "0.85")) # Fraction of them to plan for
+ANALYSIS_QUEUE_LIMIT = int(os.environ.get("ANALYSIS_QUEUE_LIMIT", "8")) # Waiting sessions before rejecting
+ANALYSIS_DEGRADED_FPS = float(os.environ.get("ANALYSIS_DEGRADED_FPS", "3")) # Analysis rate of degraded sessions
+ANALYSIS_DEGRADED_DETECT_EVERY_N = int(os.environ.get("ANALYSIS_DEGRADED_DETECT_EVERY_N", "45")) # Rarer full detections
+ANALYSIS_INITIAL_FRAME_MS = float(os.environ.get("ANALYSIS_INITIAL_FRAME_MS", "40")) # Cost estimate before measurements
+# Load the vision models on the first analysis request instead of at startup
+ANALYSIS_DEFER_MODEL_LOADING = os.environ.get("ANALYSIS_DEFER_MODEL_LOADING", "0") == "1"
+
+LUMA_PLANE_FORMATS = frozenset(("yuv420p", "yuvj420p", "nv12", "nv21", "yuv422p", "yuvj422p",
+                                "yuv444p", "yuvj444p", "gray")) # Plane 0 is 8-bit luma
+
+
+def frame_to_luma(frame):
+    """
+    Luma of a decoded av.VideoFrame as a (height, width) uint8 array. For planar
+    and semi-planar YUV this is a view over the frame's Y plane (rows padded to
+    line_size are sliced off), so there is no conversion and no copy; the view
+    keeps the frame alive. Other formats go through a gray conversion.
+    """
+    if frame.format.name in LUMA_PLANE_FORMATS:
+        plane = frame.planes[0]
+        luma = np.frombuffer(plane, dtype=np.uint8, count=plane.height * plane.line_size)
+        return luma.reshape(plane.height, plane.line_size)[:, :plane.width]
+    return frame.to_ndarray(format="gray")
+
+
+def frame_to_array(frame, frame_format=ANALYSIS_FRAME_FORMAT):
+    """The ndarray handed to extract_features for a decoded frame: luma by default, BGR if configured."""
+    if frame_format == "bgr24":
+        return frame.to_ndarray(format="bgr24")
+    return frame_to_luma(frame)
+
+
+class AnalysisExecutor:
+    """
+    Pluggable executor stage for extract_features.
+
+    "thread": a ThreadPoolExecutor sharing the already loaded models. OpenCV
+              releases the GIL, dlib mostly does not, so this keeps the loop
+              responsive but does not scale much past one core.
+    "process": a ProcessPoolExecutor, scaling with cores. Its workers come
+               from analysis_workers.worker_context() (never forked from this
+               multithreaded process) and make sure the models are loaded in
+               interview_analyzer_module.init_worker.
+    "shm": analysis_workers.SharedMemoryWorkerPool, forked by a forkserver
+           that has loaded the models (shared copy-on-write) and fed frames
+           through shared memory; sessions are pinned to a worker, which keeps
+           their VisionSession. prepare_models() starts it.
+
+    Fairness: every session has at most one frame in flight, and the worker
+    slots are handed out FIFO, so busy sessions cannot starve the others.
+
+    The executor owns each session's VisionSession (face tracking state). In
+    process mode it is shipped to the worker with the frame and sent back.
+
+    Models are loaded only where extract_features runs: in this process for
+    "thread", in the workers' forkserver (each worker, where there is none)
+    for "shm" and "process", and the parent then loads none.
+    """
+
+    def __init__(self, mode=ANALYSIS_EXECUTOR_MODE, max_workers=ANALYSIS_WORKERS):
+        if mode not in ("thread", "process", "shm"):
+            raise ValueError(f"Unknown analysis executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max(1, int(max_workers))
+        self._pool = None
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._session_locks = {} # {session_id: asyncio.Lock}
+        self._vision_sessions = {} # {session_id: interview_analyzer_module.VisionSession} (shm: only its pose_solver is used, for batches)
+        self._models_lock = asyncio.Lock()
+        self.models_ready = False
+        self.model_report = None # Load/warm-up times from the last prepare_models()
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.mode == "shm":
+            self._pool = analysis_workers.SharedMemoryWorkerPool(self.max_workers) # Forks on first use
+        elif self.mode == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=analysis_workers.worker_context(),
+                                             initializer=interview_analyzer_module.init_worker)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="analysis")
+        logger.info(f"[ANALYSIS Executor] Started {self.mode} pool with {self.max_workers} workers.")
+
+    def shutdown(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._session_locks.clear()
+        self._vision_sessions.clear()
+        logger.info("[ANALYSIS Executor] Pool shut down.")
+
+    async def prepare_models(self):
+        """
+        Loads and warms up the models wherever extract_features will run and
+        returns the load report. Thread mode loads them in a pool thread; shm
+        mode starts the workers (from a forkserver that loads the models once
+        for all of them) and asks each for its report; process mode starts
+        the workers, each loading its own copy in init_worker, and collects one
+        report per worker call. Cheap once the models are ready.
+        """
+        if self._pool is None:
+            self.start()
+        async with self._models_lock:
+            if self.models_ready:
+                return self.model_report
+            loop = asyncio.get_running_loop()
+            if self.mode == "process":
+                # Submitted together so the pool spawns (and warms up) all its workers now
+                reports = await asyncio.gather(*(loop.run_in_executor(self._pool, interview_analyzer_module.model_report)
+                                                 for _ in range(self.max_workers)))
+                self.models_ready = all(report["ready"] for report in reports)
+                self.model_report = {"mode": self.mode, "workers": reports}
+            elif self.mode == "shm":
+                await self._pool.start() # No-op once started; workers retry a load that failed in the forkserver
+                reports = await self._pool.model_reports()
+                self.models_ready = all(report["ready"] for report in reports)
+                self.model_report = {"mode": self.mode, "workers": reports}
+            else:
+                self.models_ready = await loop.run_in_executor(
+                    self._pool, functools.partial(interview_analyzer_module.load_models, warm_up=True))
+                self.model_report = {"mode": self.mode, **interview_analyzer_module.model_report()}
+            return self.model_report
+
+    def open_session(self, session_id, detect_every_n=None):
+        """detect_every_n overrides the tracker's full-detection interval (degraded sessions)."""
+        vision_options = {"detect_every_n": detect_every_n} if detect_every_n else {}
+        self._session_locks.setdefault(session_id, asyncio.Lock())
+        if session_id not in self._vision_sessions:
+            self._vision_sessions[session_id] = interview_analyzer_module.VisionSession(**vision_options)
+            if self.mode == "shm" and vision_options:
+                if self._pool is None:
+                    self.start()
+                self._pool.open_session(session_id, **vision_options)
+
+    def pose_solver(self, session_id):
+        vision_session = self._vision_sessions.get(session_id)
+        return vision_session.pose_solver if vision_session is not None else None
+
+    def session_stats(self, session_id):
+        if self.mode == "shm" and self._pool is not None:
+            return self._pool.session_stats(session_id)
+        vision_session = self._vision_sessions.get(session_id)
+        return vision_session.stats() if vision_session is not None else None
+
+    def close_session(self, session_id):
+        """Forgets the session and returns its final vision stats."""
+        self._session_locks.pop(session_id, None)
+        vision_session = self._vision_sessions.pop(session_id, None)
+        if self.mode == "shm" and self._pool is not None:
+            return self._pool.close_session(session_id)
+        return vision_session.stats() if vision_session is not None else None
+
+    async def analyze(self, session_id, frame, with_pose=True):
+        """Runs extract_features for one session's frame on the pool and returns the features dict."""
+        if self._pool is None:
+            self.start()
+        if session_id not in self._session_locks:
+            self.open_session(session_id)
+        async with self._session_locks[session_id]: # One in-flight frame per session
+            async with self._slots: # FIFO across sessions
+                loop = asyncio.get_running_loop()
+                vision_session = self._vision_sessions[session_id]
+                if self.mode == "shm":
+                    return await self._pool.analyze(session_id, frame, with_pose)
+                if self.mode == "process":
+                    features, vision_session = await loop.run_in_executor(
+                        self._pool, interview_analyzer_module.extract_features_remote, frame, vision_session, with_pose)
+                    if session_id in self._vision_sessions: # Not closed meanwhile
+                        self._vision_sessions[session_id] = vision_session
+                    return features
+                return await loop.run_in_executor(
+                    self._pool, interview_analyzer_module.extract_features, frame, vision_session, with_pose)
+
+    async def finish_batch(self, features_list, pose_solvers):
+        """
+        Runs finish_features_batch off the event loop: on the pool in thread
+        mode, on the loop's default thread pool otherwise (the pose solvers live
+        in this process, and the batch is mostly GIL-free OpenCV work).
+        """
+        if self._pool is None:
+            self.start()
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool if self.mode == "thread" else None,
+                                              interview_analyzer_module.finish_features_batch,
+                                              features_list, pose_solvers)
+
+
+class LatestFrameSlot:
+    """
+    Single-slot mailbox between the track receiver and the analyzer.
+    put() overwrites any frame not yet taken, so the analyzer always sees the
+    newest frame and a slow analysis never builds a backlog.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._event = asyncio.Event()
+        self.closed = False
+        self.frames_received = 0
+        self.frames_dropped = 0
+
+    def put(self, frame):
+        if self._frame is not None:
+            self.frames_dropped += 1
+        self._frame = frame
+        self.frames_received += 1
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    def take_nowait(self):
+        """Returns the newest frame if one is waiting, else None."""
+        frame, self._frame = self._frame, None
+        return frame
+
+    async def wait_closed(self):
+        while not self.closed:
+            self._event.clear()
+            await self._event.wait()
+
+    async def get(self):
+        """Waits for and returns the newest frame, or None once the slot is closed and drained."""
+        while self._frame is None:
+            if self.closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+class AdaptiveRateController:
+    """
+    Paces one session's analysis at target_fps and backs off towards min_fps
+    when frames take longer than their budget (a busy pool or CPU shows up
+    as longer waits for a worker slot), recovering once there is headroom.
+    Also measures the rate actually achieved, for CheatingMonitor.
+    """
+    BACKOFF_LOAD = 0.9 # Fraction of the frame budget above which we slow down
+    RECOVER_LOAD = 0.5 # Fraction below which we speed back up
+    SMOOTHING = 0.2 # EWMA weight of the newest sample
+
+    def __init__(self, target_fps=ANALYSIS_TARGET_FPS, min_fps=ANALYSIS_MIN_FPS):
+        self.target_fps = target_fps
+        self.min_fps = min(min_fps, target_fps)
+        self.current_fps = target_fps
+        self.measured_fps = target_fps
+        self.avg_processing_seconds = 0.0
+        self._last_frame_at = None
+
+    def interval(self):
+        return 1.0 / self.current_fps
+
+    def record(self, processing_seconds):
+        """Records one analyzed frame and adjusts current_fps from its cost."""
+        now = time.monotonic()
+        if self._last_frame_at is not None:
+            elapsed = now - self._last_frame_at
+            if elapsed > 0:
+                self.measured_fps += self.SMOOTHING * (1.0 / elapsed - self.measured_fps)
+        self._last_frame_at = now
+        self.avg_processing_seconds += self.SMOOTHING * (processing_seconds - self.avg_processing_seconds)
+
+        load = self.avg_processing_seconds * self.current_fps
+        if load > self.BACKOFF_LOAD:
+            self.current_fps = max(self.min_fps, self.current_fps * 0.8)
+        elif load < self.RECOVER_LOAD:
+            self.current_fps = min(self.target_fps, self.current_fps * 1.1)
+
+
+def frame_cost_seconds(features, fallback_seconds):
+    """Worker time one frame took: the sum of its stage timings when profiled, else the given wall time."""
+    stage_ms = features.get("stage_ms")
+    return sum(stage_ms.values()) / 1000.0 if stage_ms else fallback_seconds
+
+
+class Admission:
+    """Outcome of AnalysisCapacity.admit() for one session, and the rate/tracking it was admitted with."""
+    ACCEPTED = "accepted"
+    DEGRADED = "degraded"
+    QUEUED = "queued"
+    REJECTED = "rejected"
+    __slots__ = ("session_id", "decision", "fps", "detect_every_n", "position")
+
+    def __init__(self, session_id, decision, fps=None, detect_every_n=None, position=None):
+        self.session_id = session_id
+        self.decision = decision
+        self.fps = fps # Analysis rate to run at
+        self.detect_every_n = detect_every_n # Tracker override, None = default
+        self.position = position # Place in the queue when QUEUED
+
+    def to_dict(self):
+        return {"decision": self.decision, "analysis_fps": self.fps,
+                "detect_every_n": self.detect_every_n, "queue_position": self.position}
+
+
+class AnalysisCapacity:
+    """
+    Admission control for analysis sessions on this node.
+
+    Capacity is workers * headroom worker-seconds per second. Demand is the sum
+    of the admitted sessions' planned rates times the measured cost of a frame
+    (an EWMA over all sessions' vision stage times). A new session is accepted
+    at target_fps if that fits, degraded (degraded_fps, rarer full detections)
+    if only that fits, queued while the queue has room, and rejected otherwise.
+    Queued sessions are admitted in order as sessions end or frames get cheaper.
+    Other work on the node (offline jobs) reserves a share of the capacity.
+    """
+    SMOOTHING = 0.05 # EWMA weight of the newest frame cost
+
+    def __init__(self, workers, target_fps=ANALYSIS_TARGET_FPS, degraded_fps=ANALYSIS_DEGRADED_FPS,
+                 max_sessions=ANALYSIS_MAX_SESSIONS, queue_limit=ANALYSIS_QUEUE_LIMIT,
+                 headroom=ANALYSIS_CAPACITY_HEADROOM):
+        self.workers = workers
+        self.target_fps = target_fps
+        self.degraded_fps = min(degraded_fps, target_fps)
+        self.max_sessions = max_sessions
+        self.queue_limit = queue_limit
+        self.headroom = headroom
+        self.frame_seconds = ANALYSIS_INITIAL_FRAME_MS / 1000.0
+        self.frames_observed = 0
+        self.rejected = 0
+        self._admitted = {} # {session_id: Admission}
+        self._queue = OrderedDict() # {session_id: (Admission, asyncio.Future)}
+        self._reserved = {} # {key: worker-seconds per second held by non-session work}
+
+    def capacity(self):
+        """Worker-seconds per second available for analysis."""
+        return self.workers * self.headroom
+
+    def demand(self, extra_fps=0.0):
+        """Worker-seconds per second the admitted sessions (plus one at extra_fps) are planned to use."""
+        planned_fps = sum(admission.fps for admission in self._admitted.values()) + extra_fps
+        return planned_fps * self.frame_seconds + sum(self._reserved.values())
+
+    def spare(self):
+        """Worker-seconds per second neither admitted sessions nor reservations are planned to use."""
+        return max(0.0, self.capacity() - self.demand())
+
+    def reserve(self, key, worker_seconds):
+        """Holds worker_seconds of capacity for non-session work until release(key)."""
+        self._reserved[key] = worker_seconds
+
+    def observe_frame(self, seconds):
+        self.frame_seconds += self.SMOOTHING * (seconds - self.frame_seconds)
+        self.frames_observed += 1
+        if self._queue:
+            self._promote()
+
+    def _decide(self, session_id):
+        if self.max_sessions and len(self._admitted) >= self.max_sessions:
+            return None
+        if self.demand(self.target_fps) <= self.capacity():
+            return Admission(session_id, Admission.ACCEPTED, self.target_fps)
+        if self.demand(self.degraded_fps) <= self.capacity():
+            return Admission(session_id, Admission.DEGRADED, self.degraded_fps, ANALYSIS_DEGRADED_DETECT_EVERY_N)
+        return None
+
+    def admit(self, session_id):
+        """Returns the Admission for a new session; QUEUED ones are resolved through wait()."""
+        admission = self._decide(session_id) if not self._queue else None # No overtaking the queue
+        if admission is not None:
+            self._admitted[session_id] = admission
+            return admission
+        if len(self._queue) < self.queue_limit:
+            admission = Admission(session_id, Admission.QUEUED, position=len(self._queue) + 1)
+            self._queue[session_id] = (admission, asyncio.get_running_loop().create_future())
+            return admission
+        self.rejected += 1
+        return Admission(session_id, Admission.REJECTED)
+
+    async def wait(self, session_id):
+        """
+        Waits for a queued session's turn. Returns its ACCEPTED/DEGRADED
+        Admission, or None if release() took it out of the queue first. If the
+        waiting task itself is cancelled, its place is released and the
+        cancellation propagates.
+        """
+        entry = self._queue.get(session_id)
+        if entry is None:
+            return self._admitted.get(session_id)
+        try:
+            return await entry[1]
+        except asyncio.CancelledError:
+            self.release(session_id)
+            raise
+
+    def release(self, session_id):
+        """Frees the session's share (or its queue place, or a reservation) and admits whoever now fits."""
+        self._admitted.pop(session_id, None)
+        self._reserved.pop(session_id, None)
+        entry = self._queue.pop(session_id, None)
+        if entry is not None and not entry[1].done():
+            entry[1].set_result(None) # wait() returns None
+        self._promote()
+
+    def _promote(self):
+        while self._queue:
+            session_id, (_, future) = next(iter(self._queue.items()))
+            admission = self._decide(session_id)
+            if admission is None:
+                break
+            del self._queue[session_id]
+            self._admitted[session_id] = admission
+            if not future.done():
+                future.set_result(admission)
+        for position, (admission, _) in enumerate(self._queue.values(), 1):
+            admission.position = position
+
+    def snapshot(self):
+        return {
+            "workers": self.workers,
+            "capacity_worker_seconds": round(self.capacity(), 3),
+            "demand_worker_seconds": round(self.demand(), 3),
+            "frame_ms": round(self.frame_seconds * 1000.0, 2),
+            "frames_observed": self.frames_observed,
+            "admitted": {session_id: admission.to_dict() for session_id, admission in self._admitted.items()},
+            "queued": list(self._queue),
+            "reserved": dict(self._reserved),
+            "rejected_total": self.rejected,
+        }
+
+
+class BatchAnalysisScheduler:
+    """
+    Central analysis loop for all sessions (ANALYSIS_SCHEDULER="batched").
+    Each tick takes the newest frame from every registered session, runs the
+    detection/landmark stages for the whole batch on the shared executor, then
+    gaze and head pose for the batch at once (finish_features_batch, also off
+    the event loop through the executor), and hands each result to its
+    session's on_result callback. Every session gets at most
+    one frame per tick, and the tick rate backs off as a whole under load.
+    """
+
+    def __init__(self, executor, target_fps=ANALYSIS_TARGET_FPS, min_fps=ANALYSIS_MIN_FPS):
+        self.executor = executor
+        self.rate_controller = AdaptiveRateController(target_fps, min_fps)
+        self._sessions = {} # {session_id: (LatestFrameSlot, on_result, min_interval)}
+        self._last_taken = {} # {session_id: monotonic time of its last analyzed frame}
+        self._task = None
+        self.ticks = 0
+        self.last_batch_size = 0
+
+    def register(self, session_id, frame_slot, on_result, max_fps=None, detect_every_n=None):
+        """
+        on_result(features, processing_seconds, frame) is called on the event loop
+        for every analyzed frame (frame: the ndarray that was analyzed). max_fps caps this session below the tick rate
+        (degraded sessions); detect_every_n is passed to its VisionSession.
+        """
+        self.executor.open_session(session_id, detect_every_n)
+        self._sessions[session_id] = (frame_slot, on_result, 1.0 / max_fps if max_fps else 0.0)
+
+    def unregister(self, session_id):
+        self._sessions.pop(session_id, None)
+        self._last_taken.pop(session_id, None)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("[ANALYSIS Scheduler] Batched scheduler started.")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _analyze_one(self, session_id, frame):
+        img = frame_to_array(frame)
+        return img, await self.executor.analyze(session_id, img, with_pose=False)
+
+    async def _run(self):
+        while True:
+            tick_started = time.monotonic()
+            batch = []
+            for session_id, (frame_slot, on_result, min_interval) in list(self._sessions.items()):
+                if min_interval and tick_started - self._last_taken.get(session_id, 0.0) < min_interval:
+                    continue # Capped session: leave its newest frame in the slot for a later tick
+                frame = frame_slot.take_nowait()
+                if frame is not None:
+                    self._last_taken[session_id] = tick_started
+                    batch.append((session_id, frame, on_result))
+
+            if batch:
+                results = await asyncio.gather(*(self._analyze_one(session_id, frame) for session_id, frame, _ in batch),
+                                               return_exceptions=True)
+                done = [(entry, result) for entry, result in zip(batch, results)
+                        if not isinstance(result, BaseException)]
+                for (session_id, _, _), error in zip(batch, results):
+                    if isinstance(error, BaseException):
+                        logger.error(f"[ANALYSIS Scheduler] Frame for {session_id} failed: {error!r}")
+                features_list = [features for _, (_, features) in done]
+                solvers = [self.executor.pose_solver(session_id) or interview_analyzer_module.HeadPoseSolver()
+                           for (session_id, _, _), _ in done]
+                if features_list:
+                    try:
+                        await self.executor.finish_batch(features_list, solvers)
+                    except Exception as e:
+                        logger.error(f"[ANALYSIS Scheduler] Pose batch failed: {e!r}")
+                        done = []
+                elapsed = time.monotonic() - tick_started
+                for (session_id, _, on_result), (img, features) in done:
+                    try:
+                        on_result(features, elapsed, img)
+                    except Exception as e:
+                        logger.error(f"[ANALYSIS Scheduler] Result handler for {session_id} failed: {e}", exc_info=True)
+                self.rate_controller.record(elapsed)
+                self.ticks += 1
+            self.last_batch_size = len(batch)
+
+            delay = tick_started + self.rate_controller.interval() - time.monotonic()
+            await asyncio.sleep(max(0.0, delay))
@@ -0,0 +1,280 @@
+# backend/analysis_reports.py
+# Persists each analysis session's final conclusion, its downsampled timeline
+# and its raw per-frame signal (for re-scoring, see analysis_rescoring.py) so
+# reviewers can pull reports after the session is gone. Writes are
+# queued from the event loop and inserted in batches by one writer thread over
+# a pooled SQLAlchemy engine (PostgreSQL in production, SQLite locally).
+import io
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import sqlalchemy as sa
+
+import analysis_timeline
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+ANALYSIS_DATABASE_URL = (os.environ.get("ANALYSIS_DATABASE_URL") or os.environ.get("DATABASE_URL")
+                         or "sqlite:///analysis_reports.db") # "off" disables persistence
+ANALYSIS_REPORT_BATCH_SIZE = int(os.environ.get("ANALYSIS_REPORT_BATCH_SIZE", "50")) # Reports per transaction
+ANALYSIS_REPORT_FLUSH_SECONDS = float(os.environ.get("ANALYSIS_REPORT_FLUSH_SECONDS", "1.0")) # Max wait to fill a batch
+ANALYSIS_REPORT_QUEUE_LIMIT = int(os.environ.get("ANALYSIS_REPORT_QUEUE_LIMIT", "1000")) # Reports dropped beyond this backlog
+ANALYSIS_DB_POOL_SIZE = int(os.environ.get("ANALYSIS_DB_POOL_SIZE", "4"))
+
+metadata = sa.MetaData()
+
+analysis_reports = sa.Table(
+    "analysis_reports", metadata,
+    sa.Column("report_id", sa.String(36), primary_key=True),
+    sa.Column("room_id", sa.String(100), index=True),
+    sa.Column("target_sid", sa.String(64), nullable=False, index=True),
+    sa.Column("participant_name", sa.String(100)),
+    sa.Column("host_sid", sa.String(64)),
+    sa.Column("node_id", sa.String(64)),
+    sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+    sa.Column("ended_at", sa.DateTime(timezone=True), nullable=False),
+    sa.Column("status_text", sa.Text),
+    sa.Column("suspicion_score", sa.Integer),
+    sa.Column("trust_score", sa.Integer),
+    sa.Column("frames_analyzed", sa.Integer),
+    sa.Column("details", sa.JSON), # get_final_conclusion()["details"] minus the timeline
+)
+
+analysis_timeline_buckets = sa.Table(
+    "analysis_timeline_buckets", metadata,
+    sa.Column("report_id", sa.String(36), sa.ForeignKey("analysis_reports.report_id", ondelete="CASCADE"),
+              primary_key=True),
+    sa.Column("start_s", sa.Float, primary_key=True), # Seconds after started_at
+    sa.Column("frames", sa.Integer, nullable=False),
+    sa.Column("gaze_deflected_ratio", sa.Float),
+    sa.Column("head_turned_ratio", sa.Float),
+    sa.Column("mean_yaw", sa.Float),
+    sa.Column("max_abs_yaw", sa.Float),
+)
+
+analysis_signals = sa.Table(
+    "analysis_signals", metadata,
+    sa.Column("report_id", sa.String(36), sa.ForeignKey("analysis_reports.report_id", ondelete="CASCADE"),
+              primary_key=True),
+    sa.Column("frames", sa.Integer, nullable=False),
+    sa.Column("dropped_frames", sa.Integer, nullable=False), # Past ANALYSIS_SIGNAL_MAX_FRAMES; not re-scorable
+    sa.Column("data", sa.LargeBinary, nullable=False), # encode_signal()
+)
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def encode_signal(rows):
+    """A SIGNAL_DTYPE array as compressed bytes (columns stored separately, so they compress well)."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{field: rows[field] for field in analysis_timeline.SIGNAL_DTYPE.names})
+    return buffer.getvalue()
+
+
+def decode_signal(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as columns:
+        rows = np.empty(len(columns["t"]), dtype=analysis_timeline.SIGNAL_DTYPE)
+        for field in analysis_timeline.SIGNAL_DTYPE.names:
+            rows[field] = columns[field]
+    return rows
+
+
+def build_report(target_sid, conclusion, started_at, host_sid=None, room_id=None, participant_name=None, node_id=None):
+    """Flattens a get_final_conclusion() result into the rows the writer inserts. Cheap; runs on the event loop."""
+    details = dict(conclusion.get("details") or {})
+    timeline = details.pop("timeline", None) or []
+    report_id = str(uuid.uuid4())
+    report = {
+        "report_id": report_id,
+        "room_id": room_id,
+        "target_sid": target_sid,
+        "participant_name": participant_name,
+        "host_sid": host_sid,
+        "node_id": node_id,
+        "started_at": _utc(started_at),
+        "ended_at": _utc(time.time()),
+        "status_text": conclusion.get("status_text"),
+        "suspicion_score": details.get("suspicion_score_final"),
+        "trust_score": details.get("trust_score"),
+        "frames_analyzed": details.get("total_frames_analyzed"),
+        "details": details,
+    }
+    buckets = [{"report_id": report_id, **bucket} for bucket in timeline]
+    return report, buckets
+
+
+class AnalysisReportWriter:
+    """
+    submit() never blocks: reports go onto a bounded queue (and are dropped,
+    counted, when the database falls that far behind). The writer thread
+    takes up to batch_size reports, waiting at most flush_seconds for a batch
+    to fill, compresses their signals and inserts them with their timeline
+    buckets in one transaction. Reads (list_reports, get_report,
+    load_signals) are blocking; call them off the loop.
+    """
+
+    def __init__(self, url=ANALYSIS_DATABASE_URL, batch_size=ANALYSIS_REPORT_BATCH_SIZE,
+                 flush_seconds=ANALYSIS_REPORT_FLUSH_SECONDS, queue_limit=ANALYSIS_REPORT_QUEUE_LIMIT,
+                 pool_size=ANALYSIS_DB_POOL_SIZE):
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.pool_size = pool_size
+        self.engine = None
+        self._queue = queue.Queue(maxsize=queue_limit)
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def enabled(self):
+        return bool(self.url) and self.url != "off"
+
+    def start(self):
+        """Creates the engine and tables and starts the writer thread (connects once, at startup)."""
+        if not self.enabled or self._thread is not None:
+            return
+        options = {"pool_pre_ping": True}
+        if self.url.startswith("sqlite"):
+            options["connect_args"] = {"check_same_thread": False} # Writer thread plus reader threads
+        else:
+            options.update(pool_size=self.pool_size, max_overflow=self.pool_size)
+        self.engine = sa.create_engine(self.url, **options)
+        metadata.create_all(self.engine)
+        self._thread = threading.Thread(target=self._run, name="analysis-report-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"[ANALYSIS Reports] Persisting reports to {self.engine.url.render_as_string(hide_password=True)}.")
+
+    def submit(self, report, buckets, signal=None):
+        """signal: the session's FrameSignal rows (a copy; encoded on the writer thread), if it should be kept."""
+        if self._thread is None:
+            return False
+        try:
+            self._queue.put_nowait((report, buckets, signal))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"[ANALYSIS Reports] Write queue full; dropped report {report['report_id']}.")
+            return False
+
+    def stop(self, timeout=5.0):
+        """Flushes what is queued (up to timeout) and closes the pool."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        self.engine.dispose()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch):
+        reports = [report for report, _, _ in batch]
+        buckets = [bucket for _, report_buckets, _ in batch for bucket in report_buckets]
+        try:
+            signals = [{"report_id": report["report_id"], "frames": len(signal),
+                        "dropped_frames": report["details"].get("signal_dropped_frames", 0),
+                        "data": encode_signal(signal)} for report, _, signal in batch if signal is not None]
+            with self.engine.begin() as conn:
+                conn.execute(analysis_reports.insert(), reports)
+                if buckets:
+                    conn.execute(analysis_timeline_buckets.insert(), buckets)
+                if signals:
+                    conn.execute(analysis_signals.insert(), signals)
+            self.written += len(reports)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(reports)
+            logger.error(f"[ANALYSIS Reports] Failed to write {len(reports)} reports: {e}", exc_info=True)
+
+    def list_reports(self, room_id=None, target_sid=None, limit=50):
+        """Newest reports first, without their timelines."""
+        query = sa.select(analysis_reports).order_by(analysis_reports.c.ended_at.desc()).limit(limit)
+        if room_id is not None:
+            query = query.where(analysis_reports.c.room_id == room_id)
+        if target_sid is not None:
+            query = query.where(analysis_reports.c.target_sid == target_sid)
+        with self.engine.connect() as conn:
+            return [self._row(row) for row in conn.execute(query).mappings()]
+
+    def get_report(self, report_id):
+        """The report with its timeline buckets, or None."""
+        with self.engine.connect() as conn:
+            row = conn.execute(sa.select(analysis_reports).where(analysis_reports.c.report_id == report_id)
+                               ).mappings().first()
+            if row is None:
+                return None
+            buckets = conn.execute(sa.select(analysis_timeline_buckets)
+                                   .where(analysis_timeline_buckets.c.report_id == report_id)
+                                   .order_by(analysis_timeline_buckets.c.start_s)).mappings()
+            report = self._row(row)
+            report["timeline"] = [{k: v for k, v in bucket.items() if k != "report_id"} for bucket in buckets]
+        return report
+
+    def signal_report_ids(self, report_ids=None, room_id=None, limit=1000):
+        """Ids of reports that have a stored signal, newest first."""
+        query = (sa.select(analysis_reports.c.report_id)
+                 .join(analysis_signals, analysis_signals.c.report_id == analysis_reports.c.report_id)
+                 .order_by(analysis_reports.c.ended_at.desc()).limit(limit))
+        if report_ids is not None:
+            query = query.where(analysis_reports.c.report_id.in_(report_ids))
+        if room_id is not None:
+            query = query.where(analysis_reports.c.room_id == room_id)
+        with self.engine.connect() as conn:
+            return list(conn.execute(query).scalars())
+
+    def load_signals(self, report_ids):
+        """
+        [(report row, SIGNAL_DTYPE array)] for the given ids that have a stored
+        signal, in the order given. Each row also carries the signal's
+        dropped_frames (frames past ANALYSIS_SIGNAL_MAX_FRAMES, not stored).
+        """
+        query = (sa.select(analysis_reports, analysis_signals.c.data, analysis_signals.c.dropped_frames)
+                 .join(analysis_signals, analysis_signals.c.report_id == analysis_reports.c.report_id)
+                 .where(analysis_reports.c.report_id.in_(report_ids)))
+        with self.engine.connect() as conn:
+            rows = {row["report_id"]: row for row in conn.execute(query).mappings()}
+        return [(self._row({k: v for k, v in rows[report_id].items() if k != "data"}),
+                 decode_signal(rows[report_id]["data"])) for report_id in report_ids if report_id in rows]
+
+    @staticmethod
+    def _row(row):
+        report = dict(row)
+        for key in ("started_at", "ended_at"):
+            if report[key] is not None:
+                report[key] = report[key].isoformat()
+        return report
+
+    def stats(self):
+        return {"enabled": self.enabled, "queued": self._queue.qsize(), "written": self.written,
+                "batches": self.batches, "dropped": self.dropped, "failed": self.failed}
@@ -0,0 +1,180 @@
+# backend/analysis_rescoring.py
+# Re-scores finished (or live) sessions under a different scoring policy from
+# their recorded per-frame signal (analysis_timeline.FrameSignal), without
+# re-running vision. Many sessions are scored in one vectorized pass: their
+# signals are concatenated, thresholds applied to whole columns, and runs,
+# events and totals reduced per session, so tuning a policy over the whole
+# interview history takes seconds.
+#
+# Usage (from backend/):
+#   python analysis_rescoring.py --set yaw_threshold=25 --set head_away_seconds=4 --limit 10000
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+import analysis_reports
+import analysis_timeline
+import interview_analyzer_module
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+ANALYSIS_RESCORE_PAGE_SIZE = int(os.environ.get("ANALYSIS_RESCORE_PAGE_SIZE", "500")) # Stored sessions loaded and scored per pass
+ANALYSIS_RESCORE_MAX_SESSIONS = int(os.environ.get("ANALYSIS_RESCORE_MAX_SESSIONS", "100000"))
+
+
+def _session_events(times, sessions, count, threshold, gap):
+    """Sustained events per session from the flagged frames' times (sessions non-decreasing, times ordered within each)."""
+    if not len(times):
+        return np.zeros(count, dtype=np.int64)
+    starts = np.empty(len(times), dtype=bool)
+    starts[0] = True
+    starts[1:] = (np.diff(times) > gap) | (np.diff(sessions) != 0) # Runs never cross sessions
+    _, _, _, event_index = interview_analyzer_module.sustained_runs(times, starts, threshold)
+    return np.bincount(sessions[event_index], minlength=count)
+
+
+def rescore_signals(signals, policy, durations=None):
+    """
+    Final verdicts for many sessions' SIGNAL_DTYPE arrays under policy (see
+    interview_analyzer_module.scoring_policy), in one pass. durations: each
+    session's analyzed seconds (frames without a face count too); defaults to
+    the span of its signal. Returns one dict per session, shaped like the
+    matching get_final_conclusion() fields.
+    """
+    count = len(signals)
+    if not count:
+        return []
+    lengths = np.array([len(signal) for signal in signals], dtype=np.int64)
+    rows = np.concatenate(signals) if lengths.sum() else np.zeros(0, dtype=analysis_timeline.SIGNAL_DTYPE)
+    sessions = np.repeat(np.arange(count), lengths)
+    times = rows["t"]
+    yaws = rows["yaw"].astype(np.float64)
+    pitches = rows["pitch"].astype(np.float64)
+
+    gaze_deflected = (rows["gaze"] == 0) | (rows["gaze"] == 1) # Looking Left / Looking Right
+    has_pose = ~(np.isnan(yaws) | np.isnan(pitches))
+    turned_away = has_pose & ((np.abs(yaws) > policy["yaw_threshold"])
+                              | (np.abs(pitches) < 180 - policy["pitch_threshold_looking_away"]))
+    gaze_frames = np.bincount(sessions[gaze_deflected], minlength=count)
+    head_frames = np.bincount(sessions[turned_away], minlength=count)
+    gaze_events = _session_events(times[gaze_deflected], sessions[gaze_deflected], count,
+                                  policy["gaze_deflection_seconds"], policy["run_gap_seconds"])
+    head_events = _session_events(times[turned_away], sessions[turned_away], count,
+                                  policy["head_away_seconds"], policy["run_gap_seconds"])
+    if durations is None:
+        durations = [float(signal["t"][-1] - signal["t"][0]) if len(signal) else 0.0 for signal in signals]
+    suspicion, trust = interview_analyzer_module.final_scores(lengths, gaze_frames, head_frames, durations, policy)
+
+    results = []
+    for frames, gaze, head, gaze_event_count, head_event_count, suspicion_score, trust_score in zip(
+            lengths.tolist(), gaze_frames.tolist(), head_frames.tolist(), gaze_events.tolist(), head_events.tolist(),
+            suspicion.tolist(), trust.tolist()):
+        results.append({
+            "status_text": interview_analyzer_module.concern_status_text(suspicion_score, gaze > 0 or head > 0, policy),
+            "total_frames_analyzed": frames,
+            "suspicion_score_final": suspicion_score,
+            "trust_score": trust_score,
+            "gaze_deflection_count": gaze,
+            "head_turn_count": head,
+            "key_events_total": gaze_event_count + head_event_count,
+        })
+    return results
+
+
+def rescore_monitor(monitor, policy, now=None):
+    """One session, live or restored, under policy."""
+    end_time = monitor.last_frame_time if now is None else now
+    duration = end_time - monitor.first_frame_time if monitor.first_frame_time is not None else 0.0
+    return rescore_signals([monitor.signal.rows()], policy, [duration])[0]
+
+
+def _concern(status_text):
+    return status_text.split(" (", 1)[0] # "High Concern", "Moderate Concern", "Low Concern"
+
+
+def rescore_reports(writer, policy, report_ids=None, room_id=None, limit=ANALYSIS_RESCORE_MAX_SESSIONS,
+                    page_size=ANALYSIS_RESCORE_PAGE_SIZE):
+    """
+    Re-scores stored reports (newest first, optionally filtered) page by page.
+    Blocking; run it off the event loop. Returns per-report before/after
+    scores and how many reports changed concern level. Reports whose signal
+    was truncated (frames dropped past ANALYSIS_SIGNAL_MAX_FRAMES) are only
+    scored on the stored part: they are flagged and left out of that count.
+    """
+    started = time.perf_counter()
+    ids = writer.signal_report_ids(report_ids, room_id, min(limit, ANALYSIS_RESCORE_MAX_SESSIONS))
+    results, frames, changed, truncated = [], 0, 0, 0
+    for page in range(0, len(ids), page_size):
+        loaded = writer.load_signals(ids[page:page + page_size])
+        durations = [(report["details"] or {}).get("duration_analyzed_seconds", 0.0) for report, _ in loaded]
+        scored = rescore_signals([signal for _, signal in loaded], policy, durations)
+        for (report, signal), rescored in zip(loaded, scored):
+            frames += len(signal)
+            is_truncated = report["dropped_frames"] > 0
+            truncated += is_truncated
+            if not is_truncated:
+                changed += _concern(rescored["status_text"]) != _concern(report["status_text"] or "")
+            results.append({
+                "report_id": report["report_id"],
+                "room_id": report["room_id"],
+                "participant_name": report["participant_name"],
+                "ended_at": report["ended_at"],
+                "original": {"status_text": report["status_text"], "suspicion_score_final": report["suspicion_score"],
+                             "trust_score": report["trust_score"]},
+                "rescored": rescored,
+                "truncated": is_truncated,
+            })
+    elapsed = time.perf_counter() - started
+    logger.info(f"[ANALYSIS Rescore] {len(results)} reports ({frames} frames) re-scored in {elapsed:.2f}s; "
+                f"{changed} changed concern level, {truncated} truncated.")
+    return {"policy": policy, "reports": results, "sessions": len(results), "frames": frames,
+            "concern_level_changed": changed, "truncated": truncated, "seconds": round(elapsed, 3)}
+
+
+def _setting(text):
+    key, _, value = text.partition("=")
+    try:
+        return key, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected name=number, got {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored analysis reports under a new policy")
+    parser.add_argument("--set", type=_setting, action="append", default=[], metavar="NAME=VALUE",
+                        help=f"Policy override; one of {', '.join(interview_analyzer_module.POLICY_DEFAULTS)}")
+    parser.add_argument("--room-id")
+    parser.add_argument("--limit", type=int, default=ANALYSIS_RESCORE_MAX_SESSIONS)
+    parser.add_argument("--output", help="Write the per-report results to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        policy = interview_analyzer_module.scoring_policy(**dict(args.set))
+    except ValueError as e:
+        sys.exit(str(e))
+    writer = analysis_reports.AnalysisReportWriter()
+    if not writer.enabled:
+        sys.exit("Analysis report persistence is disabled (ANALYSIS_DATABASE_URL=off).")
+    writer.start()
+    try:
+        result = rescore_reports(writer, policy, room_id=args.room_id, limit=args.limit)
+    finally:
+        writer.stop()
+    print(f"{result['sessions']} sessions, {result['frames']} frames re-scored in {result['seconds']}s; "
+          f"{result['concern_level_changed']} changed concern level "
+          f"({result['truncated']} truncated, not compared).", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps({k: v for k, v in result.items() if k != "reports"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# backend/analysis_timeline.py
+# Bounded per-session timeline for CheatingMonitor: the most recent frames at
+# full resolution in a NumPy ring buffer, older frames folded into fixed-width
+# summary buckets that get coarser (never bigger) as an interview runs long.
+# FrameSignal keeps the raw per-frame inputs of the whole session for re-scoring.
+import os
+
+import numpy as np
+
+# --- Configuration ---
+TIMELINE_CAPACITY = int(os.environ.get("ANALYSIS_TIMELINE_CAPACITY", "9000")) # Full-resolution frames kept (~15 min at 10 fps)
+TIMELINE_ARCHIVE_BUCKETS = int(os.environ.get("ANALYSIS_TIMELINE_ARCHIVE_BUCKETS", "720")) # Summary buckets for older frames
+TIMELINE_ARCHIVE_SECONDS = float(os.environ.get("ANALYSIS_TIMELINE_ARCHIVE_SECONDS", "5")) # Initial bucket width; doubles when full
+TIMELINE_SUMMARY_SECONDS = float(os.environ.get("ANALYSIS_TIMELINE_SUMMARY_SECONDS", "60")) # Bucket width in the final report
+SIGNAL_MAX_FRAMES = int(os.environ.get("ANALYSIS_SIGNAL_MAX_FRAMES", "144000")) # Full per-frame signal kept for re-scoring (4 h at 10 fps, 2.4 MB)
+TIMELINE_ARCHIVE_BLOCK = int(os.environ.get("ANALYSIS_TIMELINE_ARCHIVE_BLOCK", "512")) # Oldest frames archived per step when the ring is full
+
+# Per-frame flags
+FLAG_GAZE_DEFLECTED = 1
+FLAG_HEAD_TURNED = 2
+FLAG_NO_POSE = 4 # solvePnP failed; yaw/pitch/roll are NaN
+
+GAZE_CODES = {"Looking Left": 0, "Looking Right": 1, "Looking Center/Forward": 2} # Anything else is -1
+
+FRAME_DTYPE = np.dtype([
+    ("t", "f8"), # Seconds since the epoch
+    ("yaw", "f4"), ("pitch", "f4"), ("roll", "f4"),
+    ("gaze", "i1"),
+    ("flags", "u1"),
+]) # 22 bytes per frame
+
+SIGNAL_DTYPE = np.dtype([
+    ("t", "f8"),
+    ("gaze", "i1"),
+    ("yaw", "f4"), ("pitch", "f4"), # Raw angles, NaN without a pose
+]) # 17 bytes per frame; everything re-scoring needs
+
+BUCKET_DTYPE = np.dtype([
+    ("t", "f8"), # Start of the bucket
+    ("frames", "u4"),
+    ("gaze_deflected", "u4"),
+    ("head_turned", "u4"),
+    ("pose_frames", "u4"),
+    ("yaw_sum", "f8"),
+    ("abs_yaw_max", "f4"),
+])
+
+
+class EventTimeline:
+    """
+    Ring buffer of FRAME_DTYPE records plus an archive of BUCKET_DTYPE
+    summaries. When the ring is full, its oldest archive_block frames are
+    added to the archive buckets covering their timestamps in one step; when
+    the archive runs out of buckets, neighbouring buckets are merged pairwise
+    and the bucket width doubles. Memory is fixed at construction:
+    capacity * 22 + archive_buckets * 40 bytes.
+    """
+    __slots__ = ("_frames", "_next", "_size", "_archive", "_archive_size", "_archive_block", "bucket_seconds",
+                 "start_time")
+
+    def __init__(self, capacity=TIMELINE_CAPACITY, archive_buckets=TIMELINE_ARCHIVE_BUCKETS,
+                 archive_seconds=TIMELINE_ARCHIVE_SECONDS, archive_block=TIMELINE_ARCHIVE_BLOCK):
+        self._frames = np.zeros(max(1, capacity), dtype=FRAME_DTYPE)
+        self._next = 0
+        self._size = 0
+        self._archive = np.zeros(max(2, archive_buckets), dtype=BUCKET_DTYPE)
+        self._archive_size = 0
+        self._archive_block = max(1, min(archive_block, len(self._frames)))
+        self.bucket_seconds = archive_seconds
+        self.start_time = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self._frames.nbytes + self._archive.nbytes
+
+    def append(self, t, yaw, pitch, roll, gaze, flags):
+        """Records one analyzed frame; yaw/pitch/roll may be None (no pose)."""
+        if self.start_time is None:
+            self.start_time = t
+        if self._size == len(self._frames):
+            self._archive_oldest()
+        if yaw is None or pitch is None:
+            flags |= FLAG_NO_POSE
+            yaw = pitch = roll = np.nan
+        elif roll is None:
+            roll = np.nan
+        self._frames[self._next] = (t, yaw, pitch, roll, GAZE_CODES.get(gaze, -1), flags)
+        self._next = (self._next + 1) % len(self._frames)
+        self._size += 1
+
+    def append_batch(self, rows):
+        """Records a FRAME_DTYPE array of frames in time order; the same result as appending them one by one."""
+        if not len(rows):
+            return
+        if self.start_time is None:
+            self.start_time = float(rows["t"][0])
+        capacity = len(self._frames)
+        while len(rows):
+            if self._size == capacity:
+                self._archive_oldest()
+            count = min(len(rows), capacity - self._size, capacity - self._next)
+            self._frames[self._next:self._next + count] = rows[:count]
+            self._next = (self._next + count) % capacity
+            self._size += count
+            rows = rows[count:]
+
+    def frames(self):
+        """Retained full-resolution frames, oldest first (a copy)."""
+        first = (self._next - self._size) % len(self._frames)
+        if first + self._size <= len(self._frames):
+            return self._frames[first:first + self._size].copy()
+        return np.concatenate((self._frames[first:], self._frames[:self._next]))
+
+    def _archive_oldest(self):
+        """Folds the oldest archive_block frames out of the ring into the archive."""
+        first = (self._next - self._size) % len(self._frames)
+        block = self._frames[first:first + self._archive_block]
+        if len(block) < self._archive_block: # Wraps around the end of the ring
+            block = np.concatenate((block, self._frames[:self._archive_block - len(block)]))
+        self._absorb(self._frames_as_buckets(block))
+        self._size -= self._archive_block
+
+    def _absorb(self, rows):
+        """
+        Adds bucket rows (time-ordered, none older than the last archived bucket)
+        to the archive, re-bucketed on its grid and coarsened until they fit.
+        """
+        rows = np.concatenate((self._archive[:self._archive_size], rows))
+        while True:
+            keys = ((rows["t"] - self.start_time) // self.bucket_seconds).astype(np.int64)
+            if len(rows) <= len(self._archive) and (len(keys) < 2 or np.all(keys[1:] > keys[:-1])):
+                merged, keys = rows.copy(), keys # Already one row per bucket
+                break
+            merged = self._merge(rows, keys)
+            if len(merged) <= len(self._archive):
+                keys = np.unique(keys)
+                break
+            self.bucket_seconds *= 2
+        merged["t"] = self.start_time + keys * self.bucket_seconds
+        self._archive_size = len(merged)
+        self._archive[:self._archive_size] = merged
+
+    @staticmethod
+    def _merge(buckets, keys):
+        """Sums buckets sharing a key (keys sorted); t is left at each group's first bucket."""
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        merged = buckets[starts].copy()
+        for field in ("frames", "gaze_deflected", "head_turned", "pose_frames", "yaw_sum"):
+            merged[field] = np.add.reduceat(buckets[field], starts)
+        merged["abs_yaw_max"] = np.maximum.reduceat(buckets["abs_yaw_max"], starts)
+        return merged
+
+    @staticmethod
+    def _frames_as_buckets(frames):
+        buckets = np.zeros(len(frames), dtype=BUCKET_DTYPE)
+        if not len(frames):
+            return buckets
+        flags = frames["flags"]
+        has_pose = (flags & FLAG_NO_POSE) == 0
+        buckets["t"] = frames["t"]
+        buckets["frames"] = 1
+        buckets["gaze_deflected"] = (flags & FLAG_GAZE_DEFLECTED) != 0
+        buckets["head_turned"] = (flags & FLAG_HEAD_TURNED) != 0
+        buckets["pose_frames"] = has_pose
+        buckets["yaw_sum"] = np.where(has_pose, frames["yaw"], 0.0)
+        buckets["abs_yaw_max"] = np.where(has_pose, np.abs(frames["yaw"]), 0.0)
+        return buckets
+
+    def summary(self, bucket_seconds=TIMELINE_SUMMARY_SECONDS):
+        """
+        Time-bucketed summary over the whole session: [{"start_s", "frames",
+        "gaze_deflected_ratio", "head_turned_ratio", "mean_yaw", "max_abs_yaw"}],
+        start_s relative to the first frame. Buckets narrower than the archive's
+        current resolution are only exact for the retained recent frames.
+        """
+        if self.start_time is None:
+            return []
+        rows = np.concatenate((self._archive[:self._archive_size], self._frames_as_buckets(self.frames())))
+        keys = ((rows["t"] - self.start_time) // bucket_seconds).astype(np.int64)
+        merged = self._merge(rows, keys)
+        summary = []
+        for key, bucket in zip(np.unique(keys), merged):
+            frames = int(bucket["frames"])
+            pose_frames = int(bucket["pose_frames"])
+            summary.append({
+                "start_s": round(float(key * bucket_seconds), 2),
+                "frames": frames,
+                "gaze_deflected_ratio": round(int(bucket["gaze_deflected"]) / frames, 3),
+                "head_turned_ratio": round(int(bucket["head_turned"]) / frames, 3),
+                "mean_yaw": round(float(bucket["yaw_sum"]) / pose_frames, 1) if pose_frames else None,
+                "max_abs_yaw": round(float(bucket["abs_yaw_max"]), 1) if pose_frames else None,
+            })
+        return summary
+
+    def merge(self, other):
+        """
+        New timeline holding this one followed by other (whose frames are all
+        later). The newest frames stay at full resolution; everything older is
+        archived at the coarser of the two bucket widths (or coarser, to fit).
+        """
+        merged = EventTimeline(len(self._frames), len(self._archive), max(self.bucket_seconds, other.bucket_seconds),
+                               self._archive_block)
+        merged.start_time = self.start_time if self.start_time is not None else other.start_time
+        if merged.start_time is None:
+            return merged
+        own_frames = self.frames()
+        frames = np.concatenate((own_frames, other.frames()))
+        overflow = max(0, len(frames) - len(merged._frames))
+        if other._archive_size:
+            overflow = max(overflow, len(own_frames)) # Other's archive is newer than all of our frames
+        # In time order; overflow never reaches other's frames, as they fit the ring on their own
+        merged._absorb(np.concatenate((self._archive[:self._archive_size], self._frames_as_buckets(frames[:overflow]),
+                                       other._archive[:other._archive_size])))
+        kept = frames[overflow:]
+        merged._frames[:len(kept)] = kept
+        merged._size = len(kept)
+        merged._next = len(kept) % len(merged._frames)
+        return merged
+
+    def to_arrays(self):
+        """(frames oldest first, archived buckets, [start_time, bucket_seconds, sizes...]) for serialization."""
+        meta = np.array([np.nan if self.start_time is None else self.start_time, self.bucket_seconds,
+                         len(self._frames), len(self._archive), self._archive_block], dtype=np.float64)
+        return self.frames(), self._archive[:self._archive_size].copy(), meta
+
+    @classmethod
+    def from_arrays(cls, frames, archive, meta):
+        timeline = cls(int(meta[2]), int(meta[3]), float(meta[1]), int(meta[4]))
+        timeline.start_time = None if np.isnan(meta[0]) else float(meta[0])
+        timeline._archive[:len(archive)] = archive
+        timeline._archive_size = len(archive)
+        frames = frames[-len(timeline._frames):]
+        timeline._frames[:len(frames)] = frames
+        timeline._size = len(frames)
+        timeline._next = len(frames) % len(timeline._frames)
+        return timeline
+
+
+class FrameSignal:
+    """
+    The whole session's per-frame signal at full resolution, in columns
+    (SIGNAL_DTYPE: time, gaze code, raw yaw and pitch), so a finished session
+    can be re-scored under other thresholds without re-running vision. Grows
+    by doubling up to max_frames; frames beyond that are counted, not kept.
+    """
+    __slots__ = ("_rows", "_size", "max_frames", "dropped")
+
+    def __init__(self, max_frames=SIGNAL_MAX_FRAMES):
+        self._rows = np.zeros(min(1024, max(1, max_frames)), dtype=SIGNAL_DTYPE)
+        self._size = 0
+        self.max_frames = max_frames
+        self.dropped = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self._rows.nbytes
+
+    def _reserve(self, count):
+        """Room for up to count more rows; returns how many fit under max_frames."""
+        count = min(count, self.max_frames - self._size)
+        if self._size + count > len(self._rows):
+            rows = np.zeros(min(self.max_frames, max(self._size + count, 2 * len(self._rows))), dtype=SIGNAL_DTYPE)
+            rows[:self._size] = self._rows[:self._size]
+            self._rows = rows
+        return max(0, count)
+
+    def append(self, t, gaze_code, yaw, pitch):
+        """One frame with a face; yaw/pitch are NaN without a pose."""
+        if not self._reserve(1):
+            self.dropped += 1
+            return
+        self._rows[self._size] = (t, gaze_code, yaw, pitch)
+        self._size += 1
+
+    def append_batch(self, rows):
+        """A SIGNAL_DTYPE array of frames, in time order."""
+        count = self._reserve(len(rows))
+        self._rows[self._size:self._size + count] = rows[:count]
+        self._size += count
+        self.dropped += len(rows) - count
+
+    def rows(self):
+        """The recorded frames, oldest first (a view; copy before keeping it past the next append)."""
+        return self._rows[:self._size]
+
+    def merge(self, other):
+        """New signal holding this one's frames followed by other's."""
+        merged = FrameSignal(self.max_frames)
+        merged.append_batch(self.rows())
+        merged.append_batch(other.rows())
+        merged.dropped += self.dropped + other.dropped
+        return merged
+
+    @classmethod
+    def from_rows(cls, rows, dropped=0, max_frames=SIGNAL_MAX_FRAMES):
+        signal = cls(max(max_frames, len(rows)))
+        signal.append_batch(rows)
+        signal.dropped = dropped
+        return signal
@@ -0,0 +1,160 @@
+# backend/analysis_updates.py
+# Live analysis feedback for the host: every few seconds each session's
+# CheatingMonitor is summarized into one compact delta and emitted to the host
+# that started the analysis, instead of an event per analyzed frame.
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+ANALYSIS_UPDATE_INTERVAL_SECONDS = float(os.environ.get("ANALYSIS_UPDATE_INTERVAL_SECONDS", "2.0")) # 0 disables live updates
+ANALYSIS_UPDATE_ACK_TIMEOUT_SECONDS = float(os.environ.get("ANALYSIS_UPDATE_ACK_TIMEOUT_SECONDS", "5.0")) # Give up waiting for a host ack
+ANALYSIS_UPDATE_MAX_EVENTS = int(os.environ.get("ANALYSIS_UPDATE_MAX_EVENTS", "10")) # Newest events carried per update
+
+
+class _Window:
+    """Per-session stream state: the monitor totals the host has already been sent."""
+    __slots__ = ("monitor", "host_sid", "seq", "sent_at", "analyzed", "frames", "gaze_frames", "head_frames", "events",
+                 "in_flight", "coalesced")
+
+    def __init__(self, monitor, host_sid):
+        self.monitor = monitor
+        self.host_sid = host_sid
+        self.seq = 0
+        self.sent_at = time.monotonic()
+        self.analyzed = self.frames = self.gaze_frames = self.head_frames = self.events = 0
+        self.in_flight = False
+        self.coalesced = 0 # Windows folded into the next update because the previous one was still in flight
+
+
+class AnalysisUpdateStream:
+    """
+    Emits one 'analysis_update' per session per interval with what changed
+    since the last update the host received: the window's analyzed, face and
+    deviation frame counts (a window with no face still produces an update),
+    the running score and status, running totals and the newest key events.
+    An update stays in flight until the emit returns and the host acks it (or
+    ack_timeout passes); windows that end meanwhile are not queued but
+    coalesced into the next update, so a slow host gets fewer, larger deltas.
+
+    emit(host_sid, payload, callback) must send the event; callback is the ack.
+    """
+
+    def __init__(self, emit, interval=ANALYSIS_UPDATE_INTERVAL_SECONDS, ack_timeout=ANALYSIS_UPDATE_ACK_TIMEOUT_SECONDS,
+                 max_events=ANALYSIS_UPDATE_MAX_EVENTS):
+        self._emit = emit
+        self.interval = interval
+        self.ack_timeout = ack_timeout
+        self.max_events = max_events
+        self._windows = {} # {target_sid: _Window}
+        self._task = None
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def add(self, target_sid, monitor, host_sid):
+        if self.enabled:
+            self._windows[target_sid] = _Window(monitor, host_sid)
+
+    def remove(self, target_sid):
+        """Stops updates for target_sid; an update already in flight is still delivered."""
+        self._windows.pop(target_sid, None)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"[ANALYSIS Updates] Streaming live summaries every {self.interval:.1f}s.")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Starts sending the current window of every session whose previous update was delivered."""
+        for target_sid, window in list(self._windows.items()):
+            if window.in_flight:
+                window.coalesced += 1
+                self.coalesced += 1
+                continue
+            payload = self._next_update(target_sid, window)
+            if payload is not None:
+                window.in_flight = True
+                asyncio.create_task(self._send(target_sid, window, payload))
+
+    def _next_update(self, target_sid, window):
+        """The delta since the last update sent, or None if no frame (with or without a face) was analyzed since."""
+        monitor = window.monitor
+        analyzed = monitor.metrics.frames_analyzed
+        if analyzed == window.analyzed:
+            return None
+        frames = monitor.total_frames_processed
+        events = monitor.events_total()
+        now = time.monotonic()
+        payload = {
+            "target_sid": target_sid,
+            "expected_host_sid": window.host_sid,
+            "seq": window.seq,
+            "window_seconds": round(now - window.sent_at, 2),
+            "coalesced_windows": window.coalesced,
+            "analyzed_frames": analyzed - window.analyzed,
+            "frames": frames - window.frames, # With a face
+            "no_face_frames": (analyzed - window.analyzed) - (frames - window.frames),
+            "gaze_deflected_frames": monitor.gaze_deflected_total_frames - window.gaze_frames,
+            "head_turned_frames": monitor.head_turned_total_frames - window.head_frames,
+            "score": monitor.suspicion_score,
+            "status_text": monitor.status_text,
+            "totals": {
+                "frames": frames,
+                "gaze_deflection_count": monitor.gaze_deflected_total_frames,
+                "head_turn_count": monitor.head_turned_total_frames,
+                "events": events,
+            },
+            "new_events": monitor.key_events(min(events - window.events, self.max_events)),
+        }
+        window.seq += 1
+        window.sent_at = now
+        window.analyzed = analyzed
+        window.frames = frames
+        window.gaze_frames = monitor.gaze_deflected_total_frames
+        window.head_frames = monitor.head_turned_total_frames
+        window.events = events
+        window.coalesced = 0
+        return payload
+
+    async def _send(self, target_sid, window, payload):
+        acked = asyncio.Event()
+        try:
+            try:
+                await self._emit(window.host_sid, payload, lambda *args: acked.set())
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"[ANALYSIS Updates {target_sid}] Failed to send update {payload['seq']}: {e!r}")
+                return
+            self.sent += 1
+            try:
+                await asyncio.wait_for(acked.wait(), self.ack_timeout)
+            except asyncio.TimeoutError:
+                pass # Host without acks, or really slow: carry on at most one update per ack_timeout
+        finally:
+            window.in_flight = False
+
+    def stats(self):
+        return {"sessions": len(self._windows), "sent": self.sent, "failed": self.failed, "coalesced": self.coalesced,
+                "interval_seconds": self.interval}
@@ -0,0 +1,12 @@
+# backend/analysis_worker_models.py
+# Preloaded by the multiprocessing forkserver that starts analysis worker
+# processes (analysis_workers.worker_context). Importing it loads and warms up
+# the vision models in that clean, single-threaded server, so every worker
+# forked from it shares them copy-on-write; the frozen heap keeps the
+# collector from touching (and so copying) those pages in the workers.
+import gc
+
+import interview_analyzer_module
+
+interview_analyzer_module.load_models(warm_up=True)
+gc.freeze()
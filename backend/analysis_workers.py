@@ -0,0 +1,377 @@
+# backend/analysis_workers.py
+# Multi-process worker pool for the vision stage (ANALYSIS_EXECUTOR_MODE="shm").
+# Workers are forked from a forkserver that has loaded the models
+# (analysis_worker_models), so the ~100 MB shape predictor is shared
+# copy-on-write instead of loaded once per worker, and the server process
+# (with its event loop and threads) is never forked itself. Frames travel
+# through a ring of shared-memory buffers: only a small descriptor (slot,
+# shape, session) crosses the pipe, never the pixels.
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import interview_analyzer_module
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+ANALYSIS_SHM_SLOTS = int(os.environ.get("ANALYSIS_SHM_SLOTS", "0")) # Frame buffers in the ring (0 = 2 per worker)
+ANALYSIS_SHM_SLOT_BYTES = int(os.environ.get("ANALYSIS_SHM_SLOT_BYTES", str(1280 * 720 * 3))) # Grown on demand
+
+
+WORKER_PRELOAD_MODULES = ["analysis_worker_models"] # Imported once by the forkserver, before it forks workers
+
+
+def worker_context():
+    """
+    Multiprocessing context for analysis worker processes. Never "fork": the
+    server is multithreaded (event loop, aiortc, executor and reader threads)
+    and a forked child can deadlock on a lock one of them held. The
+    forkserver, where available, preloads the models for all its children.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn") # Each worker loads its own models
+    # The forkserver imports its preload modules before applying this process's
+    # sys.path (and ignores ImportErrors), so make this directory findable there
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    python_path = [path for path in os.environ.get("PYTHONPATH", "").split(os.pathsep) if path]
+    if backend_dir not in python_path:
+        os.environ["PYTHONPATH"] = os.pathsep.join([backend_dir, *python_path])
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(WORKER_PRELOAD_MODULES) # Only takes effect when the server starts
+    return context
+
+
+class SharedFrameRing:
+    """
+    Fixed set of shared-memory frame buffers. A slot is owned by one in-flight
+    frame from acquire() until its result comes back; a frame larger than its
+    slot replaces that slot's segment with a bigger one (workers re-attach by name).
+    """
+
+    def __init__(self, slots, slot_bytes=ANALYSIS_SHM_SLOT_BYTES):
+        self._buffers = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(slots)]
+        self._free = list(range(slots))
+        self.grown = 0
+
+    def acquire(self):
+        return self._free.pop() if self._free else None
+
+    def release(self, slot):
+        self._free.append(slot)
+
+    def write(self, slot, frame):
+        """Copies frame into the slot and returns the segment name the worker should read it from."""
+        if self._buffers[slot].size < frame.nbytes:
+            old = self._buffers[slot]
+            self._buffers[slot] = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+            old.close()
+            old.unlink()
+            self.grown += 1
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._buffers[slot].buf)
+        np.copyto(view, frame)
+        del view
+        return self._buffers[slot].name
+
+    def close(self):
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self._buffers = []
+
+
+def _attach(shm_name):
+    """
+    Attaches a ring segment the parent owns. Before Python 3.13 attaching also
+    registers it with the resource tracker. A worker started by
+    multiprocessing shares the parent's tracker, where that is the parent's
+    own entry (dropped when the parent unlinks), so it is left alone; only a
+    process with a tracker of its own unregisters, or its tracker would unlink
+    the segment when the process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=shm_name, track=False) # Python 3.13+
+    except TypeError:
+        pass
+    segment = shared_memory.SharedMemory(name=shm_name)
+    if multiprocessing.parent_process() is None: # Not a multiprocessing child: the tracker is not the owner's
+        resource_tracker.unregister(segment._name, "shared_memory") # _name: the name as registered (with its "/")
+    return segment
+
+
+def _worker_main(conn):
+    """
+    Worker loop. Messages in: ("frame", request_id, session_id, slot, shm_name,
+    shape, dtype, with_pose), ("open", session_id, vision_options), ("close", session_id),
+    ("models", request_id), ("stop",). Replies:
+    ("result", request_id, features, vision_stats), ("models", request_id, model_report)
+    or ("error", request_id, message).
+    VisionSessions (tracking and pose state) of the sessions pinned here live here.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # The parent handles Ctrl-C and stops us
+    interview_analyzer_module.load_models(warm_up=True) # No-op when preloaded in the forkserver
+    attached = {} # {slot: SharedMemory}
+    sessions = {} # {session_id: VisionSession}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        kind = message[0]
+        if kind == "stop":
+            break
+        if kind == "open":
+            sessions[message[1]] = interview_analyzer_module.VisionSession(**message[2])
+            continue
+        if kind == "close":
+            sessions.pop(message[1], None)
+            continue
+        if kind == "models":
+            conn.send(("models", message[1], interview_analyzer_module.model_report()))
+            continue
+        _, request_id, session_id, slot, shm_name, shape, dtype, with_pose = message
+        try:
+            segment = attached.get(slot)
+            if segment is None or segment.name != shm_name: # First use, or the parent grew the slot
+                if segment is not None:
+                    segment.close()
+                segment = attached[slot] = _attach(shm_name)
+            frame = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+            vision_session = sessions.get(session_id)
+            if vision_session is None:
+                vision_session = sessions[session_id] = interview_analyzer_module.VisionSession()
+            features = interview_analyzer_module.extract_features(frame, vision_session, with_pose)
+            del frame
+            conn.send(("result", request_id, features, vision_session.stats()))
+        except Exception as e:
+            conn.send(("error", request_id, repr(e)))
+    for segment in attached.values():
+        segment.close()
+    conn.close()
+
+
+class _Worker:
+    __slots__ = ("index", "process", "conn", "sessions", "pending")
+
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.sessions = set() # Session ids pinned to this worker
+        self.pending = {} # {request_id: (future, slot)}; slot is None for requests without a frame
+
+
+class SharedMemoryWorkerPool:
+    """
+    Worker processes fed through a SharedFrameRing.
+
+    Sessions are pinned to one worker (the one with the fewest sessions when
+    the session first sends a frame), so its VisionSession never has to move.
+    Results come back on one reader thread per worker and are handed to the
+    event loop. Workers, including the replacement for one that dies, come
+    from worker_context(): forked by the forkserver, which holds the loaded
+    models, never by this multithreaded process. A replacement is sent its
+    sessions' vision options again, but their tracking starts afresh.
+
+    start() must have completed before sessions are opened or analyzed.
+    """
+
+    def __init__(self, max_workers, slots=ANALYSIS_SHM_SLOTS):
+        self.max_workers = max(1, int(max_workers))
+        self._slot_count = slots or 2 * self.max_workers
+        self._ring = None
+        self._workers = []
+        self._assignment = {} # {session_id: _Worker}
+        self._session_stats = {} # {session_id: latest VisionSession.stats() from the worker}
+        self._vision_options = {} # {session_id: non-default VisionSession options}, replayed to a replacement worker
+        self._next_request_id = 0
+        self._free_slots = None # asyncio.Semaphore over the ring slots
+        self._loop = None
+        self._stopping = False
+
+    @property
+    def started(self):
+        return bool(self._workers)
+
+    async def start(self):
+        """
+        Creates the ring and starts the workers. The first start also starts
+        the forkserver, which loads the models, so that wait runs off the loop.
+        """
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._free_slots = asyncio.Semaphore(self._slot_count)
+        self._ring = SharedFrameRing(self._slot_count)
+        self._workers = await asyncio.to_thread(lambda: [self._spawn(index) for index in range(self.max_workers)])
+        logger.info(f"[ANALYSIS Workers] Started {self.max_workers} workers ({worker_context().get_start_method()}) "
+                    f"sharing a {self._slot_count}-slot frame ring.")
+
+    async def model_reports(self):
+        """interview_analyzer_module.model_report() from every worker."""
+        futures = []
+        for worker in self._workers:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            future = self._loop.create_future()
+            worker.pending[request_id] = (future, None)
+            worker.conn.send(("models", request_id))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    def _spawn(self, index):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = worker_context().Process(
+            target=_worker_main, args=(child_conn,), name=f"analysis-worker-{index}", daemon=True)
+        process.start()
+        child_conn.close()
+        worker = _Worker(index, process, parent_conn)
+        threading.Thread(target=self._read_results, args=(worker,), name=f"analysis-reader-{index}",
+                         daemon=True).start()
+        return worker
+
+    def _read_results(self, worker):
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._deliver, worker, message)
+            except RuntimeError: # Event loop already closed (shutdown)
+                return
+        try:
+            self._loop.call_soon_threadsafe(self._worker_exited, worker)
+        except RuntimeError:
+            pass
+
+    def _deliver(self, worker, message):
+        kind, request_id = message[0], message[1]
+        entry = worker.pending.pop(request_id, None)
+        if entry is None:
+            return
+        future, slot = entry
+        if slot is not None:
+            self._release_slot(slot)
+        if future.done():
+            return
+        if kind == "result":
+            future.set_result((message[2], message[3]))
+        elif kind == "models":
+            future.set_result(message[2])
+        else:
+            future.set_exception(RuntimeError(message[2]))
+
+    def _worker_exited(self, worker):
+        for future, slot in worker.pending.values():
+            if slot is not None:
+                self._release_slot(slot)
+            if not future.done():
+                future.set_exception(RuntimeError(f"Analysis worker {worker.index} exited"))
+        worker.pending.clear()
+        if self._stopping or self._workers[worker.index] is not worker:
+            return
+        logger.error(f"[ANALYSIS Workers] Worker {worker.index} exited (code {worker.process.exitcode}); restarting.")
+        replacement = self._spawn(worker.index)
+        replacement.sessions = worker.sessions
+        for session_id in worker.sessions:
+            self._assignment[session_id] = replacement
+            if session_id in self._vision_options: # e.g. a degraded session's detect_every_n
+                replacement.conn.send(("open", session_id, self._vision_options[session_id]))
+        self._workers[worker.index] = replacement
+
+    async def _acquire_slot(self):
+        await self._free_slots.acquire()
+        return self._ring.acquire()
+
+    def _release_slot(self, slot):
+        self._ring.release(slot)
+        self._free_slots.release()
+
+    def _worker_for(self, session_id):
+        worker = self._assignment.get(session_id)
+        if worker is None:
+            worker = min(self._workers, key=lambda w: len(w.sessions))
+            worker.sessions.add(session_id)
+            self._assignment[session_id] = worker
+        return worker
+
+    async def analyze(self, session_id, frame, with_pose=True):
+        """Runs extract_features on the session's worker; returns the features dict."""
+        if not self._workers:
+            raise RuntimeError("Analysis worker pool not started")
+        slot = await self._acquire_slot()
+        worker = self._worker_for(session_id)
+        request_id = self._next_request_id
+        self._next_request_id += 1
+        future = self._loop.create_future()
+        try:
+            shm_name = self._ring.write(slot, frame)
+            worker.conn.send(("frame", request_id, session_id, slot, shm_name, frame.shape, frame.dtype.str, with_pose))
+        except Exception:
+            self._release_slot(slot)
+            raise
+        worker.pending[request_id] = (future, slot) # Replies are delivered on this loop, so this is never too late
+        features, stats = await future
+        self._session_stats[session_id] = stats
+        return features
+
+    def open_session(self, session_id, **vision_options):
+        """Creates the session's VisionSession on its worker with non-default options (e.g. detect_every_n)."""
+        if not self._workers:
+            raise RuntimeError("Analysis worker pool not started")
+        self._vision_options[session_id] = vision_options
+        self._worker_for(session_id).conn.send(("open", session_id, vision_options))
+
+    def session_stats(self, session_id):
+        return self._session_stats.get(session_id)
+
+    def close_session(self, session_id):
+        """Drops the session's worker-side state; returns its last vision stats."""
+        worker = self._assignment.pop(session_id, None)
+        self._vision_options.pop(session_id, None)
+        if worker is not None:
+            worker.sessions.discard(session_id)
+            try:
+                worker.conn.send(("close", session_id))
+            except OSError:
+                pass
+        return self._session_stats.pop(session_id, None)
+
+    def stats(self):
+        return {
+            "workers": [{"pid": w.process.pid, "sessions": len(w.sessions), "in_flight": len(w.pending)}
+                        for w in self._workers],
+            "ring_slots": self._slot_count,
+            "ring_slots_grown": self._ring.grown if self._ring is not None else 0,
+        }
+
+    def shutdown(self, wait=False, cancel_futures=True):
+        self._stopping = True
+        for worker in self._workers:
+            try:
+                worker.conn.send(("stop",))
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=2.0 if wait else 0.5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            for future, _ in worker.pending.values():
+                if cancel_futures and not future.done():
+                    future.cancel()
+            worker.pending.clear()
+            worker.conn.close()
+        self._workers = []
+        self._assignment.clear()
+        self._session_stats.clear()
+        self._vision_options.clear()
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
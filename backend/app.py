@@ -6,17 +6,29 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 
 # --- WebRTC & Analysis ---
 from aiortc import RTCIceCandidate, RTCPeerConnection, RTCSessionDescription
 import interview_analyzer_module # Your analysis module
+import analysis_pipeline # Runs the vision stage off the event loop
+import analysis_metrics # Per-session analysis counters/histograms
+import analysis_updates # Throttled live summaries for the host
+import analysis_reports # Batched persistence of final conclusions and timelines
+import analysis_capture # Opt-in per-session capture files for replaying sessions offline
+import analysis_rescoring # Re-scoring of stored sessions under new thresholds
+import offline_analysis # Chunked multi-process analysis of recorded interviews
+import state_store # In-process or shared (Redis) state, and the node id analysis sessions are pinned to
+from session_registry import SessionRegistry
 from aioice.candidate import Candidate as AIoIceCandidate # Add this import
 
 # --- Standard Libs ---
+import os
+import tempfile
 import time
 import uuid
 import logging 
+from collections import OrderedDict
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO)
@@ -38,22 +50,50 @@ class SocketIOCORSMiddleware(BaseHTTPMiddleware):
         response.headers["Access-Control-Allow-Headers"] = "*"
         return response
 
+async def prepare_analysis_models():
+    """Loads and warms up the vision models on the analysis executor, logging how long each step took."""
+    try:
+        report = await analysis_executor.prepare_models()
+    except Exception as e:
+        logger.critical(f"Exception during model loading: {e}", exc_info=True)
+        return False
+    if not analysis_executor.models_ready:
+        logger.critical(f"Failed to load computer vision models. Analysis will not work. ({report})")
+        return False
+    logger.info(f"Computer vision models ready: {report}")
+    return True
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Running FastAPI startup event...")
+    global analysis_forwarder_task
+    analysis_forwarder_task = asyncio.create_task(run_analysis_forwarder())
+    analysis_executor.start()
+    if analysis_pipeline.ANALYSIS_DEFER_MODEL_LOADING:
+        logger.info("Deferring computer vision model loading until the first analysis request.")
+    else:
+        await prepare_analysis_models()
+    if analysis_scheduler is not None:
+        analysis_scheduler.start()
+    analysis_update_stream.start()
     try:
-        if not interview_analyzer_module.load_models():
-            logger.critical("Failed to load computer vision models. Analysis will not work.")
-        else:
-            logger.info("Computer vision models loaded successfully.")
+        await asyncio.to_thread(analysis_report_writer.start) # Connects and creates the tables
     except Exception as e:
-        logger.critical(f"Exception during model loading: {e}", exc_info=True)
+        logger.error(f"Analysis reports will not be persisted: {e}", exc_info=True)
     
     yield  # This is where FastAPI serves the application
     
     # Shutdown (if needed)
     logger.info("Shutting down FastAPI application...")
+    if analysis_scheduler is not None:
+        await analysis_scheduler.stop()
+    await analysis_update_stream.stop()
+    await asyncio.to_thread(analysis_report_writer.stop) # Flushes queued reports
+    analysis_executor.shutdown()
+    if analysis_forwarder_task is not None:
+        analysis_forwarder_task.cancel()
+    await session_registry.store.close()
 
 # --- FastAPI App Initialization ---
 app = FastAPI(lifespan=lifespan)
@@ -68,7 +108,10 @@ sio = socketio.AsyncServer(
     allow_upgrades=True,
     ping_timeout=60,
     ping_interval=25,
-    async_handlers=True
+    async_handlers=True,
+    # With several workers/nodes, emits to sids and rooms held elsewhere go through the message queue
+    client_manager=(socketio.AsyncRedisManager(state_store.SOCKETIO_MESSAGE_QUEUE)
+                    if state_store.SOCKETIO_MESSAGE_QUEUE else None)
 )
 
 # Create Socket.IO ASGI app
@@ -81,22 +124,239 @@ sio_app = socketio.ASGIApp(
 app.mount('/socket.io', sio_app)
 
 # --- Global Data Stores ---
-rooms = {}
+# Rooms and the sid -> room / analysis indexes, shared by all workers when STATE_BACKEND_URL is Redis
+session_registry = SessionRegistry(state_store.create_store())
+# Per-node: peer connections cannot move, so each analysis is pinned to the node that created its PC
 analysis_pcs = {} # Stores {target_sid: RTCPeerConnection_instance}
 analysis_monitors = {} # Stores {target_sid: {'monitor': CheatingMonitor_instance, 'host_initiator_sid': str}}
 analysis_sessions_being_cleaned = set() # To prevent double cleanup race conditions
+analysis_forwarder_task = None # Receives analysis events other nodes forward to this one
+analysis_executor = analysis_pipeline.AnalysisExecutor() # Shared worker pool for analyze stages
+analysis_scheduler = (analysis_pipeline.BatchAnalysisScheduler(analysis_executor)
+                      if analysis_pipeline.ANALYSIS_SCHEDULER == "batched" else None) # None = one loop per session
+analysis_capacity = analysis_pipeline.AnalysisCapacity( # Admission control for analysis sessions on this node
+    analysis_pipeline.ANALYSIS_CAPACITY_WORKERS or analysis_executor.max_workers)
+analysis_update_stream = analysis_updates.AnalysisUpdateStream( # Periodic 'analysis_update' deltas to each host
+    lambda host_sid, payload, callback: sio.emit('analysis_update', payload, room=host_sid, callback=callback))
+analysis_report_writer = analysis_reports.AnalysisReportWriter() # Final conclusions go to the database off the loop
+offline_jobs = OrderedDict() # {job_id: {'status', 'filename', 'report' | 'error'}}, newest last
+offline_job_slots = asyncio.Semaphore(1) # Each job already uses every spare core
+MAX_OFFLINE_JOBS_KEPT = 100
 
 # --- FastAPI Root Endpoint (Optional) ---
 @app.get("/")
 async def read_root():
     return {"message": "InterviewMeet Backend (FastAPI)"}
 
+# --- Analysis Metrics Endpoints ---
+@app.get("/analysis/metrics")
+async def get_analysis_metrics():
+    return {"sessions": analysis_metrics.registry.snapshot()}
+
+@app.get("/analysis/profile")
+async def get_analysis_stage_profile():
+    """Rolling p50/p95/p99 per analysis stage, node-wide and per live session (milliseconds)."""
+    return analysis_metrics.registry.stage_profile()
+
+@app.get("/analysis/models")
+async def get_analysis_models():
+    """Model load and warm-up times (milliseconds), per worker in process mode."""
+    return {"ready": analysis_executor.models_ready, "report": analysis_executor.model_report}
+
+@app.get("/analysis/capacity")
+async def get_analysis_capacity():
+    """Planned vs available analysis capacity on this node, and the admitted/queued sessions."""
+    return analysis_capacity.snapshot()
+
+@app.get("/analysis/updates")
+async def get_analysis_update_stream():
+    """Live summary stream counters: updates sent and windows coalesced behind slow hosts."""
+    return analysis_update_stream.stats()
+
+@app.get("/analysis/reports")
+async def list_analysis_reports(room_id: str = None, target_sid: str = None, limit: int = 50):
+    """Persisted final reports, newest first (without timelines)."""
+    if analysis_report_writer.engine is None:
+        return {"error": "Analysis report persistence is disabled", "stats": analysis_report_writer.stats()}
+    reports = await asyncio.to_thread(analysis_report_writer.list_reports, room_id, target_sid, min(limit, 500))
+    return {"reports": reports, "stats": analysis_report_writer.stats()}
+
+@app.get("/analysis/reports/{report_id}")
+async def get_analysis_report(report_id: str):
+    """One persisted report with its per-minute timeline."""
+    if analysis_report_writer.engine is None:
+        return {"error": "Analysis report persistence is disabled"}
+    report = await asyncio.to_thread(analysis_report_writer.get_report, report_id)
+    if report is None:
+        return {"error": f"No analysis report {report_id}"}
+    return report
+
+def _rescore_error(message):
+    return JSONResponse({"error": f"Invalid rescore request: {message}",
+                         "policy_defaults": interview_analyzer_module.POLICY_DEFAULTS}, status_code=400)
+
+@app.post("/analysis/rescore")
+async def rescore_analysis(request: Request):
+    """
+    Re-scores sessions under a new policy without re-running vision. JSON body:
+    {"policy": {"yaw_threshold": 25, ...}, and either "target_sid" (a live
+    session on this node) or optional "report_ids" / "room_id" / "limit" to
+    pick stored reports (default: all, newest first)}.
+    """
+    try:
+        body = await request.json()
+        if not isinstance(body, dict):
+            raise ValueError("expected a JSON object")
+        if not isinstance(body.get('policy') or {}, dict):
+            raise ValueError(f"policy must be an object, got {body.get('policy')!r}")
+        policy = interview_analyzer_module.scoring_policy(**(body.get('policy') or {}))
+    except ValueError as e: # Bad JSON or policy
+        return _rescore_error(str(e))
+    target_sid = body.get('target_sid')
+    if target_sid is not None:
+        monitor_info = analysis_monitors.get(target_sid)
+        if monitor_info is None:
+            return {"error": f"No active analysis session for {target_sid}"}
+        monitor = monitor_info['monitor']
+        return {"policy": policy, "target_sid": target_sid,
+                "original": analysis_rescoring.rescore_monitor(monitor, monitor.policy()),
+                "rescored": analysis_rescoring.rescore_monitor(monitor, policy)}
+    try:
+        limit = int(body.get('limit') or analysis_rescoring.ANALYSIS_RESCORE_MAX_SESSIONS)
+    except (TypeError, ValueError):
+        return _rescore_error(f"limit must be an integer, got {body.get('limit')!r}")
+    report_ids = body.get('report_ids')
+    if report_ids is not None and not (isinstance(report_ids, list) and all(isinstance(i, str) for i in report_ids)):
+        return _rescore_error(f"report_ids must be a list of strings, got {report_ids!r}")
+    limit = max(1, min(limit, analysis_rescoring.ANALYSIS_RESCORE_MAX_SESSIONS))
+    if analysis_report_writer.engine is None:
+        return {"error": "Analysis report persistence is disabled"}
+    return await asyncio.to_thread(analysis_rescoring.rescore_reports, analysis_report_writer, policy,
+                                   report_ids, body.get('room_id'), limit)
+
+# --- Offline (recorded interview) analysis ---
+async def run_offline_job(job_id, path):
+    job = offline_jobs[job_id]
+    try:
+        async with offline_job_slots:
+            # As many workers as live analysis leaves spare (at least one), held in the capacity model meanwhile
+            workers = max(1, min(offline_analysis.OFFLINE_WORKERS, int(analysis_capacity.spare())))
+            capacity_key = f"offline:{job_id}"
+            analysis_capacity.reserve(capacity_key, workers)
+            job.update(status='running', workers=workers)
+            started_at = time.time()
+            try:
+                report, monitor = await asyncio.to_thread(offline_analysis.analyze_video_monitor, path, workers)
+            finally:
+                analysis_capacity.release(capacity_key)
+        job.update(status='done', report=report)
+        row, buckets = analysis_reports.build_report(f"offline:{job['filename']}", report, started_at,
+                                                     participant_name=job['filename'], node_id=state_store.NODE_ID)
+        if analysis_report_writer.submit(row, buckets, monitor.signal.rows().copy()):
+            job['report_id'] = row['report_id']
+        logger.info(f"[OFFLINE {job_id}] {job['filename']} analyzed in {report['processing']['wall_seconds']}s.")
+    except Exception as e:
+        logger.error(f"[OFFLINE {job_id}] Analysis of {job['filename']} failed: {e}", exc_info=True)
+        job.update(status='failed', error=str(e))
+    finally:
+        os.unlink(path)
+
+@app.post("/analysis/offline")
+async def submit_offline_analysis(request: Request, filename: str = "recording"):
+    """
+    Starts analysis of a recorded interview sent as the raw request body
+    (e.g. curl --data-binary @interview.mp4). Returns a job id to poll.
+    Bodies over OFFLINE_MAX_UPLOAD_MB get a 413.
+    """
+    max_bytes = int(offline_analysis.OFFLINE_MAX_UPLOAD_MB * 1024 * 1024)
+    too_large = JSONResponse({"error": f"Recording larger than {offline_analysis.OFFLINE_MAX_UPLOAD_MB:g} MB."},
+                             status_code=413)
+    declared_size = request.headers.get('content-length', '')
+    if declared_size.isdigit() and int(declared_size) > max_bytes:
+        return too_large
+    suffix = os.path.splitext(filename)[1] or ".mp4"
+    f = await asyncio.to_thread(tempfile.NamedTemporaryFile, prefix="offline-", suffix=suffix, delete=False)
+    path, size = f.name, 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                break
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException: # Client went away mid-upload, or cancelled
+        f.close()
+        os.unlink(path)
+        raise
+    await asyncio.to_thread(f.close)
+    if size > max_bytes:
+        os.unlink(path)
+        return too_large
+    if size == 0:
+        os.unlink(path)
+        return {"error": "Empty request body; send the video file as the body."}
+    job_id = uuid.uuid4().hex
+    offline_jobs[job_id] = {'status': 'queued', 'filename': os.path.basename(filename)}
+    while len(offline_jobs) > MAX_OFFLINE_JOBS_KEPT: # Forget the oldest jobs
+        offline_jobs.popitem(last=False)
+    asyncio.create_task(run_offline_job(job_id, path))
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/analysis/offline/{job_id}")
+async def get_offline_analysis(job_id: str):
+    job = offline_jobs.get(job_id)
+    if job is None:
+        return {"error": f"No offline analysis job {job_id}"}
+    return {"job_id": job_id, **job}
+
+@app.get("/analysis/metrics/{target_sid}")
+async def get_analysis_session_metrics(target_sid: str):
+    metrics = analysis_metrics.registry.get(target_sid)
+    if metrics is None:
+        return {"error": f"No active analysis session for {target_sid}"}
+    return {"session": target_sid, "metrics": metrics.snapshot(), "vision": analysis_executor.session_stats(target_sid)}
+
 # --- Helper Functions ---
-def get_participants_list_for_client(room_id):
-    if room_id in rooms:
-        # Ensure participant data structure matches what's stored
-        return [{'id': sid, 'name': p_data['name']} for sid, p_data in rooms[room_id]['participants'].items()]
-    return []
+async def get_participants_list_for_client(room_id):
+    # Cached per room and only rebuilt after a join/leave (local store); treat as read-only
+    return await session_registry.participants_snapshot(room_id)
+
+async def forward_analysis_event(target_sid, event, sid, data):
+    """
+    Sends an analysis event to the node that owns target_sid's session, if that
+    is another node. Returns True when forwarded (the caller should stop there).
+    """
+    if not target_sid or target_sid in analysis_pcs:
+        return False
+    node_id = await session_registry.analysis_node(target_sid)
+    if node_id is None or node_id == state_store.NODE_ID:
+        return False
+    await session_registry.store.publish(f"analysis:{node_id}", {'event': event, 'sid': sid, 'data': data})
+    logger.info(f"[ANALYSIS Forward] {event} for {target_sid} forwarded to node {node_id}.")
+    return True
+
+async def run_analysis_forwarder():
+    """Runs analysis events forwarded by other nodes against the sessions pinned to this node."""
+    handlers = {
+        'client_answer_for_analysis': client_answer_for_analysis,
+        'client_ice_candidate_for_analysis': client_ice_candidate_for_analysis,
+        'stop_analysis_request': stop_analysis_request,
+        'cleanup_analysis_session': lambda sid, data: cleanup_analysis_session(data['target_sid'], data.get('reason')),
+    }
+    async for message in session_registry.store.subscribe(f"analysis:{state_store.NODE_ID}"):
+        handler = handlers.get(message.get('event'))
+        if handler is None:
+            logger.warning(f"[ANALYSIS Forward] Unknown forwarded event: {message.get('event')}")
+            continue
+        try:
+            await handler(message['sid'], message['data'])
+        except Exception as e:
+            logger.error(f"[ANALYSIS Forward] Forwarded {message.get('event')} failed: {e}", exc_info=True)
+
+async def cleanup_analysis_anywhere(target_sid, reason=None):
+    """cleanup_analysis_session on whichever node owns the session."""
+    if not await forward_analysis_event(target_sid, 'cleanup_analysis_session', None,
+                                        {'target_sid': target_sid, 'reason': reason}):
+        await cleanup_analysis_session(target_sid, reason)
 
 # --- Socket.IO Event Handlers ---
 
@@ -110,87 +370,82 @@ async def connect(sid, environ, auth): # Added auth, though not used currently
 async def disconnect(sid):
     logger.info(f'[Socket Disconnect] Client disconnected: {sid}')
     user_name = "Someone"
-    room_left_id = None
     was_host_of_room = False # Flag to check if disconnected SID was a host
 
-    # Find which room the user was in
-    for room_id, room_data in list(rooms.items()): # Iterate over a copy for safe modification
-        if sid in room_data.get('participants', {}):
-            user_name = room_data['participants'][sid].get('name', sid[:6])
-            original_creator_sid = room_data.get('creator_sid')
+    await session_registry.remove_pending(sid) # A requester who leaves while waiting for admission
+    # Find which room the user was in (sid -> room index, no scan over rooms)
+    room_left_id, participant_name = await session_registry.remove_participant(sid)
+    room_data = await session_registry.get_room(room_left_id) if room_left_id is not None else None
+    if room_data is not None:
+        user_name = participant_name or sid[:6]
+        original_creator_sid = room_data.get('creator_sid')
+        # No need to explicitly call leave_room for the disconnecting 'sid', sio handles it.
+        logger.info(f'User {user_name} ({sid}) removed from room {room_left_id}')
+
+        # Check if the disconnected user was the creator of this room
+        if original_creator_sid == sid:
+            was_host_of_room = True
+            logger.info(f"Host {user_name} ({sid}) of room {room_left_id} has disconnected.")
+            # Host disconnected, notify remaining participants and clean up the room.
             
-            del room_data['participants'][sid]
-            room_left_id = room_id
-            # No need to explicitly call leave_room for the disconnecting 'sid', sio handles it.
-            logger.info(f'User {user_name} ({sid}) removed from room {room_left_id}')
-
-            # Check if the disconnected user was the creator of this room
-            if original_creator_sid == sid:
-                was_host_of_room = True
-                logger.info(f"Host {user_name} ({sid}) of room {room_left_id} has disconnected.")
-                # Host disconnected, notify remaining participants and clean up the room.
-                
-                remaining_sids_in_room = list(room_data.get('participants', {}).keys())
-                if remaining_sids_in_room:
-                    logger.info(f"Notifying {len(remaining_sids_in_room)} remaining participants in room {room_left_id} about host leaving abruptly.")
-                    for participant_sid_in_room in remaining_sids_in_room:
-                        await sio.emit('host_left_abruptly', {
-                            'room_id': room_left_id,
-                            'message': 'The host has disconnected abruptly. The meeting will now end.'
-                        }, room=participant_sid_in_room)
-                        # Force participant out of server-side room
-                        await sio.leave_room(participant_sid_in_room, room_left_id)
-                        logger.info(f"Forced participant {participant_sid_in_room} to leave Socket.IO room {room_left_id}.")
-                        # Clean up analysis for this participant if they were being analyzed
-                        # The cleanup_analysis_session takes the target_sid (the one being analyzed)
-                        if participant_sid_in_room in analysis_monitors:
-                             logger.info(f"Cleaning up analysis session for participant {participant_sid_in_room} in room {room_left_id} due to host disconnect.")
-                             await cleanup_analysis_session(participant_sid_in_room, "Host disconnected abruptly")
-
-                # After handling all participants, remove the room as it's now defunct.
-                if room_id in rooms: # Check again in case it was removed by another concurrent process (unlikely here)
-                    del rooms[room_id]
-                    logger.info(f"Room {room_left_id} has been closed and removed due to host disconnect.")
-                
-            else:
-                # Disconnected user was not the host, just a regular participant.
-                # Notify others that this participant left.
-                remaining_participants_list = get_participants_list_for_client(room_id)
-                await sio.emit('user_left', {
-                    'sid': sid,
-                    'name': user_name,
-                    'room': room_left_id,
-                    'allParticipants': remaining_participants_list
-                }, room=room_id) # Emitting to the room (excluding the leaver, as they are gone)
-
-                # System chat message for regular user leaving
-                left_message = {
-                    'id': str(uuid.uuid4()), 'type': 'system', 'sender_sid': 'SYSTEM',
-                    'sender_name': 'System', 'text': f'{user_name} has left the meeting.',
-                    'timestamp': time.time()
-                }
-                await sio.emit('new_message', left_message, room=room_id)
-
-                if not room_data['participants']:
-                    logger.info(f'Room {room_left_id} is now empty (after non-host left) and removed.')
-                    if room_id in rooms: # Check again
-                        del rooms[room_id]
-                else:
-                    logger.info(f'Users remaining in room {room_left_id}: {list(room_data["participants"].keys())}')
+            remaining_sids_in_room = await session_registry.participant_sids(room_left_id)
+            if remaining_sids_in_room:
+                logger.info(f"Notifying {len(remaining_sids_in_room)} remaining participants in room {room_left_id} about host leaving abruptly.")
+                for participant_sid_in_room in remaining_sids_in_room:
+                    await sio.emit('host_left_abruptly', {
+                        'room_id': room_left_id,
+                        'message': 'The host has disconnected abruptly. The meeting will now end.'
+                    }, room=participant_sid_in_room)
+                    # Force participant out of server-side room
+                    await sio.leave_room(participant_sid_in_room, room_left_id)
+                    logger.info(f"Forced participant {participant_sid_in_room} to leave Socket.IO room {room_left_id}.")
+                    # Clean up analysis for this participant if they were being analyzed
+                    # The cleanup_analysis_session takes the target_sid (the one being analyzed)
+                    if await session_registry.analysis_host(participant_sid_in_room) is not None:
+                         logger.info(f"Cleaning up analysis session for participant {participant_sid_in_room} in room {room_left_id} due to host disconnect.")
+                         await cleanup_analysis_anywhere(participant_sid_in_room, "Host disconnected abruptly")
+
+            # After handling all participants, remove the room as it's now defunct.
+            if await session_registry.remove_room(room_left_id):
+                logger.info(f"Room {room_left_id} has been closed and removed due to host disconnect.")
             
-            break # Exit loop once user is found and processed
+        else:
+            # Disconnected user was not the host, just a regular participant.
+            # Notify others that this participant left.
+            remaining_participants_list = await get_participants_list_for_client(room_left_id)
+            await sio.emit('user_left', {
+                'sid': sid,
+                'name': user_name,
+                'room': room_left_id,
+                'allParticipants': remaining_participants_list
+            }, room=room_left_id) # Emitting to the room (excluding the leaver, as they are gone)
+
+            # System chat message for regular user leaving
+            left_message = {
+                'id': str(uuid.uuid4()), 'type': 'system', 'sender_sid': 'SYSTEM',
+                'sender_name': 'System', 'text': f'{user_name} has left the meeting.',
+                'timestamp': time.time()
+            }
+            await sio.emit('new_message', left_message, room=room_left_id)
+
+            remaining_count = await session_registry.participant_count(room_left_id)
+            if not remaining_count:
+                logger.info(f'Room {room_left_id} is now empty (after non-host left) and removed.')
+                await session_registry.remove_room(room_left_id)
+            else:
+                logger.info(f'Users remaining in room {room_left_id}: {remaining_count}')
 
     # General cleanup for the disconnected user, regardless of whether they were in a room or a host.
     # This part handles if the user was being analyzed but was not necessarily in a room list (e.g., during setup)
     # or if they were a host and the analysis cleanup for them specifically is needed.
-    if sid in analysis_monitors: # If the disconnected SID was a target of analysis
+    if await session_registry.analysis_host(sid) is not None: # If the disconnected SID was a target of analysis
         logger.info(f"[Disconnect Cleanup] Cleaning up analysis session for target_sid {sid} as they disconnected.")
-        await cleanup_analysis_session(sid, "User disconnected")
+        await cleanup_analysis_anywhere(sid, "User disconnected")
     
-    # Also check if the disconnected SID was a host *initiating* any analyses
-    # This is more complex if not already handled by room closure.
-    # For now, the room closure due to host disconnect should cover analysis initiated by that host *within that room*.
-    # If a host could analyze someone not in their room (not current design), this would need more.
+    # Also clean up analyses the disconnected SID started as a host (host -> targets index)
+    for target_sid in await session_registry.analyses_hosted_by(sid):
+        logger.info(f"[Disconnect Cleanup] Cleaning up analysis of {target_sid} started by disconnected host {sid}.")
+        await cleanup_analysis_anywhere(target_sid, "Host disconnected")
 
     # logger.info(f"Finished disconnect event for {sid}.") # General log at end of disconnect
 
@@ -204,25 +459,19 @@ async def join_room(sid, data):
         logger.warning(f"No room_id provided by {sid}")
         return
 
-    if room_id not in rooms:
-        rooms[room_id] = {
-            'participants': {},
-            'creator_sid': sid,
-            'is_locked': create_locked,
-            'pending_requests': {}
-        }
+    current_room, created = await session_registry.get_or_create_room(room_id, sid, create_locked)
+    if created:
         logger.info(f"Room {room_id} created by {user_name} ({sid}). Locked: {create_locked}")
-    
-    current_room = rooms[room_id]
 
     # Check lock status
-    if current_room['is_locked'] and sid != current_room['creator_sid'] and sid not in current_room['participants']:
-        if sid in current_room['pending_requests']:
+    if (current_room['is_locked'] and sid != current_room['creator_sid']
+            and await session_registry.participant_name(room_id, sid) is None):
+        if await session_registry.is_pending(room_id, sid):
             await sio.emit('waiting_for_approval', {'room_id': room_id, 'message': 'You are still awaiting approval.'}, room=sid)
             logger.info(f"User {user_name} ({sid}) already pending for locked room {room_id}. Resent waiting signal.")
             return
 
-        current_room['pending_requests'][sid] = {'name': user_name}
+        await session_registry.add_pending(room_id, sid, user_name)
         logger.info(f"User {user_name} ({sid}) requesting to join locked room {room_id}. Notifying host {current_room['creator_sid']}.")
         
         await sio.emit('join_request_received', 
@@ -233,11 +482,11 @@ async def join_room(sid, data):
         return
 
     # ---- If allowed to join (not locked, creator, or already participant/approved) ----
-    current_room['participants'][sid] = {'name': user_name, 'sid': sid} # Store basic info
+    await session_registry.add_participant(room_id, sid, user_name) # Store basic info
     await sio.enter_room(sid, room_id)  # Add await here
-    logger.info(f"User {user_name} ({sid}) entered room {room_id}. Total participants: {len(current_room['participants'])}")
 
-    all_participants_in_room = get_participants_list_for_client(room_id)
+    all_participants_in_room = await get_participants_list_for_client(room_id)
+    logger.info(f"User {user_name} ({sid}) entered room {room_id}. Total participants: {len(all_participants_in_room)}")
     
     # Prepare list of other participants for WebRTC signaling
     other_participants_data = [p for p in all_participants_in_room if p['id'] != sid]
@@ -270,14 +519,13 @@ async def host_ended_meeting_request(sid, data):
         logger.warning(f"[Host End Meeting] No room_id provided by {host_sid}. Aborting.")
         return
 
-    if room_id not in rooms:
+    current_room_data = await session_registry.get_room(room_id)
+    if current_room_data is None:
         logger.warning(f"[Host End Meeting] Room {room_id} not found. Possibly already ended or never existed. SID: {host_sid}")
         # Optionally, still tell this SID the meeting is over if they think they are in it.
         # await sio.emit('meeting_ended_by_host', {'room_id': room_id, 'message': 'Meeting not found, assuming ended.'}, room=host_sid)
         return
 
-    current_room_data = rooms[room_id]
-
     if current_room_data.get('creator_sid') != host_sid:
         logger.warning(f"[Host End Meeting] Unauthorized attempt by {host_sid} to end room {room_id}. Actual creator: {current_room_data.get('creator_sid')}.")
         # Optionally, inform the requester they are not authorized, though this might be abusable.
@@ -288,7 +536,7 @@ async def host_ended_meeting_request(sid, data):
 
     # Notify all participants (including the host, their client will handle it gracefully)
     # Collect all SIDs that were in the room to ensure everyone is notified even if they are in pending_requests
-    all_sids_in_room = list(current_room_data.get('participants', {}).keys()) 
+    all_sids_in_room = await session_registry.participant_sids(room_id)
     # It's unlikely pending requests would be left if room is active, but good to be thorough or clean them.
     # For simplicity, we focus on active participants. If pending requests need notification, add them.
 
@@ -300,13 +548,10 @@ async def host_ended_meeting_request(sid, data):
             logger.error(f"[Host End Meeting] Error notifying participant {participant_sid}: {e}")
 
     # Clean up the room from the server
-    try:
-        del rooms[room_id]
+    if await session_registry.remove_room(room_id):
         logger.info(f"[Host End Meeting] Room {room_id} has been deleted from server memory.")
-    except KeyError:
+    else:
         logger.warning(f"[Host End Meeting] Attempted to delete room {room_id} but it was already gone.")
-    except Exception as e:
-        logger.error(f"[Host End Meeting] Unexpected error deleting room {room_id}: {e}")
 
 # --- WebRTC Signaling Handlers ---
 @sio.event
@@ -336,11 +581,11 @@ async def send_message(sid, data):
     room_id = data.get('room_id')
     message_text = data.get('message_text')
 
-    if not room_id or not message_text or room_id not in rooms or sid not in rooms[room_id].get('participants', {}):
+    user_name = await session_registry.participant_name(room_id, sid) if room_id else None
+    if not message_text or user_name is None:
         logger.warning(f"Invalid message/user/room from {sid}: {data}")
         return
 
-    user_name = rooms[room_id]['participants'][sid].get('name', f'User ({sid[:6]})')
     logger.info(f"User {user_name} sending message to room {room_id}")
     
     message_payload = {
@@ -361,30 +606,29 @@ async def admission_decision(sid, data): # sid here is the host making the decis
         logger.warning(f"Invalid admission_decision data from {host_sid}: {data}")
         return
 
-    if room_id not in rooms:
+    current_room = await session_registry.get_room(room_id)
+    if current_room is None:
         logger.warning(f"Room {room_id} not found for decision by {host_sid}.")
         return
 
-    current_room = rooms[room_id]
-
     if host_sid != current_room.get('creator_sid'):
         logger.warning(f"Unauthorized attempt by {host_sid} to make admission decision.")
         return
 
-    if requester_sid not in current_room.get('pending_requests', {}):
+    requester_info = await session_registry.pop_pending(room_id, requester_sid)
+    if requester_info is None:
         logger.warning(f"Requester {requester_sid} not found in pending requests for room {room_id}.")
         return
 
-    requester_info = current_room['pending_requests'].pop(requester_sid)
     requester_name = requester_info.get('name', f'User ({requester_sid[:6]})')
 
     if decision == 'accept':
         logger.info(f"Host {host_sid} ACCEPTED {requester_name} ({requester_sid}) for room {room_id}.")
         # Add to participants & enter Socket.IO room
-        current_room['participants'][requester_sid] = {'name': requester_name, 'sid': requester_sid}
-        await sio.enter_room(requester_sid, room_id)  # Add await here
+        await session_registry.add_participant(room_id, requester_sid, requester_name)
+        await sio.enter_room(requester_sid, room_id)  # Add await here (works across nodes through the message queue)
         
-        all_participants_in_room = get_participants_list_for_client(room_id)
+        all_participants_in_room = await get_participants_list_for_client(room_id)
         other_participants_data = [p for p in all_participants_in_room if p['id'] != requester_sid]
 
         # 1. Notify the approved user they are in
@@ -423,50 +667,106 @@ async def admission_decision(sid, data): # sid here is the host making the decis
 
 # --- Video Analysis Handlers & Helpers ---
 
+async def receive_video_frames(track, frame_slot, target_sid):
+    """Pulls decoded frames as fast as they arrive and keeps only the newest one in frame_slot."""
+    try:
+        while True:
+            frame_slot.put(await track.recv()) # aiortc.VideoFrame, converted only if analyzed
+    except asyncio.CancelledError:
+        pass
+    except Exception as e: # MediaStreamError once the track ends
+        logger.info(f"[ANALYSIS {target_sid}] Receiver stopped: {e!r}")
+    finally:
+        frame_slot.close()
+
+async def consume_video_track_batched(frame_slot, target_sid, monitor, admission, capture=None):
+    """Hands the session's frame slot to the central batched scheduler until the track ends."""
+    counters = {"frames": 0}
+
+    def on_result(features, processing_seconds, img):
+        counters["frames"] += 1
+        if capture is not None:
+            capture.write(time.time(), img, features, processing_seconds)
+        analysis_capacity.observe_frame(analysis_pipeline.frame_cost_seconds(features, processing_seconds))
+        interview_analyzer_module.apply_features(features, monitor)
+        monitor.metrics.observe_frame_time(processing_seconds)
+
+    analysis_scheduler.register(target_sid, frame_slot, on_result, max_fps=admission.fps,
+                                detect_every_n=admission.detect_every_n)
+    try:
+        await frame_slot.wait_closed()
+    except asyncio.CancelledError:
+        logger.info(f"[ANALYSIS {target_sid}] Consumer task cancelled.")
+    finally:
+        analysis_scheduler.unregister(target_sid)
+    return counters["frames"]
+
 async def consume_video_track(track, target_sid):
     logger.info(f"[ANALYSIS {target_sid}] Consumer started.")
     monitor_info = analysis_monitors.get(target_sid)
     if not monitor_info:
         logger.error(f"[ANALYSIS {target_sid}] Error: No monitor found.")
         return
+    monitor = monitor_info['monitor']
+    admission = monitor_info['admission'] # Rate and tracking the session was admitted with
     
     frame_count = 0 # This local frame_count is for FPS calculation here, monitor has its own.
     start_time = time.time()
-
-    while True:
-        try:
-            frame = await track.recv() # aiortc.VideoFrame
-            img = frame.to_ndarray(format="bgr24")
-            frame_count += 1
-
-            # The monitor_instance (monitor) is updated internally by analyze_frame
-            _annotated_frame, _analysis_data_per_frame = interview_analyzer_module.analyze_frame(img, monitor_info['monitor'])
-            
-            # REMOVED: No longer sending streaming updates
-            # host_sid_for_room = None
-            # for room_id, room_data in rooms.items():
-            #     if target_sid in room_data.get('participants', {}):
-            #         host_sid_for_room = room_data.get('creator_sid')
-            #         break
-            # if host_sid_for_room:
-            #     logger.info(f"[ANALYSIS {target_sid}] Sending results to host {host_sid_for_room}: {analysis_results}")
-            #     await sio.emit('analysis_update', {
-            #         'analyzed_sid': target_sid,
-            #         'results': analysis_results, # This was analysis_data_per_frame
-            #         'timestamp': time.time()
-            #     }, room=host_sid_for_room)
-
-        except asyncio.CancelledError:
-            logger.info(f"[ANALYSIS {target_sid}] Consumer task cancelled.")
-            break
-        except Exception as e:
-            logger.error(f"[ANALYSIS {target_sid}] Error processing frame: {e}", exc_info=True)
-            break
+    analysis_executor.open_session(target_sid, admission.detect_every_n)
+    frame_slot = analysis_pipeline.LatestFrameSlot()
+    rate_controller = analysis_pipeline.AdaptiveRateController(target_fps=admission.fps)
+    receiver_task = asyncio.create_task(receive_video_frames(track, frame_slot, target_sid))
+    next_frame_due = time.monotonic()
+    capture = analysis_capture.open_session_capture(target_sid, {"node_id": state_store.NODE_ID,
+                                                                 "frame_format": analysis_pipeline.ANALYSIS_FRAME_FORMAT,
+                                                                 "target_fps": admission.fps})
+
+    if analysis_scheduler is not None:
+        frame_count = await consume_video_track_batched(frame_slot, target_sid, monitor, admission, capture)
+        rate_controller = analysis_scheduler.rate_controller
+    else:
+        while True:
+            try:
+                delay = next_frame_due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay) # Pace to the adaptive analysis rate
+                frame = await frame_slot.get() # Newest frame only; older ones were dropped
+                if frame is None:
+                    break # Track ended
+                frame_started = time.monotonic()
+                img = analysis_pipeline.frame_to_array(frame) # Y-plane view, no YUV->BGR conversion
+                frame_count += 1
+
+                # Vision runs on the executor pool; only the cheap monitor update runs on the loop
+                features = await analysis_executor.analyze(target_sid, img)
+                analysis_capacity.observe_frame(analysis_pipeline.frame_cost_seconds(features, time.monotonic() - frame_started))
+                _analysis_data_per_frame = interview_analyzer_module.apply_features(features, monitor)
+
+                processing_seconds = time.monotonic() - frame_started
+                if capture is not None:
+                    capture.write(time.time(), img, features, processing_seconds)
+                rate_controller.record(processing_seconds)
+                monitor.metrics.observe_frame_time(processing_seconds)
+                next_frame_due = frame_started + rate_controller.interval()
+
+            except asyncio.CancelledError:
+                logger.info(f"[ANALYSIS {target_sid}] Consumer task cancelled.")
+                break
+            except Exception as e:
+                logger.error(f"[ANALYSIS {target_sid}] Error processing frame: {e}", exc_info=True)
+                break
             
+    receiver_task.cancel()
+    if capture is not None:
+        capture.close()
+        logger.info(f"[ANALYSIS {target_sid}] Captured {capture.records} frames ({capture.bytes_written} bytes) to {capture.path}.")
+    vision_stats = analysis_executor.close_session(target_sid)
     end_time = time.time()
     duration = end_time - start_time
     fps = frame_count / duration if duration > 0 else 0
-    logger.info(f"[ANALYSIS {target_sid}] Consumer stopped. Processed {frame_count} frames in {duration:.2f}s ({fps:.1f} FPS).")
+    logger.info(f"[ANALYSIS {target_sid}] Consumer stopped. Processed {frame_count} frames in {duration:.2f}s ({fps:.1f} FPS), "
+                f"received {frame_slot.frames_received}, dropped {frame_slot.frames_dropped}, final rate {rate_controller.current_fps:.1f} FPS.")
+    logger.info(f"[ANALYSIS {target_sid}] Vision stats: {vision_stats}")
     # Ensure cleanup is called if the loop breaks unexpectedly or track ends, 
     # though on_ended should also cover this.
     # However, direct call to cleanup might be redundant if on_ended always fires.
@@ -488,22 +788,56 @@ async def start_analysis_request(sid, data): # sid is the host
         logger.warning(f"[ANALYSIS Error] Host {host_sid} did not specify target_sid.")
         return
 
-    if target_sid in analysis_pcs:
+    if not analysis_executor.models_ready: # Deferred (or failed) at startup
+        await prepare_analysis_models()
+
+    if target_sid in analysis_pcs or not await session_registry.claim_analysis(
+            target_sid, initiating_host_sid_from_payload, state_store.NODE_ID): # Claimed on any node
         logger.warning(f"[ANALYSIS Warn] Analysis already in progress/requested for {target_sid}.")
         return
 
+    # Admission control: accept, degrade, queue or reject depending on this node's spare capacity
+    admission = analysis_capacity.admit(target_sid)
+    if admission.decision == analysis_pipeline.Admission.REJECTED:
+        logger.warning(f"[ANALYSIS Capacity] Rejected analysis of {target_sid}: node at capacity and queue full.")
+        await session_registry.remove_analysis(target_sid)
+        await sio.emit('analysis_rejected', {'target_sid': target_sid, 'reason': 'Analysis capacity exhausted, try again later.',
+                                             'expected_host_sid': host_sid}, room=host_sid)
+        # Re-enables the host's button, like any other stop
+        await sio.emit('analysis_stopped_for_host_ui', {'target_sid': target_sid, 'expected_host_sid': host_sid}, room=host_sid)
+        return
+    if admission.decision == analysis_pipeline.Admission.QUEUED:
+        logger.info(f"[ANALYSIS Capacity] Queued analysis of {target_sid} at position {admission.position}.")
+        await sio.emit('analysis_queued', {'target_sid': target_sid, 'expected_host_sid': host_sid, **admission.to_dict()},
+                       room=host_sid)
+        admission = await analysis_capacity.wait(target_sid)
+        if admission is None:
+            logger.info(f"[ANALYSIS Capacity] Analysis of {target_sid} was stopped while queued.")
+            return
+    if admission.decision == analysis_pipeline.Admission.DEGRADED:
+        logger.info(f"[ANALYSIS Capacity] Degraded analysis of {target_sid}: {admission.to_dict()}.")
+        await sio.emit('analysis_degraded', {'target_sid': target_sid, 'expected_host_sid': host_sid, **admission.to_dict()},
+                       room=host_sid)
+
     logger.info(f"[ANALYSIS] Creating PC for {target_sid}..." )
     try:
         pc = RTCPeerConnection()
         analysis_pcs[target_sid] = pc
         # Store the monitor instance AND the SID of the host who initiated this analysis
+        room_id = await session_registry.room_of(target_sid)
         analysis_monitors[target_sid] = {
             'monitor': interview_analyzer_module.CheatingMonitor(),
-            'host_initiator_sid': initiating_host_sid_from_payload 
+            'host_initiator_sid': initiating_host_sid_from_payload,
+            'admission': admission,
+            'room_id': room_id, # Kept for the persisted report; the participant may be gone by cleanup
+            'participant_name': await session_registry.participant_name(room_id, target_sid) if room_id else None
         }
+        analysis_metrics.registry.register(target_sid, analysis_monitors[target_sid]['monitor'].metrics)
+        analysis_update_stream.add(target_sid, analysis_monitors[target_sid]['monitor'], initiating_host_sid_from_payload)
         logger.info(f"[ANALYSIS] PC created for {target_sid}, original initiating host SID {initiating_host_sid_from_payload}.")
     except Exception as e:
         logger.error(f"[ANALYSIS Error] Failed to create PC for {target_sid}: {e}", exc_info=True)
+        await cleanup_analysis_session(target_sid, "PC creation failed") # Releases the claim
         return
 
     analysis_task_ref = {"task": None} # Use a mutable dict to share task ref with closures
@@ -568,17 +902,22 @@ async def start_analysis_request(sid, data): # sid is the host
 @sio.event
 async def client_answer_for_analysis(sid, data): # sid is the target client
     target_sid = sid 
+    if await forward_analysis_event(target_sid, 'client_answer_for_analysis', sid, data):
+        return # The session's PC lives on another node
     answer_dict = data.get('answer')
+    host_sid = await session_registry.analysis_host(target_sid) # Host that started this analysis
 
     if not answer_dict:
         logger.warning(f"[ANALYSIS] Invalid client_answer_for_analysis data from {target_sid}: {data}")
-        await sio.emit('analysis_connection_failed', {'target_sid': target_sid}, room=host_sid)
+        if host_sid: # room=None would broadcast to everyone
+            await sio.emit('analysis_connection_failed', {'target_sid': target_sid}, room=host_sid)
         return
 
     pc = analysis_pcs.get(target_sid)
     if not pc:
         logger.warning(f"[ANALYSIS] No PeerConnection found for {target_sid} to set answer.")
-        await sio.emit('analysis_connection_failed', {'target_sid': target_sid}, room=host_sid)
+        if host_sid:
+            await sio.emit('analysis_connection_failed', {'target_sid': target_sid}, room=host_sid)
         return
 
     try:
@@ -587,7 +926,8 @@ async def client_answer_for_analysis(sid, data): # sid is the target client
         logger.info(f"[ANALYSIS] Remote description (answer) set for {target_sid}.")
     except Exception as e:
         logger.error(f"[ANALYSIS Error] Error setting remote description for {target_sid}: {e}", exc_info=True)
-        await sio.emit('analysis_connection_failed', {'target_sid': target_sid}, room=host_sid)
+        if host_sid:
+            await sio.emit('analysis_connection_failed', {'target_sid': target_sid}, room=host_sid)
         await cleanup_analysis_session(target_sid)
 
 @sio.event
@@ -608,6 +948,9 @@ async def client_ice_candidate_for_analysis(sid, data):
         logger.warning(f"[ANALYSIS ICE] Mismatch: Event sender SID '{sid}' is not the analysis_target_sid '{analysis_client_sid}'. Ignoring.")
         return
 
+    if await forward_analysis_event(analysis_client_sid, 'client_ice_candidate_for_analysis', sid, data):
+        return # The session's PC lives on another node
+
     logger.info(f"[ANALYSIS ICE] Received ICE candidate from client {analysis_client_sid} for its analysis session.")
 
     # Correctly retrieve the RTCPeerConnection instance.
@@ -681,27 +1024,34 @@ async def stop_analysis_request(sid, data): # sid is the host requesting stop
     host_sid = sid
     target_sid = data.get('target_sid')
     logger.info(f"[ANALYSIS Stop] Host {host_sid} requested stop for {target_sid}.")
+    if await forward_analysis_event(target_sid, 'stop_analysis_request', sid, data):
+        return # The session's PC lives on another node
     
     # The task cancellation for consume_video_track will be handled by pc.close() in cleanup.
     # Or, if already ended, cleanup will just proceed.
     await cleanup_analysis_session(target_sid)
 
-async def cleanup_analysis_session(target_sid):
+async def cleanup_analysis_session(target_sid, reason=None):
     if target_sid in analysis_sessions_being_cleaned:
         logger.info(f"[ANALYSIS Cleanup] Session for {target_sid} is already being processed for cleanup. Skipping redundant call.")
         return
 
     analysis_sessions_being_cleaned.add(target_sid)
-    logger.info(f"[ANALYSIS Cleanup] Starting cleanup for session {target_sid}.")
+    logger.info(f"[ANALYSIS Cleanup] Starting cleanup for session {target_sid}{f' ({reason})' if reason else ''}.")
     
     pc = None
     monitor_info = None
     final_conclusion = None
+    report_id = None
     host_sid_for_room = None # This will be the host who initiated this specific analysis
 
     try:
         pc = analysis_pcs.pop(target_sid, None)
         monitor_info = analysis_monitors.pop(target_sid, None)
+        analysis_metrics.registry.unregister(target_sid)
+        analysis_update_stream.remove(target_sid) # The final conclusion supersedes live updates
+        claimed_host_sid = await session_registry.remove_analysis(target_sid)
+        analysis_capacity.release(target_sid) # Also ends a queued start_analysis_request
 
         if monitor_info:
             monitor_instance = monitor_info.get('monitor')
@@ -713,11 +1063,20 @@ async def cleanup_analysis_session(target_sid):
                 except Exception as e:
                     logger.error(f"[ANALYSIS Cleanup {target_sid}] Error getting final conclusion: {e}", exc_info=True)
                     final_conclusion = {"status_text": "Error generating final report.", "details": {}}
+                else:
+                    report, buckets = analysis_reports.build_report(
+                        target_sid, final_conclusion, monitor_instance.first_frame_time or time.time(), host_sid=host_sid_for_room,
+                        room_id=monitor_info.get('room_id'), participant_name=monitor_info.get('participant_name'),
+                        node_id=state_store.NODE_ID)
+                    if analysis_report_writer.submit(report, buckets, monitor_instance.signal.rows().copy()): # Queued; written in the next batch
+                        report_id = report['report_id']
             else:
                 logger.warning(f"[ANALYSIS Cleanup {target_sid}] Monitor object missing in monitor_info for host {host_sid_for_room}.")
         else:
             logger.warning(f"[ANALYSIS Cleanup {target_sid}] No analysis monitor_info found. Conclusion cannot be generated.")
 
+        if not host_sid_for_room: # Stopped before a monitor existed (e.g. while queued)
+            host_sid_for_room = claimed_host_sid
         # No need to find host_sid_for_room separately anymore if we got it from monitor_info
         # If host_sid_for_room is still None here, it means monitor_info was missing, which is an issue.
         if not host_sid_for_room and pc: # If we have a PC but no host, log a warning.
@@ -744,7 +1103,8 @@ async def cleanup_analysis_session(target_sid):
         if host_sid_for_room:
             if final_conclusion:
                 await sio.emit('analysis_final_conclusion', 
-                               {'analyzed_sid': target_sid, 'conclusion': final_conclusion, 'expected_host_sid': host_sid_for_room},
+                               {'analyzed_sid': target_sid, 'conclusion': final_conclusion, 'expected_host_sid': host_sid_for_room,
+                                'report_id': report_id},
                                room=host_sid_for_room)
                 logger.info(f"[ANALYSIS Cleanup {target_sid}] Sent final conclusion to host {host_sid_for_room}.")
             elif not pc: # If no PC, it means start_analysis_request failed early or already cleaned.
@@ -775,6 +1135,5 @@ async def cleanup_analysis_session(target_sid):
 
 # --- Main Server Execution (for running with uvicorn directly) ---
 if __name__ == "__main__":
-    if not interview_analyzer_module.load_models():
-        logger.critical("CRITICAL: Computer vision models failed to load. Analysis features will NOT work.")
+    # Models are loaded by the lifespan handler (or on the first analysis request when deferred)
     uvicorn.run(app, host="0.0.0.0", port=5001, log_level="info")
\ No newline at end of file
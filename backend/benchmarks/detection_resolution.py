@@ -0,0 +1,124 @@
+# backend/benchmarks/detection_resolution.py
+# Compares the full-resolution detection path with the downscaled/ROI path of
+# interview_analyzer_module on recorded frames: speed and landmark accuracy.
+#
+# Usage (from backend/):
+#   python benchmarks/detection_resolution.py recording.mp4 [more.mp4 ...] --max-side 480 640 --frames 300
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import interview_analyzer_module as iam # noqa: E402
+
+
+def read_frames(paths, max_frames):
+    frames = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"Cannot open {path}, skipping.")
+            continue
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    return frames
+
+
+def full_resolution_path(frame):
+    """The original pipeline: whole frame to gray, detect and predict at native resolution."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = iam.dlib_face_detector(gray)
+    if len(faces) == 0:
+        return None, None
+    face = faces[0]
+    return (face.left(), face.top(), face.right(), face.bottom()), iam.get_landmarks(gray, face)
+
+
+def downscaled_path(frame, max_side):
+    face_rect = iam._detect_face(frame, iam.detection_scale(frame.shape, max_side=max_side))
+    if face_rect is None:
+        return None, None
+    return face_rect, iam._landmarks_in_roi(frame, face_rect)
+
+
+def time_path(fn, frames):
+    results, timings = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        results.append(fn(frame))
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return results, np.array(timings)
+
+
+def summarize_timings(timings):
+    return {"mean_ms": round(float(timings.mean()), 3), "p95_ms": round(float(np.percentile(timings, 95)), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-resolution vs downscaled/ROI detection benchmark")
+    parser.add_argument("videos", nargs="+", help="Recorded interview videos to take frames from")
+    parser.add_argument("--max-side", type=int, nargs="+", default=[iam.DETECTION_MAX_SIDE or 640])
+    parser.add_argument("--frames", type=int, default=300, help="Frames to use in total")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if not iam.load_models():
+        sys.exit("Models failed to load.")
+    frames = read_frames(args.videos, args.frames)
+    if not frames:
+        sys.exit("No frames read.")
+
+    reference, reference_ms = time_path(full_resolution_path, frames)
+    report = {
+        "frames": len(frames),
+        "frame_shape": list(frames[0].shape),
+        "full_resolution": dict(summarize_timings(reference_ms),
+                                detection_rate=round(sum(r[1] is not None for r in reference) / len(frames), 3)),
+        "downscaled": [],
+    }
+
+    for max_side in args.max_side:
+        candidate, candidate_ms = time_path(lambda f: downscaled_path(f, max_side), frames)
+        errors, normalized_errors, missed, extra = [], [], 0, 0
+        for (_, ref_lms), (_, lms) in zip(reference, candidate):
+            if ref_lms is None and lms is None:
+                continue
+            if lms is None:
+                missed += 1
+                continue
+            if ref_lms is None:
+                extra += 1
+                continue
+            per_point = np.linalg.norm(lms - ref_lms, axis=1)
+            inter_ocular = np.linalg.norm(ref_lms[45] - ref_lms[36]) or 1.0
+            errors.append(per_point.mean())
+            normalized_errors.append(per_point.mean() / inter_ocular)
+        report["downscaled"].append(dict(
+            summarize_timings(candidate_ms),
+            max_side=max_side,
+            scale=round(iam.detection_scale(frames[0].shape, max_side=max_side), 3),
+            speedup=round(float(reference_ms.mean() / candidate_ms.mean()), 2),
+            detection_rate=round(sum(r[1] is not None for r in candidate) / len(frames), 3),
+            missed_vs_full=missed,
+            extra_vs_full=extra,
+            landmark_error_px=round(float(np.mean(errors)), 3) if errors else None,
+            landmark_error_inter_ocular=round(float(np.mean(normalized_errors)), 4) if normalized_errors else None,
+        ))
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# backend/benchmarks/head_pose_solver.py
+# Microbenchmark: stateless get_head_pose_angles_solvepnp vs the per-session
+# HeadPoseSolver, plus list-comprehension vs shape_to_array landmark extraction.
+# Uses synthetic landmarks from a known, slowly moving head, so no video or
+# model files are needed.
+#
+# Usage (from backend/):
+#   python benchmarks/head_pose_solver.py [--frames 300] [--calls 5000] [--noise 1.0]
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import dlib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import interview_analyzer_module as iam # noqa: E402
+
+FRAME_SHAPE = (720, 1280, 3)
+
+
+def synthetic_sequence(frames, noise, seed=0):
+    """Landmark arrays for a head slowly turning/nodding, with pixel noise, and the true angles."""
+    rng = np.random.default_rng(seed)
+    camera_matrix = np.array([[FRAME_SHAPE[1], 0, FRAME_SHAPE[1] / 2],
+                              [0, FRAME_SHAPE[1], FRAME_SHAPE[0] / 2], [0, 0, 1]], dtype=np.float64)
+    translation = np.array([[0.0], [0.0], [2000.0]])
+    sequence, truth = [], []
+    for i in range(frames):
+        rotation = np.array([[np.pi + 0.1 * np.sin(i / 20)], [0.4 * np.sin(i / 35)], [0.05 * np.sin(i / 50)]])
+        points, _ = cv2.projectPoints(iam.POSE_MODEL_POINTS, rotation, translation, camera_matrix, None)
+        landmarks = np.zeros((68, 2), dtype=np.int32)
+        landmarks[iam.POSE_LANDMARK_INDICES] = np.round(points.reshape(-1, 2) + rng.normal(0, noise, (6, 2)))
+        sequence.append(landmarks)
+        truth.append(iam.rotation_matrix_to_euler(cv2.Rodrigues(rotation)[0]))
+    return sequence, np.array(truth)
+
+
+def wrap_degrees(angles):
+    return (angles + 180.0) % 360.0 - 180.0
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Head-pose and landmark extraction microbenchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--noise", type=float, default=1.0, help="Landmark noise in pixels")
+    args = parser.parse_args()
+
+    sequence, truth = synthetic_sequence(args.frames, args.noise)
+    solver = iam.HeadPoseSolver()
+    stateless = np.array([iam.get_head_pose_angles_solvepnp(lms, FRAME_SHAPE) for lms in sequence], dtype=float)
+    stateful = np.array([solver.solve(lms, FRAME_SHAPE) for lms in sequence], dtype=float)
+
+    landmarks = sequence[-1]
+    shape = dlib.full_object_detection(dlib.rectangle(0, 0, 200, 200),
+                                       dlib.points([dlib.point(int(x), int(y)) for x, y in landmarks]))
+    report = {
+        "pose_per_call_us": {
+            "stateless_epnp": round(per_call_us(lambda: iam.get_head_pose_angles_solvepnp(landmarks, FRAME_SHAPE), args.calls), 2),
+            "head_pose_solver": round(per_call_us(lambda: solver.solve(landmarks, FRAME_SHAPE), args.calls), 2),
+        },
+        "pose_mean_abs_error_deg": { # yaw, pitch, roll
+            "stateless_epnp": np.abs(wrap_degrees(stateless - truth)).mean(axis=0).round(3).tolist(),
+            "head_pose_solver": np.abs(wrap_degrees(stateful - truth)).mean(axis=0).round(3).tolist(),
+        },
+        "pose_frame_to_frame_jitter_deg": {
+            "stateless_epnp": np.abs(wrap_degrees(np.diff(stateless, axis=0))).mean(axis=0).round(3).tolist(),
+            "head_pose_solver": np.abs(wrap_degrees(np.diff(stateful, axis=0))).mean(axis=0).round(3).tolist(),
+        },
+        "landmarks_per_call_us": {
+            "list_comprehension": round(per_call_us(lambda: np.array([[p.x, p.y] for p in shape.parts()]), args.calls), 2),
+            "shape_to_array": round(per_call_us(lambda: iam.shape_to_array(shape), args.calls), 2),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# backend/benchmarks/monitor_batch.py
+# CheatingMonitor.update_metrics (one frame per call) vs update_metrics_batch
+# (NumPy over arrays) on a synthetic per-frame signal: checks that both paths
+# leave the monitor in exactly the same state, then reports frames/sec for
+# each. Needs no video or model files. Exits non-zero if the states differ.
+#
+# Usage (from backend/):
+#   python benchmarks/monitor_batch.py [--frames 100000] [--batch-size 600] [--sessions 20]
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import analysis_timeline # noqa: E402
+import interview_analyzer_module as iam # noqa: E402
+
+
+def synthetic_signal(frames, seed=0, fps=10.0):
+    """(timestamps, gaze_codes, yaws, pitches, rolls) with sustained look-aways, jittered timing and pose dropouts."""
+    rng = np.random.default_rng(seed)
+    intervals = np.full(frames, 1.0 / fps) + rng.normal(0, 0.1 / fps, frames).clip(-0.5 / fps, None)
+    intervals[rng.random(frames) < 0.01] += 1.0 # Dropped frames break runs
+    timestamps = 1.7e9 + np.cumsum(intervals)
+    segment = 25 # Frames per behaviour segment (~2.5 s)
+    gaze_codes = np.repeat(rng.choice([-1, 0, 1, 2, 2, 2], frames // segment + 1), segment)[:frames]
+    noisy = rng.random(frames) < 0.05
+    gaze_codes[noisy] = rng.integers(-1, 3, int(noisy.sum()))
+    yaws = np.repeat(rng.normal(0, 25, frames // segment + 1), segment)[:frames] + rng.normal(0, 3, frames)
+    pitches = np.repeat(rng.choice([175.0, 178.0, 150.0, -172.0], frames // segment + 1), segment)[:frames]
+    rolls = rng.normal(0, 4, frames)
+    no_pose = rng.random(frames) < 0.03
+    yaws[no_pose] = pitches[no_pose] = rolls[no_pose] = np.nan
+    return timestamps, gaze_codes, yaws, pitches, rolls
+
+
+def run_scalar(signal):
+    monitor = iam.CheatingMonitor()
+    labels = iam.GAZE_LABELS.tolist()
+    timestamps, gaze_codes, yaws, pitches, rolls = (column.tolist() for column in signal)
+    for t, gaze, yaw, pitch, roll in zip(timestamps, gaze_codes, yaws, pitches, rolls):
+        if yaw != yaw: # NaN: no pose on this frame
+            yaw = pitch = roll = None
+        monitor.update_metrics(labels[gaze] if gaze >= 0 else "N/A", yaw, pitch, roll, timestamp=t)
+    return monitor
+
+
+def run_batch(signal, batch_size):
+    monitor = iam.CheatingMonitor()
+    for start in range(0, len(signal[0]), batch_size):
+        monitor.update_metrics_batch(*(column[start:start + batch_size] for column in signal))
+    return monitor
+
+
+def monitor_state(monitor):
+    """Everything update_metrics touches, in comparable form."""
+    frames, archive, meta = monitor.timeline.to_arrays()
+    conclusion = monitor.get_final_conclusion()
+    conclusion["details"].pop("stage_latency_ms")
+    metrics = monitor.metrics.snapshot()
+    metrics.pop("stage_latency_ms")
+    return {
+        "conclusion": conclusion,
+        "gaze_runs": monitor.gaze_runs.to_state(),
+        "head_runs": monitor.head_runs.to_state(),
+        "metrics": metrics,
+        "frame_span": (monitor.first_frame_time, monitor.last_frame_time),
+        "timeline": (frames.tobytes(), archive.tobytes(), meta.tobytes()),
+        "signal": (monitor.signal.rows().tobytes(), monitor.signal.dropped),
+    }
+
+
+def check_equivalence(sessions, frames, batch_size, seed):
+    """Scalar vs batch over sessions of random length and batch sizes; returns the mismatching fields."""
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for session in range(sessions):
+        signal = synthetic_signal(int(rng.integers(1, frames + 1)), seed=seed + session)
+        size = int(rng.integers(1, batch_size * 2 + 1))
+        scalar, batch = monitor_state(run_scalar(signal)), monitor_state(run_batch(signal, size))
+        mismatches += [{"session": session, "batch_size": size, "field": field}
+                       for field in scalar if scalar[field] != batch[field]]
+    return mismatches
+
+
+def best_fps(run, frames, repeat):
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = max(best, frames / (time.perf_counter() - started))
+    return round(best, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CheatingMonitor scalar vs batch update benchmark")
+    parser.add_argument("--frames", type=int, default=100000, help="Frames in the throughput run")
+    parser.add_argument("--batch-size", type=int, default=600, help="Frames per update_metrics_batch call")
+    parser.add_argument("--sessions", type=int, default=20, help="Random sessions in the equivalence check")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    mismatches = check_equivalence(args.sessions, min(args.frames, 20000), args.batch_size, args.seed)
+    signal = synthetic_signal(args.frames, seed=args.seed)
+    scalar_fps = best_fps(lambda: run_scalar(signal), args.frames, args.repeat)
+    batch_fps = best_fps(lambda: run_batch(signal, args.batch_size), args.frames, args.repeat)
+    report = {
+        "frames": args.frames,
+        "batch_size": args.batch_size,
+        "timeline_capacity": analysis_timeline.TIMELINE_CAPACITY,
+        "equivalence": {"sessions": args.sessions, "mismatches": mismatches},
+        "frames_per_second": {"update_metrics": scalar_fps, "update_metrics_batch": batch_fps},
+        "speedup": round(batch_fps / scalar_fps, 1) if scalar_fps else None,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if mismatches:
+        sys.exit(f"update_metrics_batch differs from update_metrics in {len(mismatches)} fields")
+
+
+if __name__ == "__main__":
+    main()
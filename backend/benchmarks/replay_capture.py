@@ -0,0 +1,60 @@
+# backend/benchmarks/replay_capture.py
+# Replays session capture files (ANALYSIS_CAPTURE_MODE, see analysis_capture.py)
+# through the analyzer and a fresh CheatingMonitor at full speed. Reports the
+# replay rate, how far the results drift from what was recorded live, and the
+# final conclusion, so a captured session works as a regression fixture and
+# as benchmark input.
+#
+# Usage (from backend/):
+#   python benchmarks/replay_capture.py captures/20250101-120000-abc.imcap
+#   python benchmarks/replay_capture.py captures/*.imcap --repeat 3 --output replay.json
+#   python benchmarks/replay_capture.py fixture.imcap --max-gaze-mismatch 0.02
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import analysis_capture # noqa: E402
+import interview_analyzer_module as iam # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay analysis capture files")
+    parser.add_argument("captures", nargs="+", help=".imcap files written by a live session")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay each file this many times (best fps is kept)")
+    parser.add_argument("--max-gaze-mismatch", type=float,
+                        help="Fail if more than this fraction of frames changes gaze label vs the recording")
+    parser.add_argument("--output", help="Write the reports to this JSON file")
+    args = parser.parse_args()
+
+    if not iam.load_models(warm_up=True):
+        sys.exit("Models failed to load.")
+
+    reports, ok = [], True
+    for path in args.captures:
+        capture = analysis_capture.CaptureFile(path)
+        report = None
+        for _ in range(max(1, args.repeat)):
+            _, run = analysis_capture.replay(capture)
+            if report is None or (run["replay_fps"] or 0) > (report["replay_fps"] or 0):
+                report = run
+        mismatch = report["gaze_mismatches"] / report["frames"] if report["frames"] else 0.0
+        if args.max_gaze_mismatch is not None and mismatch > args.max_gaze_mismatch:
+            ok = False
+        reports.append(report)
+        print(f"{os.path.basename(path)} [{report['mode']}] {report['frames']} frames at {report['replay_fps']} fps, "
+              f"gaze mismatches {report['gaze_mismatches']}, face mismatches {report['face_mismatches']}, "
+              f"max yaw error {report['max_yaw_error_deg']}: {report['conclusion']['status_text']}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"reports": reports}, f, indent=2)
+    else:
+        print(json.dumps({"reports": reports}, indent=2))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# backend/benchmarks/run_benchmarks.py
+# Headless benchmark runner for interview_analyzer_module: feeds recorded or
+# synthetic videos through analyze_frame_headless + CheatingMonitor at several
+# resolutions and session counts, and reports frames/sec, per-stage latency and
+# memory per session as JSON that can be compared across commits.
+#
+# Usage (from backend/):
+#   python benchmarks/run_benchmarks.py --video interview.mp4 --output bench.json
+#   python benchmarks/run_benchmarks.py --synthetic --face-image face.jpg --resolutions 640x360 1280x720
+#   python benchmarks/run_benchmarks.py --video interview.mp4 --compare bench.json --tolerance 0.1
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import interview_analyzer_module as iam # noqa: E402
+
+DEFAULT_RESOLUTIONS = ["640x360", "1280x720", "1920x1080"]
+
+
+def write_synthetic_video(path, frames, face_image=None, size=(1280, 720), fps=30):
+    """
+    Writes a synthetic clip. With face_image, the face drifts and tilts slowly
+    over a plain background so detection, tracking and pose all run; without it
+    the frames are textured noise, which only exercises the no-face path.
+    """
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    face = None
+    if face_image:
+        face = cv2.imread(face_image)
+        if face is None:
+            sys.exit(f"Cannot read face image {face_image}")
+        scale = 0.6 * height / face.shape[0]
+        face = cv2.resize(face, None, fx=scale, fy=scale)
+    for i in range(frames):
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+        if face is None:
+            frame = cv2.add(frame, rng.integers(0, 60, frame.shape, dtype=np.uint8))
+        else:
+            angle = 8 * np.sin(i / 25)
+            dx, dy = 40 * np.sin(i / 40), 15 * np.sin(i / 30)
+            center = (face.shape[1] / 2, face.shape[0] / 2)
+            matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+            matrix[:, 2] += ((width - face.shape[1]) / 2 + dx, (height - face.shape[0]) / 2 + dy)
+            frame = cv2.warpAffine(face, matrix, (width, height), dst=frame, borderMode=cv2.BORDER_TRANSPARENT)
+        writer.write(frame)
+    writer.release()
+
+
+def read_video(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        sys.exit(f"Cannot open {path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def parse_resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def measure_session_memory(frames, sessions):
+    """
+    Separate pass under tracemalloc (which would distort the timings): bytes
+    still held by the sessions after analyzing the frames, and the peak.
+    """
+    tracemalloc.start()
+    baseline_bytes, _ = tracemalloc.get_traced_memory()
+    monitors = [iam.CheatingMonitor() for _ in range(sessions)]
+    vision_sessions = [iam.VisionSession() for _ in range(sessions)]
+    for frame in frames:
+        for monitor, vision_session in zip(monitors, vision_sessions):
+            iam.analyze_frame_headless(frame, monitor, vision_session)
+    retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained_bytes - baseline_bytes, peak_bytes - baseline_bytes
+
+
+def run_case(frames, resolution, sessions, frame_format="bgr24"):
+    """
+    Runs `sessions` independent sessions over the same frames, interleaved
+    round-robin. frame_format="gray" feeds luma, as the server does with the
+    decoder's Y plane (converted up front, outside the timed loop).
+    """
+    width, height = resolution
+    scaled = [cv2.resize(f, (width, height), interpolation=cv2.INTER_AREA) if f.shape[:2] != (height, width) else f
+              for f in frames]
+    if frame_format == "gray":
+        scaled = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in scaled]
+
+    monitors = [iam.CheatingMonitor() for _ in range(sessions)]
+    vision_sessions = [iam.VisionSession() for _ in range(sessions)]
+    per_frame_ms = []
+    started = time.perf_counter()
+    for frame in scaled:
+        for monitor, vision_session in zip(monitors, vision_sessions):
+            frame_started = time.perf_counter()
+            iam.analyze_frame_headless(frame, monitor, vision_session)
+            per_frame_ms.append((time.perf_counter() - frame_started) * 1000.0)
+    elapsed = time.perf_counter() - started
+    retained_bytes, peak_bytes = measure_session_memory(scaled, sessions)
+
+    total_frames = len(scaled) * sessions
+    per_frame_ms = np.array(per_frame_ms)
+    return {
+        "resolution": f"{width}x{height}",
+        "sessions": sessions,
+        "frame_format": frame_format,
+        "frames": total_frames,
+        "fps_total": round(total_frames / elapsed, 2),
+        "fps_per_session": round(len(scaled) / elapsed, 2),
+        "frame_ms": {"p50": round(float(np.percentile(per_frame_ms, 50)), 3),
+                     "p95": round(float(np.percentile(per_frame_ms, 95)), 3),
+                     "p99": round(float(np.percentile(per_frame_ms, 99)), 3)},
+        "stage_latency_ms": monitors[0].metrics.stages.summary(),
+        "memory_per_session_bytes": int(retained_bytes / sessions),
+        "peak_traced_bytes": int(peak_bytes),
+        "face_detected_ratio": round(monitors[0].total_frames_processed / len(scaled), 3),
+        "vision": vision_sessions[0].stats(),
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints fps changes against a previous run; returns False if any case regressed by more than tolerance."""
+    with open(baseline_path) as f:
+        baseline = {(r["fixture"], r["resolution"], r["sessions"]): r for r in json.load(f)["results"]}
+    ok = True
+    for result in results:
+        previous = baseline.get((result["fixture"], result["resolution"], result["sessions"]))
+        if previous is None:
+            continue
+        change = result["fps_total"] / previous["fps_total"] - 1.0
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        print(f"{result['fixture']} {result['resolution']:>10} x{result['sessions']:<3} fps {previous['fps_total']:>8} -> "
+              f"{result['fps_total']:>8} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for interview_analyzer_module")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", nargs="+", help="Recorded video fixtures")
+    source.add_argument("--synthetic", action="store_true", help="Generate a synthetic clip instead")
+    parser.add_argument("--face-image", help="Face photo to animate in the synthetic clip")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per fixture")
+    parser.add_argument("--resolutions", nargs="+", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--frame-format", choices=["bgr24", "gray"], default="gray",
+                        help="Feed BGR frames or luma (what the server analyzes)")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="Previous results JSON to compare fps against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed fps drop before --compare fails")
+    args = parser.parse_args()
+
+    if not iam.load_models():
+        sys.exit("Models failed to load.")
+
+    fixtures = args.video or []
+    temp_dir = None
+    if args.synthetic:
+        temp_dir = tempfile.TemporaryDirectory()
+        fixtures = [os.path.join(temp_dir.name, "synthetic.mp4")]
+        write_synthetic_video(fixtures[0], args.frames, args.face_image)
+
+    results = []
+    for fixture in fixtures:
+        frames = read_video(fixture, args.frames)
+        if not frames:
+            print(f"No frames in {fixture}, skipping.")
+            continue
+        for resolution in args.resolutions:
+            for sessions in args.sessions:
+                result = run_case(frames, parse_resolution(resolution), sessions, args.frame_format)
+                result["fixture"] = os.path.basename(fixture)
+                results.append(result)
+                print(f"{os.path.basename(fixture)} {result['resolution']} x{sessions}: "
+                      f"{result['fps_total']} fps total, p95 {result['frame_ms']['p95']} ms/frame", file=sys.stderr)
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+    report = {"environment": environment_info(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
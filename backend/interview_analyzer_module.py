@@ -3,48 +3,158 @@ import cv2
 import dlib
 import numpy as np
 import math # For angle calculations
-import time # For CheatingMonitor (though not used in current simple update_metrics)
+import heapq
+import io
+import json
+import time
+import threading
+import zipfile
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+import analysis_metrics # Per-session counters/histograms instead of per-frame prints
+import analysis_timeline # Bounded per-frame timeline behind the final report
 
 # --- 0. Configuration and Model Loading ---
 DLIB_LANDMARK_PREDICTOR_PATH = "shape_predictor_68_face_landmarks.dat" # Expect in same dir
 OPENCV_FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
 
+TRACE_EVERY = analysis_metrics.ANALYSIS_TRACE_EVERY_N_FRAMES # Sampled debug tracing in update_metrics (0 = off)
+
+# Detect-once-then-track: full detection only every N frames or when tracking confidence drops
+FACE_TRACKING_ENABLED = True
+DETECT_EVERY_N_FRAMES = 15 # Re-detect at least this often while tracking
+TRACKING_SEARCH_MARGIN = 0.5 # Re-detection search area around the last face, as a fraction of its size
+TRACKING_MIN_CONFIDENCE = 0.5 # Min IoU between the predicted rect and the rect the new landmarks imply
+
+# Motion gate: reuse the last frame's results while the image (the face area, once found) has not changed
+MOTION_GATE_ENABLED = True
+MOTION_GATE_THUMBNAIL_SIZE = (32, 32) # (width, height) of the luma thumbnail that is compared
+MOTION_GATE_MEAN_DIFF = 1.5 # Max mean abs thumbnail difference (0-255) of an unchanged frame
+MOTION_GATE_MAX_DIFF = 12 # Max abs difference of any thumbnail pixel (an eye movement is local)
+MOTION_GATE_MAX_REUSE = 10 # At most this many frames in a row reuse results before a full analysis
+
+# Multi-resolution pipeline: detect on a downscaled image, landmarks on a native-resolution ROI
+DETECTION_MAX_SIDE = 640 # Longest side of the image the detector sees (0 = native resolution)
+DETECTION_SCALE = None # Fixed detection scale; overrides DETECTION_MAX_SIDE when set
+LANDMARK_ROI_MARGIN = 0.25 # Context kept around the face rect for the shape predictor, as a fraction of its size
+
+# Model loading: only what the pipeline needs, concurrently, each model at most once
+LOAD_HAAR_CASCADE = False # The Haar cascade is not used by the analysis pipeline; load it only if something needs it
+MODEL_LOAD_WORKERS = 3 # Threads used to load models concurrently
+WARM_UP_FRAME_SHAPE = (480, 640) # Synthetic luma frame pushed through the pipeline once after loading
+
+MAX_KEY_EVENTS = 500 # Most recent sustained gaze/head events kept per session for the final report
+
 face_detector_cv = None
 dlib_face_detector = None
 dlib_landmark_predictor = None
 models_loaded = False
 
-def load_models():
+def _load_haar_cascade():
+    cascade = cv2.CascadeClassifier(OPENCV_FACE_CASCADE_PATH)
+    if cascade.empty():
+        raise IOError(f"Could not load {OPENCV_FACE_CASCADE_PATH}")
+    return cascade
+
+MODEL_LOADERS = {
+    "face_detector": dlib.get_frontal_face_detector, # Using dlib's detector is generally good for subsequent landmark detection
+    "landmark_predictor": lambda: dlib.shape_predictor(DLIB_LANDMARK_PREDICTOR_PATH),
+    "haar_cascade": _load_haar_cascade, # OpenCV's Haar can be an alternative or for other uses
+}
+PIPELINE_MODELS = ("face_detector", "landmark_predictor") # What extract_features needs
+
+def required_models():
+    return list(PIPELINE_MODELS) + (["haar_cascade"] if LOAD_HAAR_CASCADE else [])
+
+class ModelRegistry:
+    """
+    Loads vision models by name, concurrently, at most once each, and keeps
+    their load times. Loads are serialized by a lock, so a frame that needs a
+    model while it is still loading waits for that load instead of starting another.
+    """
+
+    def __init__(self, loaders):
+        self._loaders = loaders
+        self._models = {}
+        self._lock = threading.Lock()
+        self.load_ms = {} # {name: milliseconds}
+        self.warm_up_ms = None
+
+    def get(self, name):
+        return self._models.get(name)
+
+    def loaded(self, names):
+        return all(name in self._models for name in names)
+
+    def load(self, names):
+        """Loads whichever of names are missing; returns True when all of them are available."""
+        with self._lock:
+            missing = [name for name in names if name not in self._models]
+            if missing:
+                with ThreadPoolExecutor(max_workers=min(len(missing), MODEL_LOAD_WORKERS)) as pool:
+                    futures = {name: pool.submit(self._timed_load, name) for name in missing}
+                for name, future in futures.items():
+                    try:
+                        self._models[name], self.load_ms[name] = future.result()
+                    except Exception as e:
+                        print(f"Error loading model '{name}' in interview_analyzer_module: {e}")
+            return self.loaded(names)
+
+    def _timed_load(self, name):
+        started = time.perf_counter()
+        model = self._loaders[name]()
+        return model, round((time.perf_counter() - started) * 1000.0, 1)
+
+model_registry = ModelRegistry(MODEL_LOADERS)
+
+def load_models(names=None, warm_up=False):
+    """
+    Loads the named models (default: required_models()) through model_registry.
+    With warm_up=True, also runs one synthetic inference the first time the
+    pipeline models are ready. Returns False if any of them failed to load.
+    """
     global face_detector_cv, dlib_face_detector, dlib_landmark_predictor, models_loaded
-    if models_loaded:
-        return True
-    try:
-        # Using dlib's detector is generally good for subsequent landmark detection
-        dlib_face_detector = dlib.get_frontal_face_detector()
-        dlib_landmark_predictor = dlib.shape_predictor(DLIB_LANDMARK_PREDICTOR_PATH)
-        # OpenCV's Haar can be an alternative or for other uses
-        face_detector_cv = cv2.CascadeClassifier(OPENCV_FACE_CASCADE_PATH)
-        if dlib_face_detector is None or dlib_landmark_predictor is None or face_detector_cv.empty():
-             print("Error: One or more models failed to load correctly (dlib detector/predictor or OpenCV cascade).")
-             models_loaded = False
-             return False
-        print("Vision models loaded successfully for interview_analyzer_module.")
-        models_loaded = True
+    names = required_models() if names is None else names
+    if model_registry.loaded(names) and (not warm_up or model_registry.warm_up_ms is not None):
         return True
-    except Exception as e:
-        print(f"Error loading models in interview_analyzer_module: {e}")
-        print("Please ensure 'shape_predictor_68_face_landmarks.dat' is in the backend directory.")
-        models_loaded = False
+    ok = model_registry.load(names)
+    dlib_face_detector = model_registry.get("face_detector")
+    dlib_landmark_predictor = model_registry.get("landmark_predictor")
+    face_detector_cv = model_registry.get("haar_cascade")
+    models_loaded = model_registry.loaded(PIPELINE_MODELS)
+    if not ok:
+        if "landmark_predictor" in names and dlib_landmark_predictor is None:
+            print("Please ensure 'shape_predictor_68_face_landmarks.dat' is in the backend directory.")
         return False
+    if warm_up and models_loaded and model_registry.warm_up_ms is None:
+        warm_up_models()
+    print(f"Vision models loaded successfully for interview_analyzer_module: {model_report()}")
+    return True
+
+def model_report():
+    """Which models are loaded, how long each took (ms) and the warm-up time, for startup logs and the API."""
+    return {
+        "ready": models_loaded,
+        "loaded": sorted(model_registry._models),
+        "load_ms": dict(model_registry.load_ms),
+        "warm_up_ms": model_registry.warm_up_ms,
+    }
 
 # --- 1. Feature Extraction Functions ---
 
+def shape_to_array(shape):
+    """Nx2 int32 array from a dlib full_object_detection, filled straight from the point iterator."""
+    count = shape.num_parts
+    coords = np.fromiter((c for p in shape.parts() for c in (p.x, p.y)), dtype=np.int32, count=2 * count)
+    return coords.reshape(count, 2)
+
 def get_landmarks(image_gray, face_rect_dlib):
     if not models_loaded: return None
     try:
         shape = dlib_landmark_predictor(image_gray, face_rect_dlib)
-        landmarks = np.array([[p.x, p.y] for p in shape.parts()])
-        return landmarks
+        return shape_to_array(shape)
     except Exception as e:
         print(f"Error in get_landmarks: {e}")
         return None
@@ -84,21 +194,144 @@ def estimate_gaze_direction_rudimentary(landmarks, frame_width):
         # print(f"Gaze estimation error: {e}")
         return "Gaze Error"
 
+GAZE_THRESHOLD_FACTOR = 0.4 # Same factor as estimate_gaze_direction_rudimentary
+GAZE_LABELS = np.array(["Looking Left", "Looking Right", "Looking Center/Forward"])
+
+def estimate_gaze_directions_batch(landmarks_stack):
+    """Vectorized estimate_gaze_direction_rudimentary over an (N, 68, 2) stack. Returns N labels."""
+    lms = np.asarray(landmarks_stack, dtype=np.float64)
+    left_eye_center_x = lms[:, 36:42, 0].mean(axis=1)
+    right_eye_center_x = lms[:, 42:48, 0].mean(axis=1)
+    deviation = (left_eye_center_x + right_eye_center_x) / 2 - lms[:, 27, 0]
+    eye_span = np.linalg.norm(lms[:, 39] - lms[:, 36], axis=1)
+    eye_span = np.where(eye_span < 1, 10, eye_span) * GAZE_THRESHOLD_FACTOR
+    codes = np.full(len(lms), 2)
+    codes[deviation > eye_span] = 1
+    codes[deviation < -eye_span] = 0
+    return GAZE_LABELS[codes].tolist()
+
+# 3D reference points (nose tip, chin, eye corners, mouth corners) and their landmark indices
+POSE_MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0), (0.0, -330.0, -65.0), (-225.0, 170.0, -135.0),
+    (225.0, 170.0, -135.0), (-150.0, -150.0, -125.0), (150.0, -150.0, -125.0)
+], dtype=np.float64)
+POSE_LANDMARK_INDICES = np.array([30, 8, 36, 45, 48, 54])
+POSE_REFINE_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_COUNT, 5, 1e-3) # Per-frame refinement budget
+
+def rotation_matrix_to_euler(rotation_matrix):
+    """Yaw, pitch, roll in degrees from one 3x3 rotation matrix (scalar math beats NumPy for a single 3x3)."""
+    r00, _, _, r10, r11, r12, r20, r21, r22 = rotation_matrix.ravel().tolist()
+    sy = math.hypot(r00, r10)
+    if sy >= 1e-6:
+        x_angle = math.atan2(r21, r22)
+        z_angle = math.atan2(r10, r00)
+    else:
+        x_angle = math.atan2(-r12, r11)
+        z_angle = 0
+    y_angle = math.atan2(-r20, sy)
+    return math.degrees(y_angle), math.degrees(x_angle), math.degrees(z_angle) # Yaw, Pitch, Roll
+
+def rotation_matrices_to_euler(rotation_matrices):
+    """Vectorized rotation_matrix_to_euler over an (N, 3, 3) stack. Returns an (N, 3) array of yaw, pitch, roll."""
+    r = np.asarray(rotation_matrices, dtype=np.float64).reshape(-1, 3, 3)
+    sy = np.hypot(r[:, 0, 0], r[:, 1, 0])
+    singular = sy < 1e-6
+    x_angle = np.where(singular, np.arctan2(-r[:, 1, 2], r[:, 1, 1]), np.arctan2(r[:, 2, 1], r[:, 2, 2]))
+    y_angle = np.arctan2(-r[:, 2, 0], sy)
+    z_angle = np.where(singular, 0.0, np.arctan2(r[:, 1, 0], r[:, 0, 0]))
+    return np.degrees(np.stack([y_angle, x_angle, z_angle], axis=1))
+
+class HeadPoseSolver:
+    """
+    Per-session solvePnP state. The camera intrinsics are cached per frame size,
+    image points go into a preallocated buffer, and after the first EPNP solve
+    the previous rotation/translation seed a short iterative refinement (the
+    useExtrinsicGuess idea, via solvePnPRefineVVS with a fixed iteration budget),
+    which is cheaper than solving from scratch and keeps the angles steadier.
+    """
+    def __init__(self):
+        self._frame_size = None
+        self._camera_matrix = np.zeros((3, 3), dtype=np.float64)
+        self._camera_matrix[2, 2] = 1.0
+        self._dist_coeffs = np.zeros((4, 1), dtype=np.float64)
+        self._image_points = np.empty((len(POSE_LANDMARK_INDICES), 2), dtype=np.float64)
+        self._rotation_vector = np.zeros((3, 1), dtype=np.float64)
+        self._translation_vector = np.zeros((3, 1), dtype=np.float64)
+        self._has_guess = False
+
+    def _set_frame_size(self, frame_shape):
+        frame_size = (frame_shape[0], frame_shape[1])
+        if frame_size == self._frame_size:
+            return
+        focal_length = frame_shape[1]
+        self._camera_matrix[0, 0] = self._camera_matrix[1, 1] = focal_length
+        self._camera_matrix[0, 2] = frame_shape[1] / 2
+        self._camera_matrix[1, 2] = frame_shape[0] / 2
+        self._frame_size = frame_size
+        self._has_guess = False # Old extrinsics are meaningless for new intrinsics
+
+    def reset(self):
+        self._has_guess = False
+
+    def solve_rotation(self, landmarks, frame_shape):
+        """Runs solvePnP and returns the 3x3 rotation matrix, or None."""
+        self._set_frame_size(frame_shape)
+        self._image_points[:] = landmarks[POSE_LANDMARK_INDICES]
+        try:
+            if self._has_guess:
+                # A few Gauss-Newton (VVS) steps from last frame's pose; cheaper than a fresh EPNP solve
+                rotation_vector, translation_vector = cv2.solvePnPRefineVVS(
+                    POSE_MODEL_POINTS, self._image_points, self._camera_matrix, self._dist_coeffs,
+                    self._rotation_vector, self._translation_vector, POSE_REFINE_CRITERIA)
+                success = True
+            else:
+                success, rotation_vector, translation_vector = cv2.solvePnP(
+                    POSE_MODEL_POINTS, self._image_points, self._camera_matrix, self._dist_coeffs,
+                    flags=cv2.SOLVEPNP_EPNP)
+            if success: # No-op copies when OpenCV already updated the buffers in place
+                self._rotation_vector[:] = rotation_vector
+                self._translation_vector[:] = translation_vector
+        except cv2.error:
+            success = False
+        # A face behind the camera means the iterative solve diverged; start over from EPNP
+        self._has_guess = bool(success) and self._translation_vector[2, 0] > 0
+        if not success:
+            return None
+        rotation_matrix, _ = cv2.Rodrigues(self._rotation_vector)
+        return rotation_matrix
+
+    def solve(self, landmarks, frame_shape):
+        """Yaw, pitch, roll in degrees, or (None, None, None)."""
+        if landmarks is None:
+            return None, None, None
+        rotation_matrix = self.solve_rotation(landmarks, frame_shape)
+        if rotation_matrix is None:
+            return None, None, None
+        return rotation_matrix_to_euler(rotation_matrix)
+
+def estimate_head_poses_batch(landmarks_list, frame_shapes, solvers):
+    """
+    Head pose for a batch of sessions: one (warm-started) solve per session with
+    its own HeadPoseSolver, then the Euler conversion for the whole batch at once.
+    Returns a list of (yaw, pitch, roll), (None, None, None) where solving failed.
+    """
+    rotations, solved = [], []
+    for i, (landmarks, frame_shape, solver) in enumerate(zip(landmarks_list, frame_shapes, solvers)):
+        rotation_matrix = solver.solve_rotation(landmarks, frame_shape)
+        if rotation_matrix is not None:
+            rotations.append(rotation_matrix)
+            solved.append(i)
+    angles = [(None, None, None)] * len(landmarks_list)
+    if rotations:
+        for i, row in zip(solved, rotation_matrices_to_euler(np.stack(rotations)).tolist()):
+            angles[i] = tuple(row)
+    return angles
 
 def get_head_pose_angles_solvepnp(landmarks, frame_shape):
-    # (Same as previously defined, ensure it handles None landmarks)
+    """Stateless one-off pose estimate; per-session code should keep a HeadPoseSolver instead."""
     if landmarks is None: return None, None, None
     try:
-        image_points = np.array([
-            landmarks[30], landmarks[8], landmarks[36],
-            landmarks[45], landmarks[48], landmarks[54]
-        ], dtype="double")
-
-        model_points = np.array([
-            (0.0, 0.0, 0.0), (0.0, -330.0, -65.0), (-225.0, 170.0, -135.0),
-            (225.0, 170.0, -135.0), (-150.0, -150.0, -125.0), (150.0, -150.0, -125.0)
-        ])
-
+        image_points = landmarks[POSE_LANDMARK_INDICES].astype(np.float64)
         focal_length = frame_shape[1]
         center = (frame_shape[1]/2, frame_shape[0]/2)
         camera_matrix = np.array(
@@ -107,71 +340,335 @@ def get_head_pose_angles_solvepnp(landmarks, frame_shape):
         dist_coeffs = np.zeros((4, 1))
 
         (success, rotation_vector, _) = cv2.solvePnP(
-            model_points, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_EPNP # EPNP is often faster
+            POSE_MODEL_POINTS, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_EPNP # EPNP is often faster
         )
 
         if success:
             rotation_matrix, _ = cv2.Rodrigues(rotation_vector)
-            sy = math.sqrt(rotation_matrix[0,0]**2 + rotation_matrix[1,0]**2)
-            singular = sy < 1e-6
-            if not singular:
-                x_angle = math.atan2(rotation_matrix[2,1], rotation_matrix[2,2])
-                y_angle = math.atan2(-rotation_matrix[2,0], sy)
-                z_angle = math.atan2(rotation_matrix[1,0], rotation_matrix[0,0])
-            else:
-                x_angle = math.atan2(-rotation_matrix[1,2], rotation_matrix[1,1])
-                y_angle = math.atan2(-rotation_matrix[2,0], sy)
-                z_angle = 0
-            return math.degrees(y_angle), math.degrees(x_angle), math.degrees(z_angle) # Yaw, Pitch, Roll
+            return rotation_matrix_to_euler(rotation_matrix)
     except Exception as e:
         # print(f"Head pose estimation error: {e}")
         pass
     return None, None, None
 
 # --- 2. Cheating Detection Logic ---
+GAZE_DEFLECTION_SECONDS = 5 # Sustained gaze deflection before it counts
+HEAD_AWAY_SECONDS = 3 # Sustained head turn before it counts
+RUN_GAP_SECONDS = 0.5 # A run survives gaps (other frames, dropped frames) up to this long
+SCORE_RISE_PER_SECOND = 100 # Live suspicion score growth per active trigger
+SCORE_DECAY_PER_SECOND = 50 # Live suspicion score decay with no trigger active
+MONITOR_STATE_VERSION = 2 # Bump when the serialize() layout changes
+
+# Final verdict (get_final_conclusion); every value here can be overridden when re-scoring
+FINAL_GAZE_POINTS = 50 # Suspicion points (and trust deduction) when every frame is gaze-deflected
+FINAL_HEAD_POINTS = 50 # Suspicion points (and trust deduction) when every frame has the head turned
+HIGH_CONCERN_THRESHOLD = 70 # Final suspicion above this is High Concern
+MODERATE_CONCERN_THRESHOLD = 35 # ... above this, Moderate Concern
+
+POLICY_DEFAULTS = {
+    "yaw_threshold": 30,
+    "pitch_threshold_looking_away": 20,
+    "gaze_deflection_seconds": GAZE_DEFLECTION_SECONDS,
+    "head_away_seconds": HEAD_AWAY_SECONDS,
+    "run_gap_seconds": RUN_GAP_SECONDS,
+    "gaze_points": FINAL_GAZE_POINTS,
+    "head_points": FINAL_HEAD_POINTS,
+    "gaze_trust_deduction": FINAL_GAZE_POINTS,
+    "head_trust_deduction": FINAL_HEAD_POINTS,
+    "high_concern_threshold": HIGH_CONCERN_THRESHOLD,
+    "moderate_concern_threshold": MODERATE_CONCERN_THRESHOLD,
+}
+
+def scoring_policy(base=None, /, **overrides):
+    """A complete policy dict: base (or POLICY_DEFAULTS) with overrides. Raises ValueError for unknown or non-numeric values."""
+    policy = dict(POLICY_DEFAULTS if base is None else base)
+    for key, value in overrides.items():
+        if key not in POLICY_DEFAULTS:
+            raise ValueError(f"Unknown scoring policy setting {key!r}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Scoring policy setting {key!r} must be a number")
+        policy[key] = value
+    return policy
+
+def final_scores(frames, gaze_frames, head_frames, durations, policy):
+    """
+    get_final_conclusion's (suspicion, trust) scores over arrays of sessions:
+    per-session frame totals and analyzed durations. Returns int64 arrays.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    durations = np.asarray(durations, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gaze_ratio = np.asarray(gaze_frames, dtype=np.float64) / frames
+        head_turn_ratio = np.asarray(head_frames, dtype=np.float64) / frames
+    suspicion = np.minimum(100, np.round(gaze_ratio * policy["gaze_points"] + head_turn_ratio * policy["head_points"]))
+    trust = np.maximum(0, np.round(100 - gaze_ratio * policy["gaze_trust_deduction"]
+                                   - head_turn_ratio * policy["head_trust_deduction"]))
+    has_frames = frames > 0
+    suspicion = np.where(has_frames, suspicion, 0)
+    # No frames, but analysis ran (e.g. black screen): lowest trust; no frames and no duration: 100
+    trust = np.where(has_frames, trust, np.where(durations > 0, 0, 100))
+    return suspicion.astype(np.int64), trust.astype(np.int64)
+
+def concern_status_text(suspicion_score, deviations_noted, policy):
+    if suspicion_score > policy["high_concern_threshold"]:
+        return f"High Concern (Suspicion: {suspicion_score})."
+    if suspicion_score > policy["moderate_concern_threshold"]:
+        return f"Moderate Concern (Suspicion: {suspicion_score})."
+    if deviations_noted:
+        return f"Low Concern (Suspicion: {suspicion_score}). Some deviations noted."
+    return f"Low Concern (Suspicion: {suspicion_score}). No significant deviations."
+
+def sustained_runs(times, starts, threshold, open_run_start=None):
+    """
+    Vectorized run detection over flagged frame times. starts marks the frames
+    that open a run; leading unmarked frames continue a run opened earlier at
+    open_run_start. Returns (run_of, run_start, event_runs, event_index): each
+    frame's run number (-1 for the continued run) and run start time, and per
+    run reaching threshold seconds, its number and its first frame that does.
+    """
+    run_of = np.cumsum(starts) - 1
+    run_starts = times[starts]
+    if open_run_start is None:
+        run_start = run_starts[run_of]
+    else:
+        run_start = np.concatenate(([open_run_start], run_starts))[run_of + 1]
+    due_index = np.flatnonzero(times - run_start >= threshold)
+    event_runs, first_due = np.unique(run_of[due_index], return_index=True)
+    return run_of, run_start, event_runs, due_index[first_due]
+
+class _Run:
+    """
+    One run of flagged frames: [start, end] frame times and the time the run
+    first lasted threshold seconds (its event), if it has. head keeps the frame
+    times before that point; merge() needs them for a tracker's first run only.
+    """
+    __slots__ = ("start", "end", "event", "head")
+
+    def __init__(self, start, end=None, event=None, head=None):
+        self.start = start
+        self.end = start if end is None else end
+        self.event = event
+        self.head = [] if head is None else head
+
+    def copy(self):
+        return _Run(self.start, self.end, self.event, list(self.head))
+
+    def to_state(self):
+        return [self.start, self.end, self.event, self.head]
+
+class SustainedRunTracker:
+    """
+    Finds sustained runs in the times of flagged frames (gaze deflected, head
+    turned). Only the first and last runs are kept, so two trackers over
+    adjacent spans of the same session merge exactly: the left tracker's last
+    run and the right one's first run join when the gap between them is short.
+    """
+    __slots__ = ("threshold", "gap", "first", "last", "count", "recent")
+
+    def __init__(self, threshold, gap=RUN_GAP_SECONDS, max_recent=MAX_KEY_EVENTS):
+        self.threshold = threshold
+        self.gap = gap
+        self.first = None
+        self.last = None # Same object as first while there is only one run
+        self.count = 0 # Sustained events
+        self.recent = deque(maxlen=max_recent) # Newest event times
+
+    def observe(self, t):
+        """Adds a flagged frame at time t (non-decreasing). True when it completes a sustained run."""
+        run = self.last
+        if run is not None and t - run.end <= self.gap:
+            run.end = t
+        else:
+            run = self.last = _Run(t)
+            if self.first is None:
+                self.first = run
+        if run.event is not None:
+            return False
+        if t - run.start >= self.threshold:
+            run.event = t
+            self.count += 1
+            self.recent.append(t)
+            return True
+        if run is self.first:
+            run.head.append(t)
+        return False
+
+    def observe_batch(self, times):
+        """observe() over a float64 array of flagged frame times (non-decreasing). Returns the number of new events."""
+        if not len(times):
+            return 0
+        starts = np.empty(len(times), dtype=bool) # Frames that open a new run
+        starts[0] = self.last is None or times[0] - self.last.end > self.gap
+        starts[1:] = np.diff(times) > self.gap
+        start_index = np.flatnonzero(starts)
+        run_of, run_start, event_runs, event_index = sustained_runs(
+            times, starts, self.threshold, None if starts[0] else self.last.start)
+        if not starts[0] and self.last.event is not None and len(event_runs) and event_runs[0] == -1:
+            event_runs, event_index = event_runs[1:], event_index[1:] # The continued run already has its event
+        event_times = times[event_index]
+        run_starts = times[start_index]
+        events = dict(zip(event_runs.tolist(), event_times.tolist()))
+
+        if self.first is None or (self.first is self.last and not starts[0]): # Frames of the first run fill its head
+            in_head = (run_of == (0 if self.first is None else -1)) & (times - run_start < self.threshold)
+        else:
+            in_head = None
+        if not starts[0]:
+            self.last.end = float(times[start_index[0] - 1] if len(start_index) else times[-1])
+            if -1 in events:
+                self.last.event = events[-1]
+        run_ends = np.append(start_index[1:] - 1, len(times) - 1)
+        for run in sorted({0, len(start_index) - 1}) if len(start_index) else ():
+            new_run = _Run(float(run_starts[run]), float(times[run_ends[run]]), events.get(run))
+            if self.first is None:
+                self.first = new_run
+            self.last = new_run
+        if in_head is not None:
+            self.first.head.extend(times[in_head].tolist())
+        self.count += len(event_times)
+        self.recent.extend(event_times.tolist())
+        return len(event_times)
+
+    def active_seconds(self, now):
+        """How long the run still open at now has lasted (0 when it has lapsed)."""
+        run = self.last
+        if run is None or now - run.end > self.gap:
+            return 0.0
+        return run.end - run.start
+
+    def merge(self, other):
+        """New tracker for this span followed by other's (same threshold and gap)."""
+        merged = SustainedRunTracker(self.threshold, self.gap, self.recent.maxlen)
+        if other.first is None or self.first is None:
+            source = self if other.first is None else other
+            merged.first = source.first.copy() if source.first is not None else None
+            merged.last = merged.first if source.last is source.first else source.last.copy()
+            merged.count = source.count
+            merged.recent.extend(source.recent)
+            return merged
+        left, right = self.last, other.first
+        merged.count = self.count + other.count
+        merged.recent.extend(self.recent)
+        right_recent = list(other.recent)
+        if right.start - left.end > self.gap: # Independent runs
+            merged.first = self.first.copy()
+            merged.last = other.last.copy()
+            merged.recent.extend(right_recent)
+            return merged
+        # The runs are one: its event is left's, or the first right frame threshold after left.start
+        cutoff = left.start + self.threshold
+        joined = _Run(left.start, right.end, left.event)
+        if left.event is None:
+            joined.event = next((t for t in right.head if t >= cutoff), right.event)
+            joined.head = left.head + [t for t in right.head if t < cutoff]
+            if joined.event is not None:
+                merged.count += 1
+                merged.recent.append(joined.event)
+        else:
+            joined.head = list(left.head)
+        if right.event is not None:
+            merged.count -= 1
+            if right_recent and right_recent[0] == right.event:
+                del right_recent[0]
+        merged.recent.extend(right_recent)
+        merged.first = joined if self.first is left else self.first.copy()
+        merged.last = joined if other.last is right else other.last.copy()
+        return merged
+
+    def to_state(self):
+        return {"first": self.first.to_state() if self.first is not None else None,
+                "last": self.last.to_state() if self.last is not self.first else None,
+                "count": self.count, "recent": list(self.recent)}
+
+    @classmethod
+    def from_state(cls, state, threshold, gap, max_recent=MAX_KEY_EVENTS):
+        tracker = cls(threshold, gap, max_recent)
+        if state["first"] is not None:
+            tracker.first = _Run(*state["first"])
+            tracker.last = _Run(*state["last"]) if state["last"] is not None else tracker.first
+        tracker.count = state["count"]
+        tracker.recent.extend(state["recent"])
+        return tracker
+
 class CheatingMonitor:
-    # (Same as previously defined)
-    def __init__(self):
-        self.gaze_deflection_frames = 0 # Renamed for clarity
-        self.head_turned_away_frames = 0
-        self.suspicion_score = 0
-        
-        self.GAZE_DEFLECTION_FRAMES_LIMIT = 5 * 10 # 5 seconds at 10 FPS analysis rate
-        self.HEAD_AWAY_FRAMES_LIMIT = 3 * 10 # 3 seconds at 10 FPS analysis rate
+    """
+    Session verdict state, driven by frame timestamps rather than the wall
+    clock or frame counts: feed frames in time order, or analyze spans of a
+    session separately and merge() the partial monitors in order. Monitors
+    serialize() to bytes and restore() in another process.
+    """
+    __slots__ = (
+        "metrics", "gaze_runs", "head_runs", "_score", "_score_time",
+        "GAZE_DEFLECTION_SECONDS", "HEAD_AWAY_SECONDS", "RUN_GAP_SECONDS",
+        "YAW_THRESHOLD", "PITCH_THRESHOLD_LOOKING_AWAY", "SUSPICION_THRESHOLD_SCORE",
+        "total_frames_processed", "first_frame_time", "last_frame_time", "timeline", "signal", "status_text",
+        "gaze_deflected_total_frames", "head_turned_total_frames",
+    )
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics if metrics is not None else analysis_metrics.SessionMetrics()
+        self.GAZE_DEFLECTION_SECONDS = GAZE_DEFLECTION_SECONDS
+        self.HEAD_AWAY_SECONDS = HEAD_AWAY_SECONDS
+        self.RUN_GAP_SECONDS = RUN_GAP_SECONDS
         self.YAW_THRESHOLD = 30 # degrees
         self.PITCH_THRESHOLD_LOOKING_AWAY = 20 # degrees (looking down/up a lot)
         self.SUSPICION_THRESHOLD_SCORE = 50 # Arbitrary score threshold
+        self.gaze_runs = SustainedRunTracker(self.GAZE_DEFLECTION_SECONDS, self.RUN_GAP_SECONDS)
+        self.head_runs = SustainedRunTracker(self.HEAD_AWAY_SECONDS, self.RUN_GAP_SECONDS)
+        self._score = 0.0 # Live suspicion score, integrated over frame time
+        self._score_time = None
 
         # New attributes for final conclusion
         self.total_frames_processed = 0
-        self.analysis_start_time = time.time()
-        self.event_history = [] # To store notable events
+        self.first_frame_time = None # Frame times seen, with or without a face
+        self.last_frame_time = None
+        self.timeline = analysis_timeline.EventTimeline() # Per-frame pose/gaze, bounded for long interviews
+        self.signal = analysis_timeline.FrameSignal() # Raw per-frame inputs, for re-scoring under other thresholds
+        self.status_text = "Analyzing..." # Latest assess_status() result, for live updates
         self.gaze_deflected_total_frames = 0
         self.head_turned_total_frames = 0
 
-    def update_metrics(self, gaze, head_yaw, head_pitch):
+    @property
+    def suspicion_score(self):
+        return round(self._score)
+
+    def thresholds(self):
+        return (self.GAZE_DEFLECTION_SECONDS, self.HEAD_AWAY_SECONDS, self.RUN_GAP_SECONDS, self.YAW_THRESHOLD,
+                self.PITCH_THRESHOLD_LOOKING_AWAY, self.SUSPICION_THRESHOLD_SCORE)
+
+    def policy(self):
+        """The scoring policy this monitor applies (see scoring_policy), e.g. to compare against a re-score."""
+        return scoring_policy(yaw_threshold=self.YAW_THRESHOLD,
+                              pitch_threshold_looking_away=self.PITCH_THRESHOLD_LOOKING_AWAY,
+                              gaze_deflection_seconds=self.GAZE_DEFLECTION_SECONDS,
+                              head_away_seconds=self.HEAD_AWAY_SECONDS, run_gap_seconds=self.RUN_GAP_SECONDS)
+
+    def observe_time(self, timestamp):
+        """Marks a frame at timestamp as analyzed (update_metrics does this for frames with a face)."""
+        if self.first_frame_time is None:
+            self.first_frame_time = timestamp
+        self.last_frame_time = timestamp
+
+    def update_metrics(self, gaze, head_yaw, head_pitch, head_roll=None, timestamp=None):
+        """timestamp: when the frame was captured (replays pass the recorded time); defaults to now."""
         self.total_frames_processed += 1
+        now = time.time() if timestamp is None else timestamp
+        self.observe_time(now)
         # Gaze
-        if gaze == "Looking Left" or gaze == "Looking Right":
-            self.gaze_deflection_frames += 1
+        gaze_deflected = gaze == "Looking Left" or gaze == "Looking Right"
+        if gaze_deflected:
             self.gaze_deflected_total_frames += 1
-            if self.gaze_deflection_frames == self.GAZE_DEFLECTION_FRAMES_LIMIT + 1: # Log when limit just crossed
-                self.event_history.append({
-                    "timestamp": time.time(),
-                    "type": "Sustained Gaze Deflection",
-                    "details": f"Gaze deflected for approx. {self.GAZE_DEFLECTION_FRAMES_LIMIT/10:.1f}s"
-                })
-        else:
-            self.gaze_deflection_frames = max(0, self.gaze_deflection_frames - 2)
+            if self.gaze_runs.observe(now):
+                self.metrics.gaze_events += 1
 
         # Head Pose
-        turned_away_this_frame = False
-        # Diagnostic prints for head pose
-        print(f"[Debug Head Pose] Yaw: {head_yaw}, Pitch: {head_pitch}, YAW_THRESH: {self.YAW_THRESHOLD}, PITCH_THRESH: {self.PITCH_THRESHOLD_LOOKING_AWAY}")
-
+        frame_flags = analysis_timeline.FLAG_GAZE_DEFLECTED if gaze_deflected else 0
+        if head_yaw is None or head_pitch is None: # solvePnP failed on this frame
+            self.signal.append(now, analysis_timeline.GAZE_CODES.get(gaze, -1), math.nan, math.nan)
+            self.timeline.append(now, None, None, None, gaze, frame_flags)
+            return
+        self.signal.append(now, analysis_timeline.GAZE_CODES.get(gaze, -1), head_yaw, head_pitch)
         condition_yaw = abs(head_yaw) > self.YAW_THRESHOLD
-        if condition_yaw:
-            print(f"[Debug Head Pose] YAW triggered. abs(head_yaw)={abs(head_yaw)}")
 
         # Revised pitch condition:
         # Assumes neutral pitch is ~ +/-180 degrees.
@@ -181,96 +678,208 @@ class CheatingMonitor:
         pitch_away_boundary = 180 - self.PITCH_THRESHOLD_LOOKING_AWAY
         condition_pitch = abs(head_pitch) < pitch_away_boundary
         
-        if condition_pitch:
-            print(f"[Debug Head Pose] PITCH triggered. abs(head_pitch)={abs(head_pitch)} is < {pitch_away_boundary}")
-        
         turned_away_this_frame = condition_yaw or condition_pitch
-        print(f"[Debug Head Pose] condition_yaw: {condition_yaw}, condition_pitch: {condition_pitch}, turned_away_this_frame: {turned_away_this_frame}")
+        if turned_away_this_frame:
+            frame_flags |= analysis_timeline.FLAG_HEAD_TURNED
+        self.timeline.append(now, head_yaw, head_pitch, head_roll, gaze, frame_flags)
+        self.metrics.observe_pose(head_yaw, head_pitch, condition_yaw, condition_pitch)
 
         if turned_away_this_frame:
-            self.head_turned_away_frames +=1
             self.head_turned_total_frames +=1
-            print(f"[Debug Head Pose] head_turned_total_frames incremented to: {self.head_turned_total_frames}")
-            if self.head_turned_away_frames == self.HEAD_AWAY_FRAMES_LIMIT + 1: # Log when limit just crossed
-                 self.event_history.append({
-                    "timestamp": time.time(),
-                    "type": "Sustained Head Turn Away",
-                    "details": f"Head turned for approx. {self.HEAD_AWAY_FRAMES_LIMIT/10:.1f}s"
-                })
-        else:
-            self.head_turned_away_frames = max(0, self.head_turned_away_frames -2)
+            if self.head_runs.observe(now):
+                self.metrics.head_events += 1
+        if TRACE_EVERY and self.total_frames_processed % TRACE_EVERY == 0: # Sampled; free when disabled
+            analysis_metrics.trace(self.metrics.session_id, self.total_frames_processed,
+                                   f"yaw={head_yaw:.1f} pitch={head_pitch:.1f} gaze={gaze} "
+                                   f"yaw_trig={condition_yaw} pitch_trig={condition_pitch} "
+                                   f"head_run={self.head_runs.active_seconds(now):.1f}s "
+                                   f"gaze_run={self.gaze_runs.active_seconds(now):.1f}s")
         
     def assess_status(self):
-        # (Same as previously defined, can be enhanced)
+        """Live status as of the latest frame; the score rises while a sustained run is open and decays otherwise."""
+        now = self.last_frame_time
+        gaze_seconds = self.gaze_runs.active_seconds(now) if now is not None else 0.0
+        head_seconds = self.head_runs.active_seconds(now) if now is not None else 0.0
         current_suspicion_triggers = []
-        normalized_score_increment = 10 # How much each trigger event adds to score
-
-        if self.gaze_deflection_frames > self.GAZE_DEFLECTION_FRAMES_LIMIT:
+        if gaze_seconds >= self.GAZE_DEFLECTION_SECONDS:
             current_suspicion_triggers.append("Gaze")
-            self.suspicion_score += normalized_score_increment
-        
-        if self.head_turned_away_frames > self.HEAD_AWAY_FRAMES_LIMIT:
+        if head_seconds >= self.HEAD_AWAY_SECONDS:
             current_suspicion_triggers.append("Head Pose")
-            self.suspicion_score += normalized_score_increment
-
-        if not current_suspicion_triggers: # If no current triggers, decay score
-            self.suspicion_score = max(0, self.suspicion_score - (normalized_score_increment // 2)) # Decay slower
 
-        self.suspicion_score = min(self.suspicion_score, self.SUSPICION_THRESHOLD_SCORE * 2) # Cap score
+        elapsed = now - self._score_time if now is not None and self._score_time is not None else 0.0
+        self._score_time = now
+        if current_suspicion_triggers:
+            self._score += SCORE_RISE_PER_SECOND * len(current_suspicion_triggers) * elapsed
+        else: # If no current triggers, decay score
+            self._score = max(0.0, self._score - SCORE_DECAY_PER_SECOND * elapsed) # Decay slower
+        self._score = min(self._score, self.SUSPICION_THRESHOLD_SCORE * 2) # Cap score
 
         if self.suspicion_score > self.SUSPICION_THRESHOLD_SCORE:
              return f"Potential Cheating ({(', '.join(current_suspicion_triggers))}) Score: {self.suspicion_score}"
         
-        return f"Normal. Score: {self.suspicion_score}. GazeFrames: {self.gaze_deflection_frames}, HeadFrames: {self.head_turned_away_frames}"
+        return f"Normal. Score: {self.suspicion_score}. GazeRun: {gaze_seconds:.1f}s, HeadRun: {head_seconds:.1f}s"
+
+    def update_metrics_batch(self, timestamps, gaze_codes, yaws, pitches, rolls=None):
+        """
+        update_metrics() for a batch of frames with a face, as arrays in time
+        order: gaze_codes index GAZE_LABELS (-1 for anything else), and yaw,
+        pitch and roll are NaN where there was no pose. The monitor ends up
+        exactly as if each frame had gone through update_metrics(); only the
+        sampled debug trace is not emitted.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(timestamps):
+            return
+        gaze_codes = np.asarray(gaze_codes, dtype=np.int64)
+        yaws = np.asarray(yaws, dtype=np.float64)
+        pitches = np.asarray(pitches, dtype=np.float64)
+        rolls = np.full(len(timestamps), np.nan) if rolls is None else np.asarray(rolls, dtype=np.float64)
+        self.total_frames_processed += len(timestamps)
+        self.observe_time(float(timestamps[0]))
+        self.observe_time(float(timestamps[-1]))
+
+        gaze_deflected = (gaze_codes == 0) | (gaze_codes == 1) # Looking Left / Looking Right
+        self.gaze_deflected_total_frames += int(np.count_nonzero(gaze_deflected))
+        self.metrics.gaze_events += self.gaze_runs.observe_batch(timestamps[gaze_deflected])
+
+        has_pose = ~(np.isnan(yaws) | np.isnan(pitches))
+        condition_yaw = has_pose & (np.abs(yaws) > self.YAW_THRESHOLD)
+        condition_pitch = has_pose & (np.abs(pitches) < 180 - self.PITCH_THRESHOLD_LOOKING_AWAY)
+        turned_away = condition_yaw | condition_pitch
+        flags = np.where(gaze_deflected, analysis_timeline.FLAG_GAZE_DEFLECTED, 0)
+        flags |= np.where(turned_away, analysis_timeline.FLAG_HEAD_TURNED, 0)
+        flags |= np.where(has_pose, 0, analysis_timeline.FLAG_NO_POSE)
+        rows = np.zeros(len(timestamps), dtype=analysis_timeline.FRAME_DTYPE)
+        rows["t"] = timestamps
+        rows["yaw"] = np.where(has_pose, yaws, np.nan)
+        rows["pitch"] = np.where(has_pose, pitches, np.nan)
+        rows["roll"] = np.where(has_pose, rolls, np.nan)
+        rows["gaze"] = np.where((gaze_codes >= 0) & (gaze_codes < len(GAZE_LABELS)), gaze_codes, -1)
+        rows["flags"] = flags
+        self.timeline.append_batch(rows)
+        signal_rows = np.empty(len(rows), dtype=analysis_timeline.SIGNAL_DTYPE)
+        for field in analysis_timeline.SIGNAL_DTYPE.names:
+            signal_rows[field] = rows[field]
+        self.signal.append_batch(signal_rows)
+        self.metrics.observe_poses(yaws[has_pose], pitches[has_pose], condition_yaw[has_pose], condition_pitch[has_pose])
+
+        self.head_turned_total_frames += int(np.count_nonzero(turned_away))
+        self.metrics.head_events += self.head_runs.observe_batch(timestamps[turned_away])
+
+    def events_total(self):
+        """Sustained gaze and head events over the whole session (key_events() keeps only the newest)."""
+        return self.gaze_runs.count + self.head_runs.count
+
+    def key_events(self, newest=None):
+        """Newest sustained events (all kept, or the newest N) as the dicts the frontend lists, oldest first."""
+        durations = {"Sustained Gaze Deflection": f"Gaze deflected for approx. {self.GAZE_DEFLECTION_SECONDS:.1f}s",
+                     "Sustained Head Turn Away": f"Head turned for approx. {self.HEAD_AWAY_SECONDS:.1f}s"}
+        events = list(heapq.merge(((t, "Sustained Gaze Deflection") for t in self.gaze_runs.recent),
+                                  ((t, "Sustained Head Turn Away") for t in self.head_runs.recent)))
+        keep = MAX_KEY_EVENTS if newest is None else min(newest, MAX_KEY_EVENTS)
+        return [{"timestamp": timestamp, "type": event_type, "details": durations[event_type]}
+                for timestamp, event_type in islice(events, max(0, len(events) - keep), None)]
+
+    def merge(self, other):
+        """
+        New monitor for this monitor's frames followed by other's, as if one
+        monitor had seen them all: totals, sustained events and the timeline
+        combine exactly. The live score and status come from other, the later
+        partial; metrics (process-local instrumentation) start fresh. Raises
+        ValueError if the two were configured with different thresholds.
+        """
+        if self.thresholds() != other.thresholds():
+            raise ValueError(f"Cannot merge monitors with different thresholds: {self.thresholds()} vs {other.thresholds()}")
+        if (self.last_frame_time is not None and other.first_frame_time is not None
+                and other.first_frame_time < self.last_frame_time):
+            raise ValueError("Monitors must be merged in time order")
+        later = self if other.first_frame_time is None else other
+        merged = CheatingMonitor()
+        (merged.GAZE_DEFLECTION_SECONDS, merged.HEAD_AWAY_SECONDS, merged.RUN_GAP_SECONDS, merged.YAW_THRESHOLD,
+         merged.PITCH_THRESHOLD_LOOKING_AWAY, merged.SUSPICION_THRESHOLD_SCORE) = self.thresholds()
+        merged.gaze_runs = self.gaze_runs.merge(other.gaze_runs)
+        merged.head_runs = self.head_runs.merge(other.head_runs)
+        merged.timeline = self.timeline.merge(other.timeline)
+        merged.signal = self.signal.merge(other.signal)
+        merged.total_frames_processed = self.total_frames_processed + other.total_frames_processed
+        merged.gaze_deflected_total_frames = self.gaze_deflected_total_frames + other.gaze_deflected_total_frames
+        merged.head_turned_total_frames = self.head_turned_total_frames + other.head_turned_total_frames
+        merged.first_frame_time = self.first_frame_time if self.first_frame_time is not None else other.first_frame_time
+        merged.last_frame_time = later.last_frame_time
+        merged._score, merged._score_time, merged.status_text = later._score, later._score_time, later.status_text
+        return merged
 
-    def get_final_conclusion(self):
-        analysis_duration_seconds = time.time() - self.analysis_start_time
+    def serialize(self):
+        """The monitor's state as bytes (an .npz archive: JSON scalars plus the timeline arrays); see restore()."""
+        state = {
+            "version": MONITOR_STATE_VERSION,
+            "thresholds": self.thresholds(),
+            "total_frames_processed": self.total_frames_processed,
+            "gaze_deflected_total_frames": self.gaze_deflected_total_frames,
+            "head_turned_total_frames": self.head_turned_total_frames,
+            "first_frame_time": self.first_frame_time,
+            "last_frame_time": self.last_frame_time,
+            "score": self._score,
+            "score_time": self._score_time,
+            "status_text": self.status_text,
+            "gaze_runs": self.gaze_runs.to_state(),
+            "head_runs": self.head_runs.to_state(),
+            "signal_dropped": self.signal.dropped,
+        }
+        frames, archive, meta = self.timeline.to_arrays()
+        buffer = io.BytesIO()
+        np.savez(buffer, state=np.frombuffer(json.dumps(state).encode(), dtype=np.uint8),
+                 frames=frames, archive=archive, timeline_meta=meta, signal=self.signal.rows())
+        return buffer.getvalue()
+
+    @classmethod
+    def restore(cls, data, metrics=None):
+        """A monitor from serialize() output (in any process). Raises ValueError for other versions or bad data."""
+        try:
+            with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+                state = json.loads(archive["state"].tobytes())
+                timeline = analysis_timeline.EventTimeline.from_arrays(archive["frames"], archive["archive"],
+                                                                       archive["timeline_meta"])
+                signal = archive["signal"]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e: # JSONDecodeError is a ValueError
+            raise ValueError(f"Not a serialized CheatingMonitor: {e}") from e
+        if state.get("version") != MONITOR_STATE_VERSION:
+            raise ValueError(f"Unsupported CheatingMonitor state version {state.get('version')}")
+        monitor = cls(metrics)
+        (monitor.GAZE_DEFLECTION_SECONDS, monitor.HEAD_AWAY_SECONDS, monitor.RUN_GAP_SECONDS, monitor.YAW_THRESHOLD,
+         monitor.PITCH_THRESHOLD_LOOKING_AWAY, monitor.SUSPICION_THRESHOLD_SCORE) = state["thresholds"]
+        monitor.gaze_runs = SustainedRunTracker.from_state(state["gaze_runs"], monitor.GAZE_DEFLECTION_SECONDS,
+                                                           monitor.RUN_GAP_SECONDS)
+        monitor.head_runs = SustainedRunTracker.from_state(state["head_runs"], monitor.HEAD_AWAY_SECONDS,
+                                                           monitor.RUN_GAP_SECONDS)
+        monitor.timeline = timeline
+        monitor.signal = analysis_timeline.FrameSignal.from_rows(signal, state["signal_dropped"])
+        monitor.total_frames_processed = state["total_frames_processed"]
+        monitor.gaze_deflected_total_frames = state["gaze_deflected_total_frames"]
+        monitor.head_turned_total_frames = state["head_turned_total_frames"]
+        monitor.first_frame_time = state["first_frame_time"]
+        monitor.last_frame_time = state["last_frame_time"]
+        monitor._score, monitor._score_time = state["score"], state["score_time"]
+        monitor.status_text = state["status_text"]
+        return monitor
+
+    def get_final_conclusion(self, now=None):
+        """now: end of the analyzed span (e.g. the end of a video); defaults to the last frame's time."""
+        end_time = self.last_frame_time if now is None else now
+        analysis_duration_seconds = end_time - self.first_frame_time if self.first_frame_time is not None else 0.0
         
         # --- FPS Calculation ---
         fps_analyzed = 0
         if analysis_duration_seconds > 0 and self.total_frames_processed > 0:
             fps_analyzed = round(self.total_frames_processed / analysis_duration_seconds, 2)
         
-        # --- Suspicion Score Calculation (as before) ---
-        calculated_suspicion_score = 0
-        if self.total_frames_processed > 0:
-            MAX_POINTS_GAZE_SUSPICION = 50
-            MAX_POINTS_HEAD_SUSPICION = 50
-            gaze_ratio = self.gaze_deflected_total_frames / self.total_frames_processed
-            head_turn_ratio = self.head_turned_total_frames / self.total_frames_processed
-            gaze_score_component = gaze_ratio * MAX_POINTS_GAZE_SUSPICION
-            head_score_component = head_turn_ratio * MAX_POINTS_HEAD_SUSPICION
-            calculated_suspicion_score = min(100, round(gaze_score_component + head_score_component))
-        else:
-            calculated_suspicion_score = 0
-
-        # --- Trust Score Calculation ---
-        trust_score = 0
-        if self.total_frames_processed > 0:
-            MAX_DEDUCTION_GAZE_TRUST = 50
-            MAX_DEDUCTION_HEAD_TRUST = 50
-            # Ratios are the same as for suspicion score
-            gaze_penalty = gaze_ratio * MAX_DEDUCTION_GAZE_TRUST
-            head_penalty = head_turn_ratio * MAX_DEDUCTION_HEAD_TRUST
-            trust_score = max(0, round(100 - gaze_penalty - head_penalty))
-        elif analysis_duration_seconds > 0 : # No frames, but analysis ran (e.g. black screen) - lowest trust
-            trust_score = 0
-        else: # No frames and no duration (should not happen if analysis started)
-            trust_score = 100 # Or some other default for an edge case
-
-        # --- Determine Final Status Text based on the calculated_suspicion_score ---
-        HIGH_CONCERN_THRESHOLD_FINAL = 70
-        MODERATE_CONCERN_THRESHOLD_FINAL = 35
-
-        final_status_text = "Analysis Complete." # Default
-        if calculated_suspicion_score > HIGH_CONCERN_THRESHOLD_FINAL:
-            final_status_text = f"High Concern (Suspicion: {calculated_suspicion_score})."
-        elif calculated_suspicion_score > MODERATE_CONCERN_THRESHOLD_FINAL:
-            final_status_text = f"Moderate Concern (Suspicion: {calculated_suspicion_score})."
-        elif self.gaze_deflected_total_frames > 0 or self.head_turned_total_frames > 0:
-            final_status_text = f"Low Concern (Suspicion: {calculated_suspicion_score}). Some deviations noted."
-        else:
-            final_status_text = f"Low Concern (Suspicion: {calculated_suspicion_score}). No significant deviations."
+        # --- Suspicion and Trust Scores, and the Final Status Text ---
+        policy = self.policy()
+        suspicion, trust = final_scores([self.total_frames_processed], [self.gaze_deflected_total_frames],
+                                        [self.head_turned_total_frames], [analysis_duration_seconds], policy)
+        calculated_suspicion_score, trust_score = int(suspicion[0]), int(trust[0])
+        final_status_text = concern_status_text(
+            calculated_suspicion_score, self.gaze_deflected_total_frames > 0 or self.head_turned_total_frames > 0, policy)
 
         return {
             "status_text": final_status_text,
@@ -282,69 +891,470 @@ class CheatingMonitor:
                 "fps_analyzed": fps_analyzed, # Added FPS
                 "gaze_deflection_count": self.gaze_deflected_total_frames,
                 "head_turn_count": self.head_turned_total_frames,
-                "key_events_triggered": self.event_history
+                "key_events_triggered": self.key_events(),
+                "key_events_total": self.events_total(),
+                "timeline": self.timeline.summary(),
+                "timeline_bucket_seconds": analysis_timeline.TIMELINE_SUMMARY_SECONDS,
+                "policy": policy,
+                "signal_dropped_frames": self.signal.dropped, # Frames past ANALYSIS_SIGNAL_MAX_FRAMES, not re-scorable
+                "motion_gate": self.metrics.motion_gate_summary(),
+                "stage_latency_ms": self.metrics.stages.summary()
             }
         }
 
-# --- 3. Main processing function for a single frame ---
-def analyze_frame(frame, monitor_instance):
+# --- 3. Face tracking (per-session vision state) ---
+def _landmark_bbox(landmarks):
+    left, top = landmarks.min(axis=0)
+    right, bottom = landmarks.max(axis=0)
+    return float(left), float(top), float(right), float(bottom)
+
+def _rect_iou(a, b):
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+class FaceTracker:
     """
-    Processes a single frame to detect face, landmarks, gaze, head pose,
-    and updates the CheatingMonitor.
-    Returns the annotated frame and the status text.
+    Follows one candidate's face between detections.
+    After a detection, the next frame's face rect is predicted from the current
+    landmarks (keeping the detector-rect/landmark-bbox relation seen at detection
+    time, so the shape predictor gets a rect it is used to). Confidence is the IoU
+    between the predicted rect and the one the new landmarks imply; when it drops,
+    or every detect_every_n frames, the detector runs again, first only on the
+    previous face area expanded by search_margin.
     """
-    if not models_loaded:
-        if not load_models(): # Try to load them if not already
-            return frame, "Error: Models not loaded."
-
-    frame_copy_for_processing = frame.copy()
-    gray = cv2.cvtColor(frame_copy_for_processing, cv2.COLOR_BGR2GRAY)
-    
-    faces_dlib = dlib_face_detector(gray)
-    
-    gaze_direction = "N/A"
-    head_yaw, head_pitch = None, None
-    analysis_data = {
+    def __init__(self, detect_every_n=DETECT_EVERY_N_FRAMES, search_margin=TRACKING_SEARCH_MARGIN,
+                 min_confidence=TRACKING_MIN_CONFIDENCE):
+        self.detect_every_n = detect_every_n
+        self.search_margin = search_margin
+        self.min_confidence = min_confidence
+        self.rect = None # Detector-style rect (left, top, right, bottom) expected in the next frame
+        self._rect_from_bbox = None # Detector rect edges relative to the landmark bbox at detection time
+        self.frames_since_detection = 0
+        self.confidence = 0.0
+        # Stats
+        self.frames = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+        self.tracked_frames = 0
+        self.low_confidence_redetections = 0
+
+    def needs_detection(self):
+        return self.rect is None or self.frames_since_detection >= self.detect_every_n
+
+    def search_region(self, frame_shape):
+        """Previous face rect expanded by search_margin and clipped to the frame, or None."""
+        if self.rect is None:
+            return None
+        left, top, right, bottom = self.rect
+        pad_x = (right - left) * self.search_margin
+        pad_y = (bottom - top) * self.search_margin
+        return (max(0, int(left - pad_x)), max(0, int(top - pad_y)),
+                min(frame_shape[1], int(right + pad_x)), min(frame_shape[0], int(bottom + pad_y)))
+
+    def _predict_rect(self, landmarks):
+        left, top, right, bottom = _landmark_bbox(landmarks)
+        width, height = max(right - left, 1.0), max(bottom - top, 1.0)
+        dl, dt, dr, db = self._rect_from_bbox
+        return (int(round(left + dl * width)), int(round(top + dt * height)),
+                int(round(right + dr * width)), int(round(bottom + db * height)))
+
+    def on_detection(self, rect, landmarks):
+        """Re-anchors the tracker on a fresh detector rect and its landmarks."""
+        left, top, right, bottom = _landmark_bbox(landmarks)
+        width, height = max(right - left, 1.0), max(bottom - top, 1.0)
+        self._rect_from_bbox = ((rect[0] - left) / width, (rect[1] - top) / height,
+                                (rect[2] - right) / width, (rect[3] - bottom) / height)
+        self.rect = rect
+        self.frames_since_detection = 0
+        self.confidence = 1.0
+
+    def on_tracked(self, landmarks):
+        """Updates the prediction from landmarks found inside self.rect; returns the tracking confidence."""
+        predicted = self._predict_rect(landmarks)
+        self.confidence = _rect_iou(self.rect, predicted)
+        self.rect = predicted
+        self.frames_since_detection += 1
+        return self.confidence
+
+    def lost(self):
+        self.rect = None
+        self.confidence = 0.0
+
+    def stats(self):
+        detections = self.full_detections + self.roi_detections
+        return {
+            "frames": self.frames,
+            "full_detections": self.full_detections,
+            "roi_detections": self.roi_detections,
+            "tracked_frames": self.tracked_frames,
+            "low_confidence_redetections": self.low_confidence_redetections,
+            "redetection_ratio": round(detections / self.frames, 3) if self.frames else 0.0,
+        }
+
+class MotionGate:
+    """
+    Cheap change detector ahead of the vision stages. Keeps a tiny luma
+    thumbnail of the last fully analyzed frame, taken over its face area when
+    it had a face (so eye movement is not averaged away by the background),
+    plus that frame's features. A frame whose thumbnail of the same area is
+    within the thresholds is answered with those features instead; after
+    max_reuse such frames in a row the next one is analyzed regardless.
+    """
+    def __init__(self, mean_diff=MOTION_GATE_MEAN_DIFF, max_diff=MOTION_GATE_MAX_DIFF, max_reuse=MOTION_GATE_MAX_REUSE):
+        self.mean_diff = mean_diff
+        self.max_diff = max_diff
+        self.max_reuse = max_reuse
+        self._shape = None
+        self._region = None # (left, top, right, bottom) the thumbnail covers
+        self._thumbnail = None
+        self._features = None
+        self._reused_in_row = 0
+        # Stats
+        self.frames = 0
+        self.reused = 0
+
+    @staticmethod
+    def _make_thumbnail(frame, region):
+        left, top, right, bottom = region
+        return _to_gray(cv2.resize(frame[top:bottom, left:right], MOTION_GATE_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA))
+
+    def check(self, frame):
+        """A copy of the reference frame's features if frame is effectively unchanged, else None."""
+        self.frames += 1
+        if self._features is None or self._reused_in_row >= self.max_reuse or frame.shape != self._shape:
+            return None
+        diff = cv2.absdiff(self._make_thumbnail(frame, self._region), self._thumbnail)
+        if diff.max() > self.max_diff or diff.mean() > self.mean_diff:
+            return None
+        self._reused_in_row += 1
+        self.reused += 1
+        return dict(self._features)
+
+    def update(self, frame, features):
+        """Makes frame, just fully analyzed into features, the reference."""
+        self._reused_in_row = 0
+        if "error" in features:
+            self._features = None
+            return
+        height, width = frame.shape[:2]
+        region = (0, 0, width, height)
+        if features["face_rect"] is not None:
+            left, top, right, bottom = features["face_rect"]
+            pad_x = int((right - left) * LANDMARK_ROI_MARGIN)
+            pad_y = int((bottom - top) * LANDMARK_ROI_MARGIN)
+            face_region = (max(0, left - pad_x), max(0, top - pad_y), min(width, right + pad_x), min(height, bottom + pad_y))
+            if face_region[2] > face_region[0] and face_region[3] > face_region[1]:
+                region = face_region
+        self._shape = frame.shape
+        self._region = region
+        self._thumbnail = self._make_thumbnail(frame, region)
+        self._features = {key: value for key, value in features.items() if key != "stage_ms"}
+
+    def stats(self):
+        return {"frames": self.frames, "reused": self.reused,
+                "skip_ratio": round(self.reused / self.frames, 3) if self.frames else 0.0}
+
+class VisionSession:
+    """Vision state one analyzed candidate carries from frame to frame."""
+    def __init__(self, tracking=FACE_TRACKING_ENABLED, detect_every_n=DETECT_EVERY_N_FRAMES,
+                 motion_gate=MOTION_GATE_ENABLED):
+        self.tracker = FaceTracker(detect_every_n=detect_every_n) if tracking else None
+        self.pose_solver = HeadPoseSolver()
+        self.motion_gate = MotionGate() if motion_gate else None
+
+    def stats(self):
+        return {"tracking": self.tracker.stats() if self.tracker else None,
+                "motion_gate": self.motion_gate.stats() if self.motion_gate else None}
+
+def detection_scale(frame_shape, max_side=None, scale=None):
+    """Factor the frame is shrunk by before detection (1.0 = native resolution)."""
+    scale = DETECTION_SCALE if scale is None else scale
+    if scale:
+        return min(1.0, scale)
+    max_side = DETECTION_MAX_SIDE if max_side is None else max_side
+    if max_side:
+        return min(1.0, max_side / max(frame_shape[0], frame_shape[1]))
+    return 1.0
+
+def _to_gray(image):
+    """Gray (luma) input passes straight through (made contiguous for dlib); BGR is converted."""
+    if image.ndim == 2:
+        return np.ascontiguousarray(image)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def _run_detector(image, scale, timer=analysis_metrics.NULL_STAGE_TIMER):
+    """Detects on a downscaled grayscale copy of image. Returns the first face in image coordinates or None."""
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    gray = _to_gray(image) # Gray only at detection size
+    timer.mark("detect_preprocess")
+    faces = dlib_face_detector(gray)
+    timer.mark("detect")
+    if len(faces) == 0:
+        return None
+    face = faces[0]
+    return (int(face.left() / scale), int(face.top() / scale),
+            int(face.right() / scale), int(face.bottom() / scale))
+
+def _detect_face(frame, scale, tracker=None, timer=analysis_metrics.NULL_STAGE_TIMER):
+    """Runs the detector, on the tracker's search region first when there is one. Returns (l, t, r, b) or None."""
+    region = tracker.search_region(frame.shape) if tracker is not None else None
+    if region is not None:
+        left, top, right, bottom = region
+        tracker.roi_detections += 1
+        face = _run_detector(frame[top:bottom, left:right], scale, timer)
+        if face is not None:
+            return (face[0] + left, face[1] + top, face[2] + left, face[3] + top)
+    if tracker is not None:
+        tracker.full_detections += 1
+    return _run_detector(frame, scale, timer)
+
+def _landmarks_in_roi(frame, face_rect, timer=analysis_metrics.NULL_STAGE_TIMER):
+    """Takes only the area around face_rect (to gray if BGR) and runs the shape predictor there at native resolution."""
+    left, top, right, bottom = face_rect
+    pad_x = int((right - left) * LANDMARK_ROI_MARGIN)
+    pad_y = int((bottom - top) * LANDMARK_ROI_MARGIN)
+    x0, y0 = max(0, left - pad_x), max(0, top - pad_y)
+    x1, y1 = min(frame.shape[1], right + pad_x), min(frame.shape[0], bottom + pad_y)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    roi_gray = _to_gray(frame[y0:y1, x0:x1])
+    timer.mark("landmark_preprocess")
+    landmarks = get_landmarks(roi_gray, dlib.rectangle(left - x0, top - y0, right - x0, bottom - y0))
+    timer.mark("landmarks")
+    if landmarks is None:
+        return None
+    landmarks += (x0, y0) # Back to frame coordinates
+    return landmarks
+
+# --- 4. Vision stage (no monitor state, safe to run on a worker thread or process) ---
+def extract_features(frame, vision_session=None, with_pose=True):
+    """
+    Runs face detection (or tracking), landmarks, gaze and head pose on a frame:
+    either 2-D luma (e.g. a view of the decoder's Y plane, used as is) or BGR.
+    With with_pose=False it stops after landmarks, leaving gaze and pose to
+    finish_features_batch (the batched scheduler).
+    Detection runs on a downscaled copy; for BGR input only the face ROI is
+    converted to gray at native resolution for the shape predictor.
+    Does not touch any CheatingMonitor, so it can run off the event loop; the only
+    state it updates is the optional per-session VisionSession.
+    Returns a plain dict that can be pickled back from a worker process; its
+    "stage_ms" entry holds per-stage timings when stage profiling is enabled.
+    When the session's MotionGate finds the frame unchanged, the previous
+    frame's features are returned instead, marked "reused".
+    """
+    timer = analysis_metrics.new_stage_timer()
+    features = {
         "face_detected": False,
-        "gaze": gaze_direction,
+        "face_rect": None, # (left, top, right, bottom)
+        "landmarks": None,
+        "gaze": "N/A",
         "head_yaw": None,
         "head_pitch": None,
         "head_roll": None,
-        "status_text": "No face detected"
     }
+    if not models_loaded:
+        if not load_models(): # Try to load them if not already
+            features["error"] = "Error: Models not loaded."
+            return features
 
-    if len(faces_dlib) > 0:
-        face = faces_dlib[0]
-        cv2.rectangle(frame, (face.left(), face.top()), (face.right(), face.bottom()), (0, 255, 0), 2)
-        
-        landmarks = get_landmarks(gray, face)
+    gate = vision_session.motion_gate if vision_session is not None else None
+    if gate is not None:
+        reused = gate.check(frame)
+        timer.mark("motion_gate")
+        if reused is not None:
+            reused["reused"] = True
+            reused["stage_ms"] = timer.stages
+            return reused
+
+    tracker = vision_session.tracker if vision_session is not None else None
+    face_rect, landmarks = None, None
+
+    if tracker is not None:
+        tracker.frames += 1
+        if not tracker.needs_detection():
+            face_rect = tracker.rect
+            landmarks = _landmarks_in_roi(frame, face_rect, timer)
+            if landmarks is not None and tracker.on_tracked(landmarks) >= tracker.min_confidence:
+                tracker.tracked_frames += 1
+            else:
+                tracker.low_confidence_redetections += 1
+                face_rect, landmarks = None, None
+
+    if face_rect is None:
+        face_rect = _detect_face(frame, detection_scale(frame.shape), tracker, timer)
+        if face_rect is not None:
+            landmarks = _landmarks_in_roi(frame, face_rect, timer)
+        if tracker is not None:
+            if landmarks is not None:
+                tracker.on_detection(face_rect, landmarks)
+            else:
+                tracker.lost()
+                vision_session.pose_solver.reset() # The next face may be someone else / elsewhere
+
+    if face_rect is not None:
+        features["face_rect"] = face_rect
+        if landmarks is not None:
+            features["face_detected"] = True
+            features["landmarks"] = landmarks
+            features["frame_shape"] = frame.shape
+            if with_pose:
+                features["gaze"] = estimate_gaze_direction_rudimentary(landmarks, frame.shape[1])
+                timer.mark("gaze")
+                if vision_session is not None:
+                    yaw, pitch, roll = vision_session.pose_solver.solve(landmarks, frame.shape)
+                else:
+                    yaw, pitch, roll = get_head_pose_angles_solvepnp(landmarks, frame.shape)
+                timer.mark("pose")
+                features["head_yaw"] = yaw
+                features["head_pitch"] = pitch
+                features["head_roll"] = roll
+    if gate is not None:
+        gate.update(frame, features)
+        timer.mark("motion_gate")
+    features["stage_ms"] = timer.stages
+    return features
+
+def extract_features_remote(frame, vision_session, with_pose=True):
+    """extract_features for process workers: the updated VisionSession travels back with the result."""
+    return extract_features(frame, vision_session, with_pose), vision_session
+
+def finish_features_batch(features_list, pose_solvers):
+    """
+    Fills gaze and head pose for features produced with with_pose=False, for
+    many sessions at once. pose_solvers holds each entry's HeadPoseSolver.
+    """
+    pending = [i for i, f in enumerate(features_list) if f.get("face_detected")]
+    if not pending:
+        return features_list
+    timer = analysis_metrics.new_stage_timer()
+    landmarks_list = [features_list[i]["landmarks"] for i in pending]
+    gazes = estimate_gaze_directions_batch(np.stack(landmarks_list))
+    timer.mark("gaze")
+    poses = estimate_head_poses_batch(landmarks_list, [features_list[i]["frame_shape"] for i in pending],
+                                      [pose_solvers[i] for i in pending])
+    timer.mark("pose")
+    for i, gaze, (yaw, pitch, roll) in zip(pending, gazes, poses):
+        features = features_list[i]
+        if timer.stages is not None and features.get("stage_ms") is not None: # Batch cost split evenly
+            for stage, ms in timer.stages.items():
+                features["stage_ms"][stage] = ms / len(pending)
+        features["gaze"] = gaze
+        features["head_yaw"] = yaw
+        features["head_pitch"] = pitch
+        features["head_roll"] = roll
+    return features_list
+
+def warm_up_models():
+    """
+    Pushes one synthetic frame through detection, the shape predictor, gaze and
+    head pose so the first candidate frame does not pay one-time costs (first
+    call allocations, lazy OpenCV initialization, cold caches).
+    """
+    started = time.perf_counter()
+    height, width = WARM_UP_FRAME_SHAPE[:2]
+    frame = np.full(WARM_UP_FRAME_SHAPE, 120, dtype=np.uint8)
+    center, axes = (width // 2, height // 2), (width // 8, height // 5)
+    cv2.ellipse(frame, center, axes, 0, 0, 360, 180, -1) # Rough face-like blob
+    try:
+        extract_features(frame, VisionSession())
+        # A blob rarely passes the detector, so run the predictor and pose on a fixed rect too
+        rect = dlib.rectangle(center[0] - axes[0], center[1] - axes[1], center[0] + axes[0], center[1] + axes[1])
+        landmarks = get_landmarks(frame, rect)
         if landmarks is not None:
-            analysis_data["face_detected"] = True
-            for (x, y) in landmarks:
-                cv2.circle(frame, (x, y), 1, (0, 0, 255), -1)
-
-            gaze_direction = estimate_gaze_direction_rudimentary(landmarks, frame.shape[1])
-            yaw, pitch, roll = get_head_pose_angles_solvepnp(landmarks, frame.shape)
-            
-            analysis_data["gaze"] = gaze_direction
-            analysis_data["head_yaw"] = yaw
-            analysis_data["head_pitch"] = pitch
-            analysis_data["head_roll"] = roll
-            head_yaw, head_pitch = yaw, pitch # For monitor
-
-            monitor_instance.update_metrics(gaze_direction, head_yaw, head_pitch)
-            
-            if yaw is not None:
-                 cv2.putText(frame, f"Head Yaw: {yaw:.1f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 1)
-            if pitch is not None:
-                 cv2.putText(frame, f"Head Pitch: {pitch:.1f}", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 1)
-
-    status_text = monitor_instance.assess_status()
-    analysis_data["status_text"] = status_text
-    cv2.putText(frame, f"Gaze: {gaze_direction}", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 1)
+            estimate_gaze_direction_rudimentary(landmarks, width)
+            HeadPoseSolver().solve(landmarks, frame.shape)
+    except Exception as e:
+        print(f"Warning: model warm-up failed in interview_analyzer_module: {e}")
+    model_registry.warm_up_ms = round((time.perf_counter() - started) * 1000.0, 1)
+    return model_registry.warm_up_ms
+
+def init_worker():
+    """Initializer for analysis worker processes: load and warm up the models once per worker."""
+    load_models(warm_up=True)
+
+# --- 5. Monitor stage (per-session state, cheap, runs on the caller) ---
+def apply_features(features, monitor_instance, timestamp=None):
+    """
+    Feeds features from extract_features into the session's CheatingMonitor
+    (timestamp: the frame's time, if not now). Returns the structured analysis_data for the frame.
+    """
+    analysis_data = {
+        "face_detected": features["face_detected"],
+        "gaze": features["gaze"],
+        "head_yaw": features["head_yaw"],
+        "head_pitch": features["head_pitch"],
+        "head_roll": features["head_roll"],
+        "status_text": "No face detected"
+    }
+    if "error" in features:
+        analysis_data["status_text"] = features["error"]
+        return analysis_data
+
+    stage_ms = features.get("stage_ms")
+    monitor_started = time.perf_counter() if stage_ms is not None else None
+    timestamp = time.time() if timestamp is None else timestamp # Reused features still count at this frame's time
+    monitor_instance.metrics.observe_analyzed(features.get("reused", False))
+    if features["face_detected"]:
+        monitor_instance.update_metrics(features["gaze"], features["head_yaw"], features["head_pitch"],
+                                        features["head_roll"], timestamp)
+    else:
+        monitor_instance.observe_time(timestamp)
+
+    analysis_data["status_text"] = monitor_instance.status_text = monitor_instance.assess_status()
+    if stage_ms is not None:
+        stage_ms["monitor"] = (time.perf_counter() - monitor_started) * 1000.0
+        monitor_instance.metrics.observe_stages(stage_ms)
+    return analysis_data
+
+# --- 6. Main processing functions for a single frame ---
+def analyze_frame_headless(frame, monitor_instance, vision_session=None):
+    """
+    Analysis-only API for the server hot path: updates the CheatingMonitor and
+    returns the structured analysis_data. Never copies or draws on the frame.
+    """
+    return apply_features(extract_features(frame, vision_session), monitor_instance)
+
+def render_annotations(frame, features, analysis_data):
+    """
+    Opt-in debug rendering: draws the face rect, landmarks, pose and status onto
+    frame in place (standalone webcam loop or a debug preview only).
+    """
+    if features["face_rect"] is not None:
+        left, top, right, bottom = features["face_rect"]
+        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+    if features["landmarks"] is not None:
+        for (x, y) in features["landmarks"]:
+            cv2.circle(frame, (int(x), int(y)), 1, (0, 0, 255), -1)
+    yaw, pitch = features["head_yaw"], features["head_pitch"]
+    if yaw is not None:
+         cv2.putText(frame, f"Head Yaw: {yaw:.1f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 1)
+    if pitch is not None:
+         cv2.putText(frame, f"Head Pitch: {pitch:.1f}", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 1)
+
+    status_text = analysis_data["status_text"]
+    cv2.putText(frame, f"Gaze: {features['gaze']}", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 1)
     cv2.putText(frame, f"Status: {status_text}", (10, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-    
-    return frame, analysis_data # Return annotated frame and structured data
+    return frame
+
+def analyze_frame(frame, monitor_instance, vision_session=None):
+    """
+    Processes a single frame to detect face, landmarks, gaze, head pose,
+    and updates the CheatingMonitor, then annotates the frame in place (so it
+    takes BGR; the headless paths also accept luma).
+    Returns the annotated frame and the structured data. Server code should use
+    analyze_frame_headless (or extract_features + apply_features) instead.
+    """
+    features = extract_features(frame, vision_session)
+    if "error" in features:
+        return frame, features["error"]
+    analysis_data = apply_features(features, monitor_instance)
+    return render_annotations(frame, features, analysis_data), analysis_data # Return annotated frame and structured data
 
 
 # --- Main execution for standalone testing ---
@@ -359,6 +1369,7 @@ if __name__ == '__main__':
         exit()
 
     monitor = CheatingMonitor()
+    vision_session = VisionSession()
     print("Starting standalone webcam analysis. Press 'q' to quit.")
 
     while True:
@@ -367,7 +1378,7 @@ if __name__ == '__main__':
             print("Error: Can't receive frame. Exiting.")
             break
 
-        annotated_frame, _ = analyze_frame(frame, monitor) # We get structured data too if needed
+        annotated_frame, _ = analyze_frame(frame, monitor, vision_session) # We get structured data too if needed
         
         cv2.imshow('Interview Monitor (Standalone Test - Press Q to quit)', annotated_frame)
 
@@ -376,4 +1387,4 @@ if __name__ == '__main__':
 
     cap.release()
     cv2.destroyAllWindows()
-    print("Standalone analysis stopped.") 
\ No newline at end of file
+    print(f"Standalone analysis stopped. Vision stats: {vision_session.stats()}") 
\ No newline at end of file
@@ -0,0 +1,181 @@
+# backend/offline_analysis.py
+# CheatingMonitor verdicts for recorded interviews. The video is split into
+# time chunks that are decoded and analyzed in parallel worker processes; each
+# chunk feeds its own CheatingMonitor (in video time) and returns it serialized,
+# and the partial monitors are merged in order, so the verdict is the same as
+# for a sequential pass while the vision work scales with cores.
+#
+# Usage (from backend/):
+#   python offline_analysis.py interview.mp4 --workers 8 --output report.json
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import cv2
+
+import analysis_workers
+import interview_analyzer_module
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+OFFLINE_ANALYSIS_FPS = float(os.environ.get("OFFLINE_ANALYSIS_FPS", "10")) # Frames analyzed per second of video
+OFFLINE_CHUNK_SECONDS = float(os.environ.get("OFFLINE_CHUNK_SECONDS", "60")) # Video time per worker task
+OFFLINE_WARM_UP_SECONDS = float(os.environ.get("OFFLINE_WARM_UP_SECONDS", "2")) # Pre-roll analyzed only to seed tracking
+OFFLINE_WORKERS = int(os.environ.get("OFFLINE_WORKERS", "0")) or (os.cpu_count() or 1) # Upper bound; the server also caps it by spare capacity
+OFFLINE_MAX_UPLOAD_MB = float(os.environ.get("OFFLINE_MAX_UPLOAD_MB", "2048")) # Largest recording the server accepts
+
+
+def probe(path):
+    """(fps, duration_seconds) of a video file; raises ValueError if it cannot be opened."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+    cap.release()
+    return fps, (frames / fps if fps > 0 else 0.0)
+
+
+def plan_chunks(duration, chunk_seconds=OFFLINE_CHUNK_SECONDS):
+    """[(start, end)] covering the video; the last chunk is open-ended so nothing past a short duration is lost."""
+    count = max(1, math.ceil(duration / chunk_seconds)) if duration > 0 else 1
+    return [(i * chunk_seconds, (i + 1) * chunk_seconds if i < count - 1 else math.inf) for i in range(count)]
+
+
+def analyze_chunk(path, start, end, sample_fps=OFFLINE_ANALYSIS_FPS, warm_up_seconds=OFFLINE_WARM_UP_SECONDS):
+    """
+    Worker task: analyzes the frames of [start, end) at sample_fps into a
+    CheatingMonitor timed in video seconds and returns (monitor.serialize(),
+    stats). Analysis starts warm_up_seconds before start, and
+    those frames are only used to seed face tracking and the pose solver, so
+    the first frames of a chunk behave like the middle of a session. The
+    chunk's results go through the monitor in one update_metrics_batch call.
+    """
+    interview_analyzer_module.load_models(warm_up=True) # No-op once the worker has them
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video {path}")
+    seek_to = max(0.0, start - warm_up_seconds)
+    if seek_to > 0:
+        cap.set(cv2.CAP_PROP_POS_MSEC, seek_to * 1000.0)
+    vision_session = interview_analyzer_module.VisionSession()
+    monitor = interview_analyzer_module.CheatingMonitor()
+    interval = 1.0 / sample_fps
+    next_due = seek_to
+    decoded = analyzed = frames = 0
+    gaze_codes = {label: code for code, label in enumerate(interview_analyzer_module.GAZE_LABELS.tolist())}
+    frame_times, face_rows = [], [] # face_rows: (t, gaze code, yaw, pitch, roll), NaN without a pose
+    started = time.perf_counter()
+    while cap.grab(): # Decode without the BGR conversion; only sampled frames are retrieved
+        t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        decoded += 1
+        if t >= end:
+            break
+        if t + 1e-6 < next_due:
+            continue
+        next_due = max(next_due + interval, t) # Sample by video time, whatever the source frame rate
+        ok, frame = cap.retrieve()
+        if not ok:
+            break
+        features = interview_analyzer_module.extract_features(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), vision_session)
+        analyzed += 1
+        if t < start:
+            continue # Warm-up only
+        frames += 1
+        if "error" in features:
+            continue
+        frame_times.append(t)
+        if features["face_detected"]:
+            has_pose = features["head_yaw"] is not None and features["head_pitch"] is not None
+            roll = features["head_roll"] if has_pose and features["head_roll"] is not None else math.nan
+            face_rows.append((t, gaze_codes.get(features["gaze"], -1), features["head_yaw"] if has_pose else math.nan,
+                              features["head_pitch"] if has_pose else math.nan, roll))
+    cap.release()
+    if frame_times:
+        monitor.observe_time(frame_times[0]) # Frames without a face still count towards the analyzed span
+        if face_rows:
+            monitor.update_metrics_batch(*zip(*face_rows))
+        monitor.observe_time(frame_times[-1])
+        monitor.status_text = monitor.assess_status()
+    stats = {"start": start, "decoded": decoded, "analyzed": analyzed, "frames": frames,
+             "seconds": round(time.perf_counter() - started, 3), "vision": vision_session.stats()}
+    return monitor.serialize(), stats
+
+
+def analyze_video(path, workers=OFFLINE_WORKERS, chunk_seconds=OFFLINE_CHUNK_SECONDS, sample_fps=OFFLINE_ANALYSIS_FPS,
+                  warm_up_seconds=OFFLINE_WARM_UP_SECONDS):
+    """
+    Full offline analysis of one video file. Returns a report shaped like
+    get_final_conclusion() plus "video" and "processing" sections.
+    """
+    return analyze_video_monitor(path, workers, chunk_seconds, sample_fps, warm_up_seconds)[0]
+
+
+def analyze_video_monitor(path, workers=OFFLINE_WORKERS, chunk_seconds=OFFLINE_CHUNK_SECONDS,
+                          sample_fps=OFFLINE_ANALYSIS_FPS, warm_up_seconds=OFFLINE_WARM_UP_SECONDS):
+    """analyze_video(), also returning the merged CheatingMonitor: (report, monitor)."""
+    fps, duration = probe(path)
+    chunks = plan_chunks(duration, chunk_seconds)
+    started = time.perf_counter()
+    workers = max(1, min(workers, len(chunks)))
+    if workers == 1:
+        results = [analyze_chunk(path, start, end, sample_fps, warm_up_seconds) for start, end in chunks]
+    else:
+        # Not forked: the caller may be a thread of the multithreaded server
+        with ProcessPoolExecutor(max_workers=workers, mp_context=analysis_workers.worker_context(),
+                                 initializer=interview_analyzer_module.init_worker) as pool:
+            futures = [pool.submit(analyze_chunk, path, start, end, sample_fps, warm_up_seconds) for start, end in chunks]
+            results = [future.result() for future in futures]
+    vision_seconds = time.perf_counter() - started
+    monitor = reduce(interview_analyzer_module.CheatingMonitor.merge,
+                     [interview_analyzer_module.CheatingMonitor.restore(state) for state, _ in results])
+    frames_analyzed = sum(stats["frames"] for _, stats in results)
+    end_time = monitor.last_frame_time + 1.0 / sample_fps if monitor.last_frame_time is not None else 0.0
+    report = monitor.get_final_conclusion(now=end_time)
+    elapsed = time.perf_counter() - started
+    report["video"] = {"path": os.path.basename(path), "fps": round(fps, 3), "duration_seconds": round(duration, 2),
+                       "frames_analyzed": frames_analyzed, "sample_fps": sample_fps}
+    report["processing"] = {
+        "workers": workers,
+        "chunks": len(chunks),
+        "chunk_seconds": chunk_seconds,
+        "warm_up_seconds": warm_up_seconds,
+        "wall_seconds": round(elapsed, 2),
+        "monitor_seconds": round(elapsed - vision_seconds, 3),
+        "speedup_vs_realtime": round(duration / elapsed, 2) if elapsed > 0 else None,
+        "chunk_stats": [stats for _, stats in results],
+    }
+    return report, monitor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a recorded interview")
+    parser.add_argument("video")
+    parser.add_argument("--workers", type=int, default=OFFLINE_WORKERS)
+    parser.add_argument("--chunk-seconds", type=float, default=OFFLINE_CHUNK_SECONDS)
+    parser.add_argument("--fps", type=float, default=OFFLINE_ANALYSIS_FPS, help="Frames analyzed per second of video")
+    parser.add_argument("--warm-up-seconds", type=float, default=OFFLINE_WARM_UP_SECONDS)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    if not interview_analyzer_module.load_models():
+        sys.exit("Models failed to load.")
+    report = analyze_video(args.video, args.workers, args.chunk_seconds, args.fps, args.warm_up_seconds)
+    print(f"{report['status_text']} ({report['video']['duration_seconds']}s of video in "
+          f"{report['processing']['wall_seconds']}s, {report['processing']['workers']} workers)", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
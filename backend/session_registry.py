@@ -0,0 +1,167 @@
+# backend/session_registry.py
+# Rooms plus the reverse indexes the Socket.IO handlers need, so finding a
+# socket's room or analyses never means scanning every room. State lives in a
+# state_store store: in-process by default, Redis when several workers share it.
+from state_store import InMemoryStore
+
+
+class SessionRegistry:
+    """
+    Store layout (all hashes unless noted):
+
+    - room:{id}                   creator_sid, is_locked ("1"/"0")
+    - room:{id}:participants      sid -> name
+    - room:{id}:pending           sid -> name (admission requests)
+    - sid_room / sid_pending      sid -> room id, the reverse indexes
+    - analysis_host               target sid -> host sid that started it
+    - analysis_node               target sid -> node holding its RTCPeerConnection
+    - host_analyses:{sid} (set)   target sids a host is analyzing
+
+    Every operation costs O(1) store commands regardless of the number of rooms.
+    With a local store, each room's participant list for clients is cached and
+    rebuilt only after that room changes; a shared store is read each time,
+    since other nodes change it.
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else InMemoryStore()
+        self._snapshots = {} # {room_id: [{'id', 'name'}]}, local stores only
+
+    def _changed(self, room_id):
+        self._snapshots.pop(room_id, None)
+
+    # --- Rooms ---
+    async def get_room(self, room_id):
+        """{'creator_sid', 'is_locked'} or None."""
+        meta = await self.store.hgetall(f"room:{room_id}")
+        if not meta:
+            return None
+        return {'creator_sid': meta.get('creator_sid'), 'is_locked': meta.get('is_locked') == "1"}
+
+    async def get_or_create_room(self, room_id, creator_sid, is_locked=False):
+        """
+        Returns (room, created). Creation is atomic, so two nodes cannot both
+        create the room, and no node sees it without its is_locked flag.
+        """
+        created = await self.store.hsetnx_mapping(f"room:{room_id}", 'creator_sid', creator_sid,
+                                                  {'is_locked': "1" if is_locked else "0"})
+        if created:
+            return {'creator_sid': creator_sid, 'is_locked': is_locked}, True
+        return await self.get_room(room_id), False
+
+    async def remove_room(self, room_id):
+        """Deletes the room and every index entry pointing at it. Returns True if it existed."""
+        if not await self.store.hexists(f"room:{room_id}", 'creator_sid'):
+            return False
+        for sid in await self.store.hkeys(f"room:{room_id}:participants"):
+            if await self.store.hget("sid_room", sid) == room_id:
+                await self.store.hdel("sid_room", sid)
+        for sid in await self.store.hkeys(f"room:{room_id}:pending"):
+            if await self.store.hget("sid_pending", sid) == room_id:
+                await self.store.hdel("sid_pending", sid)
+        await self.store.delete(f"room:{room_id}", f"room:{room_id}:participants", f"room:{room_id}:pending")
+        self._changed(room_id)
+        return True
+
+    async def room_of(self, sid):
+        """Room id the sid participates in, or None."""
+        return await self.store.hget("sid_room", sid)
+
+    # --- Participants ---
+    async def participant_name(self, room_id, sid):
+        """Name of sid in room_id, or None if sid is not a participant there."""
+        return await self.store.hget(f"room:{room_id}:participants", sid)
+
+    async def participant_sids(self, room_id):
+        return await self.store.hkeys(f"room:{room_id}:participants")
+
+    async def participant_count(self, room_id):
+        return await self.store.hlen(f"room:{room_id}:participants")
+
+    async def add_participant(self, room_id, sid, name):
+        previous_room_id = await self.store.hget("sid_room", sid)
+        if previous_room_id is not None and previous_room_id != room_id: # One room per socket
+            await self.remove_participant(sid)
+        await self.store.hset(f"room:{room_id}:participants", sid, name)
+        await self.store.hset("sid_room", sid, room_id)
+        self._changed(room_id)
+
+    async def remove_participant(self, sid):
+        """Removes sid from its room. Returns (room_id, name) or (None, None); the room itself stays."""
+        room_id = await self.store.hget("sid_room", sid)
+        if room_id is None:
+            return None, None
+        await self.store.hdel("sid_room", sid)
+        name = await self.store.hget(f"room:{room_id}:participants", sid)
+        await self.store.hdel(f"room:{room_id}:participants", sid)
+        self._changed(room_id)
+        return room_id, name
+
+    async def participants_snapshot(self, room_id):
+        """[{'id', 'name'}] for clients. Do not mutate: with a local store it is shared until the room changes."""
+        snapshot = self._snapshots.get(room_id)
+        if snapshot is None:
+            participants = await self.store.hgetall(f"room:{room_id}:participants")
+            snapshot = [{'id': sid, 'name': name} for sid, name in participants.items()]
+            if not self.store.shared:
+                self._snapshots[room_id] = snapshot
+        return snapshot
+
+    # --- Admission requests ---
+    async def is_pending(self, room_id, sid):
+        return await self.store.hexists(f"room:{room_id}:pending", sid)
+
+    async def add_pending(self, room_id, sid, name):
+        await self.store.hset(f"room:{room_id}:pending", sid, name)
+        await self.store.hset("sid_pending", sid, room_id)
+
+    async def pop_pending(self, room_id, sid):
+        """Removes sid's pending request for room_id; returns {'name'} or None."""
+        name = await self.store.hget(f"room:{room_id}:pending", sid)
+        if name is None:
+            return None
+        await self.store.hdel(f"room:{room_id}:pending", sid)
+        if await self.store.hget("sid_pending", sid) == room_id:
+            await self.store.hdel("sid_pending", sid)
+        return {'name': name}
+
+    async def remove_pending(self, sid):
+        """Drops whatever join request sid still has open. Returns its room id or None."""
+        room_id = await self.store.hget("sid_pending", sid)
+        if room_id is not None:
+            await self.pop_pending(room_id, sid)
+        return room_id
+
+    # --- Analysis sessions (pinned to the node holding the peer connection) ---
+    async def claim_analysis(self, target_sid, host_sid, node_id):
+        """Registers an analysis of target_sid on node_id. False if one is already running anywhere."""
+        if not await self.store.hsetnx("analysis_host", target_sid, host_sid):
+            return False
+        await self.store.hset("analysis_node", target_sid, node_id)
+        await self.store.sadd(f"host_analyses:{host_sid}", target_sid)
+        return True
+
+    async def remove_analysis(self, target_sid):
+        """Forgets the analysis of target_sid. Returns the host sid that started it, or None."""
+        host_sid = await self.store.hget("analysis_host", target_sid)
+        await self.store.hdel("analysis_host", target_sid)
+        await self.store.hdel("analysis_node", target_sid)
+        if host_sid is not None:
+            await self.store.srem(f"host_analyses:{host_sid}", target_sid)
+        return host_sid
+
+    async def analysis_host(self, target_sid):
+        return await self.store.hget("analysis_host", target_sid)
+
+    async def analysis_node(self, target_sid):
+        return await self.store.hget("analysis_node", target_sid)
+
+    async def analyses_hosted_by(self, host_sid):
+        return list(await self.store.smembers(f"host_analyses:{host_sid}"))
+
+    async def stats(self):
+        return {
+            "participants": await self.store.hlen("sid_room"),
+            "pending_requests": await self.store.hlen("sid_pending"),
+            "analyses": await self.store.hlen("analysis_host"),
+        }
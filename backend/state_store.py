@@ -0,0 +1,205 @@
+# backend/state_store.py
+# Storage behind SessionRegistry: an in-process store (the default, one
+# uvicorn worker) or Redis shared by every worker and node, plus the pub/sub
+# channel used to forward analysis events to the node that owns a session.
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+STATE_BACKEND_URL = os.environ.get("STATE_BACKEND_URL", "memory://") # "memory://" or "redis://host:port/db"
+SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE") or (
+    STATE_BACKEND_URL if STATE_BACKEND_URL.startswith(("redis://", "rediss://")) else None)
+NODE_ID = os.environ.get("NODE_ID") or uuid.uuid4().hex[:12] # This process; analysis sessions are pinned to it
+
+
+class InMemoryStore:
+    """
+    Dict-backed store with the subset of Redis hash/set/pub-sub commands the
+    registry uses. Registries sharing one instance behave like nodes sharing a
+    Redis server, which makes it a local stand-in for multi-node tests; pass
+    shared=True there so the registries treat it like one (no local caching).
+    """
+
+    def __init__(self, shared=False):
+        self.shared = shared # False: only this process writes to it
+        self._hashes = {} # {key: {field: value}}
+        self._sets = {} # {key: set}
+        self._subscribers = {} # {channel: [asyncio.Queue]}
+
+    async def hget(self, key, field):
+        return self._hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key):
+        return dict(self._hashes.get(key, {}))
+
+    async def hkeys(self, key):
+        return list(self._hashes.get(key, ()))
+
+    async def hlen(self, key):
+        return len(self._hashes.get(key, ()))
+
+    async def hexists(self, key, field):
+        return field in self._hashes.get(key, ())
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        values = self._hashes.setdefault(key, {})
+        if field is not None:
+            values[field] = value
+        if mapping:
+            values.update(mapping)
+
+    async def hsetnx(self, key, field, value):
+        """Sets field only if it does not exist yet; True if it was set."""
+        values = self._hashes.setdefault(key, {})
+        if field in values:
+            return False
+        values[field] = value
+        return True
+
+    async def hsetnx_mapping(self, key, field, value, mapping):
+        """hsetnx that, when it sets field, also sets mapping in the same atomic step; True if set."""
+        values = self._hashes.setdefault(key, {})
+        if field in values:
+            return False
+        values[field] = value
+        values.update(mapping)
+        return True
+
+    async def hdel(self, key, *fields):
+        values = self._hashes.get(key)
+        if not values:
+            return 0
+        removed = sum(1 for field in fields if values.pop(field, None) is not None)
+        if not values:
+            del self._hashes[key]
+        return removed
+
+    async def sadd(self, key, member):
+        self._sets.setdefault(key, set()).add(member)
+
+    async def srem(self, key, member):
+        members = self._sets.get(key)
+        if members is not None:
+            members.discard(member)
+            if not members:
+                del self._sets[key]
+
+    async def smembers(self, key):
+        return set(self._sets.get(key, ()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._hashes.pop(key, None)
+            self._sets.pop(key, None)
+
+    async def publish(self, channel, message):
+        payload = json.dumps(message) # Same serialization as Redis, so non-JSON data fails here too
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(payload)
+
+    async def subscribe(self, channel):
+        """Async iterator over the messages published to channel."""
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield json.loads(await queue.get())
+        finally:
+            self._subscribers[channel].remove(queue)
+
+    async def close(self):
+        pass
+
+
+class RedisStore:
+    """The same commands on a Redis server shared by all backend processes (needs the `redis` package)."""
+    shared = True
+    # HSETNX plus more fields only if it set the guard field, atomically: KEYS[1], ARGV = field, value, f1, v1, ...
+    _HSETNX_MAPPING = """
+if redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+    return 0
+end
+if #ARGV > 2 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+end
+return 1
+"""
+
+    def __init__(self, url):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("STATE_BACKEND_URL points at Redis but the 'redis' package is not installed.") from e
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def hget(self, key, field):
+        return await self._redis.hget(key, field)
+
+    async def hgetall(self, key):
+        return await self._redis.hgetall(key)
+
+    async def hkeys(self, key):
+        return await self._redis.hkeys(key)
+
+    async def hlen(self, key):
+        return await self._redis.hlen(key)
+
+    async def hexists(self, key, field):
+        return bool(await self._redis.hexists(key, field))
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        await self._redis.hset(key, field, value, mapping=mapping)
+
+    async def hsetnx(self, key, field, value):
+        return bool(await self._redis.hsetnx(key, field, value))
+
+    async def hsetnx_mapping(self, key, field, value, mapping):
+        pairs = [item for pair in mapping.items() for item in pair]
+        return bool(await self._redis.eval(self._HSETNX_MAPPING, 1, key, field, value, *pairs))
+
+    async def hdel(self, key, *fields):
+        return await self._redis.hdel(key, *fields)
+
+    async def sadd(self, key, member):
+        await self._redis.sadd(key, member)
+
+    async def srem(self, key, member):
+        await self._redis.srem(key, member)
+
+    async def smembers(self, key):
+        return set(await self._redis.smembers(key))
+
+    async def delete(self, *keys):
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def publish(self, channel, message):
+        await self._redis.publish(channel, json.dumps(message))
+
+    async def subscribe(self, channel):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield json.loads(message["data"])
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+
+    async def close(self):
+        await self._redis.close()
+
+
+def create_store(url=STATE_BACKEND_URL):
+    if url.startswith(("redis://", "rediss://")):
+        logger.info(f"[State] Using shared Redis state store (node {NODE_ID}).")
+        return RedisStore(url)
+    if url != "memory://":
+        raise ValueError(f"Unsupported STATE_BACKEND_URL: {url}")
+    return InMemoryStore()
@@ -0,0 +1,130 @@
+# backend/tests/test_analysis_reports.py
+# AnalysisReportWriter against a local SQLite file: batched writes, reads,
+# signal round-trips, flushing on stop() and dropping on a full queue.
+#
+# Usage (from backend/):
+#   python -m pytest tests
+import os
+import sys
+import threading
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+import analysis_reports # noqa: E402
+from monitor_batch import run_batch, synthetic_signal # noqa: E402
+
+
+def finished_session(seed, frames=600):
+    """(report, buckets, signal rows) for a monitor fed a synthetic session."""
+    monitor = run_batch(synthetic_signal(frames, seed=seed), 100)
+    report, buckets = analysis_reports.build_report(f"sid-{seed}", monitor.get_final_conclusion(),
+                                                    monitor.first_frame_time, host_sid="host", room_id="room-1",
+                                                    participant_name=f"Candidate {seed}", node_id="node-a")
+    return report, buckets, monitor.signal.rows().copy()
+
+
+def writer_for(tmp_path, **options):
+    writer = analysis_reports.AnalysisReportWriter(url=f"sqlite:///{tmp_path / 'reports.db'}", **options)
+    writer.start()
+    return writer
+
+
+def test_signal_encoding_round_trip():
+    _, _, rows = finished_session(0)
+    rows["yaw"][:5] = np.nan
+    decoded = analysis_reports.decode_signal(analysis_reports.encode_signal(rows))
+    assert decoded.dtype == rows.dtype
+    assert decoded.tobytes() == rows.tobytes() # NaN-safe comparison
+
+
+def test_submit_batches_and_reads_back(tmp_path):
+    writer = writer_for(tmp_path, batch_size=2, flush_seconds=0.05)
+    sessions = [finished_session(seed) for seed in range(5)]
+    for report, buckets, signal in sessions:
+        assert writer.submit(report, buckets, signal)
+    writer.stop()
+    assert writer.stats()["written"] == 5
+    assert writer.stats()["batches"] >= 3 # At most two reports per transaction
+
+    reader = writer_for(tmp_path)
+    try:
+        listed = reader.list_reports(room_id="room-1")
+        assert sorted(report["report_id"] for report in listed) == sorted(report["report_id"] for report, _, _ in sessions)
+        assert [report["ended_at"] for report in listed] == sorted((report["ended_at"] for report in listed), reverse=True)
+        assert "timeline" not in listed[0]
+
+        report, buckets, signal = sessions[3]
+        stored = reader.get_report(report["report_id"])
+        assert stored["status_text"] == report["status_text"]
+        assert stored["suspicion_score"] == report["suspicion_score"]
+        assert stored["details"]["gaze_deflection_count"] == report["details"]["gaze_deflection_count"]
+        assert len(stored["timeline"]) == len(buckets)
+        assert stored["timeline"][0]["frames"] == buckets[0]["frames"]
+        assert reader.get_report("missing") is None
+
+        ids = [report["report_id"] for report, _, _ in sessions[:3]] + ["missing"]
+        loaded = reader.load_signals(ids)
+        assert [row["report_id"] for row, _ in loaded] == ids[:3]
+        for (row, rows), (_, _, signal) in zip(loaded, sessions):
+            assert rows.tobytes() == signal.tobytes()
+        assert sorted(reader.signal_report_ids(ids)) == sorted(ids[:3])
+    finally:
+        reader.stop()
+
+
+def test_stop_flushes_queued_reports(tmp_path):
+    writer = writer_for(tmp_path, batch_size=100, flush_seconds=30.0) # Would wait 30 s to fill a batch
+    for seed in range(3):
+        writer.submit(*finished_session(seed, frames=50))
+    writer.stop(timeout=5.0)
+    assert writer.stats()["written"] == 3
+    assert writer.stats()["queued"] == 0
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    writer = writer_for(tmp_path, batch_size=1, flush_seconds=0.0, queue_limit=2)
+    writing, release = threading.Event(), threading.Event()
+    write = writer._write
+
+    def blocked_write(batch):
+        writing.set()
+        release.wait(5.0)
+        write(batch)
+
+    writer._write = blocked_write
+    sessions = [finished_session(seed, frames=50) for seed in range(4)]
+    assert writer.submit(*sessions[0])
+    assert writing.wait(5.0) # The writer thread holds the first report; the queue is empty again
+    assert writer.submit(*sessions[1]) and writer.submit(*sessions[2])
+    assert not writer.submit(*sessions[3])
+    assert writer.stats()["dropped"] == 1
+    release.set()
+    writer.stop()
+    assert writer.stats()["written"] == 3
+
+
+def test_rescore_flags_truncated_signals(tmp_path):
+    import analysis_rescoring
+    import interview_analyzer_module
+    writer = writer_for(tmp_path)
+    sessions = [finished_session(seed) for seed in range(3)]
+    sessions[1][0]["details"]["signal_dropped_frames"] = 40
+    for session in sessions:
+        writer.submit(*session)
+    writer.stop()
+
+    reader = writer_for(tmp_path)
+    try:
+        ids = [report["report_id"] for report, _, _ in sessions]
+        assert [row["dropped_frames"] for row, _ in reader.load_signals(ids)] == [0, 40, 0]
+        strict = interview_analyzer_module.scoring_policy(yaw_threshold=1, gaze_deflection_seconds=0.5)
+        result = analysis_rescoring.rescore_reports(reader, strict, report_ids=ids)
+    finally:
+        reader.stop()
+    flagged = {report["report_id"]: report["truncated"] for report in result["reports"]}
+    assert flagged == {ids[0]: False, ids[1]: True, ids[2]: False}
+    assert result["truncated"] == 1
+    assert result["concern_level_changed"] <= 2
@@ -0,0 +1,52 @@
+# backend/tests/test_monitor_batch.py
+# CheatingMonitor.update_metrics_batch must leave the monitor in exactly the
+# state the scalar update_metrics path does, whatever the batch boundaries.
+# Throughput is measured by benchmarks/monitor_batch.py, which this reuses.
+#
+# Usage (from backend/):
+#   python -m pytest tests
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+import interview_analyzer_module as iam # noqa: E402
+from monitor_batch import monitor_state, run_batch, run_scalar, synthetic_signal # noqa: E402
+
+
+def assert_same_state(signal, batch_size):
+    scalar, batch = monitor_state(run_scalar(signal)), monitor_state(run_batch(signal, batch_size))
+    mismatches = [field for field in scalar if scalar[field] != batch[field]]
+    assert not mismatches, f"batch size {batch_size}: {mismatches} differ from the scalar path"
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("batch_size", [1, 7, 25, 600])
+def test_batch_matches_scalar(seed, batch_size):
+    assert_same_state(synthetic_signal(3000, seed=seed), batch_size)
+
+
+def test_batch_matches_scalar_past_timeline_capacity():
+    assert_same_state(synthetic_signal(20000, seed=3), 997)
+
+
+@pytest.mark.parametrize("split", [1, 37, 99])
+def test_split_inside_open_run(split):
+    """One sustained look-away (gaze and head) cut by a batch boundary, then a break and a shorter one."""
+    frames = 160
+    timestamps = 1.7e9 + np.arange(frames) * 0.1
+    timestamps[110:] += 2.0 # Gap longer than RUN_GAP_SECONDS ends the first run
+    gaze_codes = np.full(frames, iam.GAZE_LABELS.tolist().index("Looking Left"), dtype=np.int64)
+    yaws = np.full(frames, iam.POLICY_DEFAULTS["yaw_threshold"] + 10.0)
+    pitches = np.full(frames, 178.0)
+    rolls = np.zeros(frames)
+    signal = (timestamps, gaze_codes, yaws, pitches, rolls)
+    assert_same_state(signal, split)
+
+    monitor = run_batch(signal, split)
+    assert monitor.gaze_runs.count == 1 # The 11 s run counts, the 5 s one after the gap is too short for gaze
+    assert monitor.head_runs.count == 2
@@ -0,0 +1,79 @@
+# backend/tests/test_session_registry.py
+# SessionRegistry over a shared store: two registries on one
+# InMemoryStore(shared=True) stand in for two nodes on one Redis server.
+#
+# Usage (from backend/):
+#   python -m pytest tests
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from session_registry import SessionRegistry # noqa: E402
+from state_store import InMemoryStore # noqa: E402
+
+
+def two_nodes():
+    store = InMemoryStore(shared=True)
+    return SessionRegistry(store), SessionRegistry(store)
+
+
+def test_room_created_by_one_node_only():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        (room_a, created_a), (room_b, created_b) = await asyncio.gather(
+            node_a.get_or_create_room("r1", "sid-a", is_locked=True),
+            node_b.get_or_create_room("r1", "sid-b"))
+        assert [created_a, created_b].count(True) == 1
+        assert room_a == room_b == {'creator_sid': "sid-a", 'is_locked': True}
+        assert await node_b.get_room("r1") == room_a
+
+    asyncio.run(scenario())
+
+
+def test_room_fields_written_together():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        await node_a.get_or_create_room("r1", "sid-a", is_locked=True)
+        assert await node_b.store.hgetall("room:r1") == {'creator_sid': "sid-a", 'is_locked': "1"}
+        assert await node_b.remove_room("r1")
+        assert await node_a.get_room("r1") is None
+        _, created = await node_b.get_or_create_room("r1", "sid-b")
+        assert created
+
+    asyncio.run(scenario())
+
+
+def test_claim_analysis_across_nodes():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        results = await asyncio.gather(node_a.claim_analysis("target", "host-a", "node-a"),
+                                       node_b.claim_analysis("target", "host-b", "node-b"))
+        assert sorted(results) == [False, True]
+        winner_host, winner_node = ("host-a", "node-a") if results[0] else ("host-b", "node-b")
+        assert await node_b.analysis_host("target") == winner_host
+        assert await node_a.analysis_node("target") == winner_node
+        assert await node_b.analyses_hosted_by(winner_host) == ["target"]
+
+        assert await node_b.remove_analysis("target") == winner_host
+        assert await node_a.analyses_hosted_by(winner_host) == []
+        assert await node_a.claim_analysis("target", "host-a", "node-a")
+        assert (await node_b.stats())["analyses"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_participants_seen_across_nodes():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        await node_a.get_or_create_room("r1", "sid-a")
+        await node_a.add_participant("r1", "sid-a", "Alice")
+        assert await node_a.participants_snapshot("r1") == [{'id': "sid-a", 'name': "Alice"}]
+        await node_b.add_participant("r1", "sid-b", "Bob") # Not cached on node A: the store is shared
+        assert await node_a.participants_snapshot("r1") == [{'id': "sid-a", 'name': "Alice"},
+                                                            {'id': "sid-b", 'name': "Bob"}]
+        assert await node_a.room_of("sid-b") == "r1"
+        assert await node_a.remove_participant("sid-b") == ("r1", "Bob")
+        assert await node_b.participant_sids("r1") == ["sid-a"]
+
+    asyncio.run(scenario())
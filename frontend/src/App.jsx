@@ -77,6 +77,8 @@ function App() {
 
   // Add this with other state variables
   const [analysisConnectionState, setAnalysisConnectionState] = useState({});
+  // Admission-control outcome per target when the server is short of capacity: { sid: { decision, queue_position, analysis_fps, ... } }
+  const [analysisAdmission, setAnalysisAdmission] = useState({});
 
   // Helper function to format detail keys for display
   const formatDetailKey = (key) => {
@@ -118,6 +120,7 @@ function App() {
         setAnalyzingSids({});
         setAnalysisResults({});
         setAnalysisConnectionState({});
+        setAnalysisAdmission({});
         analysisButtonDisabledRef.current = {};
         setAnalysisButtonDisabled({});
     });
@@ -306,7 +309,29 @@ function App() {
     });
 
     // --- Host listeners for analysis updates ---
-    // Removed 'analysis_update' listener
+    // Periodic summary deltas (every few seconds, not per frame); acking lets the server pace them
+    newSocket.on('analysis_update', (data, ack) => {
+      if (typeof ack === 'function') ack();
+      if (!socketRef.current || data.expected_host_sid !== socketRef.current.id) return;
+      setAnalysisResults(prevResults => {
+        const previous = prevResults[data.target_sid];
+        if (previous && !previous.live && data.seq > 0) return prevResults; // Final conclusion already arrived
+        const previousEvents = (previous?.live && previous.details.key_events_triggered) || [];
+        return {
+          ...prevResults,
+          [data.target_sid]: {
+            live: true,
+            status_text: `Live: ${data.status_text}`,
+            details: {
+              total_frames_analyzed: data.totals.frames,
+              gaze_deflection_count: data.totals.gaze_deflection_count,
+              head_turn_count: data.totals.head_turn_count,
+              key_events_triggered: [...previousEvents, ...data.new_events].slice(-20),
+            },
+          },
+        };
+      });
+    });
 
     // New listener for the final conclusion
     newSocket.on('analysis_final_conclusion', (data) => {
@@ -342,11 +367,12 @@ function App() {
         analysisButtonDisabledRef.current[data.target_sid] = false;
         setAnalysisButtonDisabled(prev => ({ ...prev, [data.target_sid]: false }));
         setAnalysisConnectionState(prev => {
-            if (prev[data.target_sid] !== 'concluded') {
+            if (prev[data.target_sid] !== 'concluded' && prev[data.target_sid] !== 'rejected') {
                 return { ...prev, [data.target_sid]: data.error ? 'failed' : 'stopped_remotely' };
             }
             return prev;
         });
+        setAnalysisAdmission(prev => { const updated = {...prev}; delete updated[data.target_sid]; return updated; });
       } else {
         console.warn('[ANALYSIS] Received analysis_stopped_for_host_ui. Expected host SID:', data.expected_host_sid, 'Current socket ID:', socketRef.current?.id, 'isHost state:', isHost, 'Data:', data);
       }
@@ -372,6 +398,7 @@ function App() {
           setAnalyzingSids(prev => { const updated = {...prev}; delete updated[userWhoLeftSid]; return updated; });
           setAnalysisResults(prev => { const updated = {...prev}; delete updated[userWhoLeftSid]; return updated; });
           setAnalysisConnectionState(prev => { const updated = {...prev}; delete updated[userWhoLeftSid]; return updated; });
+          setAnalysisAdmission(prev => { const updated = {...prev}; delete updated[userWhoLeftSid]; return updated; });
           if (analysisButtonDisabledRef.current[userWhoLeftSid]) {
             delete analysisButtonDisabledRef.current[userWhoLeftSid];
             setAnalysisButtonDisabled(prev => { const u = {...prev}; delete u[userWhoLeftSid]; return u; });
@@ -392,6 +419,13 @@ function App() {
       // Re-enable button only after connection is established
       analysisButtonDisabledRef.current[data.target_sid] = false;
       setAnalysisButtonDisabled(prev => ({ ...prev, [data.target_sid]: false }));
+      // A queued start has been admitted by now (a degraded one keeps its note)
+      setAnalysisAdmission(prev => {
+        if (prev[data.target_sid]?.decision !== 'queued') return prev;
+        const updated = {...prev};
+        delete updated[data.target_sid];
+        return updated;
+      });
     });
 
     newSocket.on('analysis_connection_failed', (data) => {
@@ -413,6 +447,38 @@ function App() {
       // Or, if a conclusion was never reached, results would be empty anyway.
     });
 
+    // Admission control: the server may queue, degrade or reject a start when it is short of capacity
+    newSocket.on('analysis_queued', (data) => {
+      if (!socketRef.current || data.expected_host_sid !== socketRef.current.id) return;
+      console.log('[ANALYSIS] Queued for:', data.target_sid, 'at position', data.queue_position);
+      setAnalysisAdmission(prev => ({ ...prev, [data.target_sid]: data }));
+      setAnalysisConnectionState(prev => ({ ...prev, [data.target_sid]: 'queued' }));
+      setAnalyzingSids(prev => ({ ...prev, [data.target_sid]: true }));
+      // Keep Stop usable while waiting for a slot
+      analysisButtonDisabledRef.current[data.target_sid] = false;
+      setAnalysisButtonDisabled(prev => ({ ...prev, [data.target_sid]: false }));
+    });
+
+    newSocket.on('analysis_degraded', (data) => {
+      if (!socketRef.current || data.expected_host_sid !== socketRef.current.id) return;
+      console.log('[ANALYSIS] Degraded analysis for:', data.target_sid, 'at', data.analysis_fps, 'fps');
+      setAnalysisAdmission(prev => ({ ...prev, [data.target_sid]: data }));
+    });
+
+    newSocket.on('analysis_rejected', (data) => {
+      if (!socketRef.current || data.expected_host_sid !== socketRef.current.id) return;
+      console.log('[ANALYSIS] Rejected for:', data.target_sid, data.reason);
+      setAnalysisAdmission(prev => ({ ...prev, [data.target_sid]: data }));
+      setAnalysisConnectionState(prev => ({ ...prev, [data.target_sid]: 'rejected' }));
+      setAnalyzingSids(prev => {
+        const updated = {...prev};
+        delete updated[data.target_sid];
+        return updated;
+      });
+      analysisButtonDisabledRef.current[data.target_sid] = false;
+      setAnalysisButtonDisabled(prev => ({ ...prev, [data.target_sid]: false }));
+    });
+
     // New socket event listener for 'meeting_ended_by_host'
     newSocket.on('meeting_ended_by_host', (data) => {
       console.log(`[Socket Event] Meeting ended by host for room: ${data.room_id}`);
@@ -427,9 +493,12 @@ function App() {
         newSocket.off('analysis_connection_established');
         newSocket.off('analysis_connection_failed');
         newSocket.off('meeting_ended_by_host');
-        // Removed 'analysis_update' from cleanup
+        newSocket.off('analysis_update');
         newSocket.off('analysis_final_conclusion'); // Add new event to cleanup
         newSocket.off('analysis_stopped_for_host_ui');
+        newSocket.off('analysis_queued');
+        newSocket.off('analysis_degraded');
+        newSocket.off('analysis_rejected');
         newSocket.off('connection_success');
         newSocket.off('waiting_for_approval');
         newSocket.off('admission_denied');
@@ -869,6 +938,13 @@ function App() {
         console.log(`[ANALYSIS Start] Updating analyzingSids for ${targetSid}`);
         return { ...prev, [targetSid]: true };
       });
+      setAnalysisAdmission(prev => { const updated = {...prev}; delete updated[targetSid]; return updated; });
+      setAnalysisConnectionState(prev => {
+        if (prev[targetSid] !== 'rejected') return prev;
+        const updated = {...prev};
+        delete updated[targetSid];
+        return updated;
+      });
     }
   };
 
@@ -1254,6 +1330,7 @@ function App() {
                                           analysisConnectionState[p.id] === 'failed' ? 'Connection failed. Try again.' :
                                           analysisConnectionState[p.id] === 'concluded' ? 'View Last Conclusion / Re-analyze' :
                                           analysisConnectionState[p.id] === 'stopped_remotely' ? 'Analysis stopped. Try again.' :
+                                          analysisConnectionState[p.id] === 'rejected' ? (analysisAdmission[p.id]?.reason || 'Server at capacity. Try again later.') :
                                           'Start analysis'
                                         }
                                     >
@@ -1262,6 +1339,7 @@ function App() {
                                              analysisConnectionState[p.id] === 'failed' ? 'Retry Analysis' :
                                              analysisConnectionState[p.id] === 'concluded' ? 'Re-Analyze' :
                                              analysisConnectionState[p.id] === 'stopped_remotely' ? 'Retry Analysis' :
+                                             analysisConnectionState[p.id] === 'rejected' ? 'Retry Analysis' :
                                              'Analyze'}
                                             {analysisButtonDisabled[p.id] && analysisConnectionState[p.id] !== 'concluded' && <span className="loading-dot">.</span>}
                                         </span>
@@ -1271,10 +1349,17 @@ function App() {
                                         onClick={() => debounceAnalysisAction(requestStopAnalysis, p.id)} 
                                         className={`analysis-action-button stop ${analysisButtonDisabled[p.id] ? 'disabled' : ''}`}
                                         disabled={analysisButtonDisabled[p.id]}
-                                        title={analysisButtonDisabled[p.id] ? 'Please wait...' : 'Stop analysis'}
+                                        title={
+                                          analysisButtonDisabled[p.id] ? 'Please wait...' :
+                                          analysisConnectionState[p.id] === 'queued' ? `Waiting for analysis capacity (position ${analysisAdmission[p.id]?.queue_position}). Click to cancel.` :
+                                          analysisAdmission[p.id]?.decision === 'degraded' ? `Reduced analysis rate (${analysisAdmission[p.id].analysis_fps} fps) while the server is busy. Stop analysis` :
+                                          'Stop analysis'
+                                        }
                                     >
                                         <span className="button-content">
-                                            {analysisButtonDisabled[p.id] ? 'Stopping...' : 'Stop Analysis'}
+                                            {analysisButtonDisabled[p.id] ? 'Stopping...' :
+                                             analysisConnectionState[p.id] === 'queued' ? `Queued (#${analysisAdmission[p.id]?.queue_position}) - Cancel` :
+                                             'Stop Analysis'}
                                             {analysisButtonDisabled[p.id] && <span className="loading-dot">.</span>}
                                         </span>
                                     </button>